@@ -0,0 +1,82 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+
+class CacheBackend(ABC):
+    """
+    Minimal key/value interface the cache layers are written against.
+
+    Values are JSON-compatible (dicts, lists, strings, numbers), so a
+    shared cache such as Redis or memcached can implement this interface
+    without changing its callers.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or ``None`` on a miss"""
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value, expiring after ``ttl`` seconds when given"""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove a key if present"""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove every key"""
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    Process-local cache with per-entry TTL and LRU eviction.
+
+    Memory is bounded by ``max_entries``: once full, the least recently
+    used entry is evicted on every insert. Expired entries are dropped
+    lazily when they are read.
+    """
+
+    def __init__(self, max_entries: int = 10000, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.clock = clock
+        self.evictions = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= self.clock():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = self.clock() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,59 @@
+import threading
+from typing import Any, Dict, Optional
+
+from app.cache.backends import MemoryCacheBackend
+from app.config.settings import settings
+
+
+class BodyCache:
+    """
+    In-process LRU of encoded response bodies, such as compressed pages.
+
+    Bodies are bytes, which ``CacheBackend`` does not promise to hold (its
+    values must suit a shared JSON cache), so this always uses a memory
+    backend and is not swapped for a shared one. It keeps its own
+    counters, apart from those of the product cache. Keys identify the
+    representation (e.g. coding plus ETag), so they never go stale; bodies
+    of pages that stop being requested are evicted as LRU.
+    """
+
+    def __init__(self, max_entries: int):
+        self.backend = MemoryCacheBackend(max_entries=max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Look up a body, counting the hit or miss"""
+        body = self.backend.get(key)
+        with self._lock:
+            if body is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return body
+
+    def set(self, key: str, body: bytes) -> bytes:
+        """Store a body and return it"""
+        self.backend.set(key, body)
+        return body
+
+    def clear(self) -> None:
+        """Drop every body and reset the counters"""
+        self.backend.clear()
+        with self._lock:
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters suitable for scraping"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "entries": len(self.backend),
+            "evictions": self.backend.evictions,
+        }
+
+
+encoded_bodies = BodyCache(max_entries=settings.COMPRESSION_PRECOMPRESS_MAX_ENTRIES)
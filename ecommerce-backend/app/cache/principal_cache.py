@@ -0,0 +1,93 @@
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event, inspect
+
+from app.cache.backends import CacheBackend, MemoryCacheBackend
+from app.config.settings import settings
+from app.models.user import User
+
+# Columns copied into the snapshot; everything a handler reads off current_user
+PRINCIPAL_FIELDS = ("id", "email", "username", "full_name", "is_active", "is_admin", "created_at")
+
+
+class PrincipalCache:
+    """
+    Short-TTL cache of authenticated users keyed by token subject.
+
+    Entries are plain snapshots of the user's columns. A hit is returned
+    as a transient ``User`` that is not attached to any session, which is
+    enough for handlers that read ``current_user.id`` and friends without
+    a database round trip. Any flush that updates or deletes a user
+    invalidates its entry, so deactivation takes effect immediately.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float, enabled: bool = True):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled and ttl > 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def key(self, username: str) -> str:
+        """Cache key of a token subject"""
+        return f"principal:{username}"
+
+    def get(self, username: str) -> Optional[User]:
+        """Return a detached snapshot of the user, or ``None`` on a miss"""
+        if not self.enabled:
+            return None
+
+        snapshot = self.backend.get(self.key(username))
+        with self._lock:
+            if snapshot is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        values = dict(snapshot)
+        if values.get("created_at"):
+            values["created_at"] = datetime.fromisoformat(values["created_at"])
+        return User(**values)
+
+    def set(self, user: User) -> None:
+        """Cache a snapshot of a freshly loaded user"""
+        if not self.enabled:
+            return
+
+        snapshot: Dict[str, Any] = {field: getattr(user, field) for field in PRINCIPAL_FIELDS}
+        if snapshot["created_at"] is not None:
+            snapshot["created_at"] = snapshot["created_at"].isoformat()
+        self.backend.set(self.key(user.username), snapshot, ttl=self.ttl)
+
+    def invalidate(self, username: str) -> None:
+        """Forget a user, e.g. after deactivation"""
+        self.backend.delete(self.key(username))
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters"""
+        self.backend.clear()
+        with self._lock:
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters suitable for scraping"""
+        return {"enabled": self.enabled, "hits": self.hits, "misses": self.misses}
+
+
+principal_cache = PrincipalCache(
+    MemoryCacheBackend(max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES),
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_principal(mapper, connection, target: User) -> None:
+    """Drop cached snapshots of a user whenever its row changes"""
+    history = inspect(target).attrs.username.history
+    for username in {target.username, *history.deleted}:
+        if username:
+            principal_cache.invalidate(username)
@@ -0,0 +1,126 @@
+import threading
+import uuid
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from app.cache.backends import CacheBackend, MemoryCacheBackend
+from app.config.settings import settings
+from app.schemas.product import ProductResponse
+
+# Listing scope for pages that are not filtered by category
+ALL_PRODUCTS = "*"
+
+
+def serialize_product(product) -> Dict[str, Any]:
+    """Convert a Product row into the JSON-compatible dict that is cached"""
+    return ProductResponse.model_validate(product).model_dump(mode="json")
+
+
+class ProductCache:
+    """
+    Read-through cache for product detail and listing responses.
+
+    Detail entries are keyed by product id and deleted when the product
+    changes. Listing pages are keyed by their scope (a category, or ``*``
+    for unfiltered listings) plus a generation token stored in the
+    backend; invalidating a scope replaces the token, which orphans every
+    page cached under it in one write. Orphans age out through TTL/LRU.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float, enabled: bool = True):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    def product_key(self, product_id: int) -> str:
+        """Cache key of a single product"""
+        return f"product:{product_id}"
+
+    def listing_key(self, category: Optional[str], **params: Any) -> str:
+        """Cache key of a listing page under the current scope generation"""
+        scope = category or ALL_PRODUCTS
+        query = "&".join(f"{name}={params[name]}" for name in sorted(params))
+        return f"products:list:{scope}:{self._generation(scope)}:{query}"
+
+    def get(self, key: str) -> Optional[Any]:
+        """Look up a key, counting the hit or miss"""
+        if not self.enabled:
+            return None
+
+        value = self.backend.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any) -> Any:
+        """Store a value under the configured TTL and return it"""
+        if self.enabled:
+            self.backend.set(key, value, ttl=self.ttl)
+        return value
+
+    def invalidate_product(self, product_id: int, *categories: Optional[str]) -> None:
+        """Drop a product and every listing page it may appear on"""
+        self.backend.delete(self.product_key(product_id))
+        self.invalidate_category(*categories)
+
+    def invalidate_products(self, products: Iterable[Tuple[int, Optional[str]]]) -> None:
+        """Invalidate many ``(product_id, category)`` pairs at once"""
+        categories = set()
+        for product_id, category in products:
+            self.backend.delete(self.product_key(product_id))
+            categories.add(category)
+        if categories:
+            self.invalidate_category(*categories)
+
+    def invalidate_category(self, *categories: Optional[str]) -> None:
+        """Drop listing pages of the given categories and the unfiltered listing"""
+        scopes = {ALL_PRODUCTS} | {category for category in categories if category}
+        for scope in scopes:
+            self.backend.set(self._generation_key(scope), uuid.uuid4().hex)
+        with self._lock:
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters"""
+        self.backend.clear()
+        with self._lock:
+            self.hits = self.misses = self.invalidations = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters suitable for scraping"""
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "invalidations": self.invalidations,
+            "entries": len(self.backend) if hasattr(self.backend, "__len__") else None,
+            "evictions": getattr(self.backend, "evictions", None),
+        }
+
+    def _generation_key(self, scope: str) -> str:
+        return f"products:generation:{scope}"
+
+    def _generation(self, scope: str) -> str:
+        """Current generation token of a listing scope, created on first use"""
+        key = self._generation_key(scope)
+        generation = self.backend.get(key)
+        if generation is None:
+            # A lost token (evicted or never set) must never match old pages
+            generation = uuid.uuid4().hex
+            self.backend.set(key, generation)
+        return generation
+
+
+product_cache = ProductCache(
+    MemoryCacheBackend(max_entries=settings.PRODUCT_CACHE_MAX_ENTRIES),
+    ttl=settings.PRODUCT_CACHE_TTL_SECONDS,
+    enabled=settings.PRODUCT_CACHE_ENABLED,
+)
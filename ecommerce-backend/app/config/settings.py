@@ -7,16 +7,99 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str
+    DATABASE_ASYNC: bool = False
     
+    # Connection pool (ignored for SQLite)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_PGBOUNCER: bool = False
+    
+    # Read replicas (comma-separated URLs; empty sends every read to the primary)
+    DATABASE_REPLICA_URLS: str = ""
+    DB_REPLICA_RETRY_SECONDS: float = 10.0
+    DB_READ_YOUR_WRITES_SECONDS: float = 5.0
+    
+    # Encode responses with orjson / pydantic-core instead of response_model + json
+    FAST_JSON_RESPONSES: bool = True
+    
+    # Response compression (brotli needs the optional brotli package)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_PRECOMPRESS_CATALOG: bool = True
+    COMPRESSION_PRECOMPRESS_MAX_ENTRIES: int = 1000
+    
+    # Prometheus-style /metrics endpoint and request/query instrumentation
+    METRICS_ENABLED: bool = True
+    
+    # SQL profiling: slow-query log, Server-Timing header, and (with DEBUG)
+    # per-statement stats at /debug/sql/slowest
+    SLOW_QUERY_LOG_ENABLED: bool = True
+    SLOW_QUERY_THRESHOLD_MS: float = 200.0
+    SERVER_TIMING_ENABLED: bool = False
+    SQL_PROFILE_MAX_STATEMENTS: int = 1000
+
+    # Idempotency-Key on order creation ("database" is shared by all
+    # workers, "memory" only holds within one process)
+    IDEMPOTENCY_BACKEND: str = "database"
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_LOCK_SECONDS: float = 30.0
+    IDEMPOTENCY_WAIT_SECONDS: float = 10.0
+    IDEMPOTENCY_MAX_ENTRIES: int = 100000
+
+    # Transactional outbox (order side effects) and its dispatcher; the
+    # dispatcher runs in every API worker when enabled
+    OUTBOX_DISPATCHER_ENABLED: bool = False
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 1.0
+    OUTBOX_MAX_ATTEMPTS: int = 10
+    OUTBOX_RETRY_BACKOFF_SECONDS: float = 1.0
+    OUTBOX_RETRY_MAX_SECONDS: float = 300.0
+    OUTBOX_RETENTION_HOURS: int = 24
+
     # JWT
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
+    # Password hashing pool
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+    PASSWORD_HASH_USE_PROCESSES: bool = True
+    
     # App
     APP_NAME: str = "E-commerce API"
     DEBUG: bool = False
     
+    # Inventory
+    INVENTORY_LOCK_ROWS: bool = True
+    INVENTORY_MAX_RETRIES: int = 3
+    INVENTORY_RETRY_BACKOFF_MS: int = 10
+    
+    # Product cache
+    PRODUCT_CACHE_ENABLED: bool = True
+    PRODUCT_CACHE_TTL_SECONDS: int = 60
+    PRODUCT_CACHE_MAX_ENTRIES: int = 10000
+    
+    # In-process search index (SQLite only), rebuilt after this many seconds
+    SEARCH_INDEX_MAX_AGE_SECONDS: int = 300
+    
+    # Bulk product import/export
+    PRODUCT_IMPORT_CHUNK_SIZE: int = 1000
+    PRODUCT_IMPORT_MAX_ERRORS: int = 100
+    PRODUCT_EXPORT_BATCH_SIZE: int = 1000
+    
+    # Rows fetched per server-side cursor batch by the order history export
+    ORDER_EXPORT_BATCH_SIZE: int = 1000
+    
+    # Authenticated user cache (0 disables)
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 30
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -0,0 +1,103 @@
+"""
+Backfill order_items from the JSON line items stored on orders.
+
+Orders placed before the order_items table existed only have their
+``orders.items`` JSON. This converts them in batches of whole orders, one
+transaction per batch, walking orders by id. Orders that already have
+line items are skipped, so the tool can be stopped and re-run at any time.
+
+Usage:
+    python -m app.database.backfill --batch-size 1000
+"""
+import argparse
+from typing import Callable, Optional
+
+from sqlalchemy import exists, insert, select
+from sqlalchemy.engine import Engine
+
+from app.models.order import Order, OrderItem
+from app.models.product import Product
+
+
+def backfill_order_items(
+    engine: Engine,
+    batch_size: int = 1000,
+    progress: Optional[Callable[[int, int], None]] = None
+) -> int:
+    """
+    Convert the JSON items of every order without line items.
+
+    Line items pointing at products that no longer exist keep their name
+    and price but get a NULL ``product_id``, as deleted products do.
+
+    Args:
+        engine: Engine of the database to migrate
+        batch_size: Orders converted per transaction
+        progress: Called with (orders converted, last order id) after each batch
+
+    Returns:
+        int: Number of orders converted
+    """
+    converted = 0
+    last_id = 0
+    pending = ~exists().where(OrderItem.order_id == Order.id)
+
+    while True:
+        with engine.begin() as conn:
+            orders = conn.execute(
+                select(Order.id, Order.items_json)
+                .where(Order.id > last_id, pending)
+                .order_by(Order.id)
+                .limit(batch_size)
+            ).all()
+            if not orders:
+                return converted
+
+            lines = [
+                {
+                    "order_id": order_id,
+                    "product_id": item.get("product_id"),
+                    "name": item.get("name") or "",
+                    "quantity": item["quantity"],
+                    "price": float(item["price"]),
+                }
+                for order_id, items in orders
+                for item in items or []
+            ]
+
+            referenced = {line["product_id"] for line in lines if line["product_id"] is not None}
+            known = set(conn.execute(
+                select(Product.id).where(Product.id.in_(referenced))
+            ).scalars()) if referenced else set()
+            for line in lines:
+                if line["product_id"] not in known:
+                    line["product_id"] = None
+
+            if lines:
+                conn.execute(insert(OrderItem), lines)
+
+        converted += len(orders)
+        last_id = orders[-1][0]
+        if progress is not None:
+            progress(converted, last_id)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    from app.database.connection import Base, engine
+
+    # Creates order_items (and its indexes) if the app has not yet
+    Base.metadata.create_all(bind=engine)
+    converted = backfill_order_items(
+        engine,
+        args.batch_size,
+        progress=lambda done, last_id: print(f"converted {done} orders (up to id {last_id})")
+    )
+    print(f"done: {converted} orders converted")
+
+
+if __name__ == "__main__":
+    main()
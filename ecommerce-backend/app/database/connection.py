@@ -1,10 +1,19 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from app.config.settings import settings
+from app.database.pool import engine_options
+
+# Async driver to use for each sync database backend
+ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "sqlite": "aiosqlite",
+}
 
 # Create database engine
-engine = create_engine(settings.DATABASE_URL)
+engine = create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL))
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -13,10 +22,65 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+def async_database_url(database_url: str) -> str:
+    """Swap a sync database URL over to its asyncio driver"""
+    url = make_url(database_url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None or url.get_driver_name() == driver:
+        return database_url
+    return url.set(drivername=f"{url.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+def create_async_session_factory(async_engine) -> async_sessionmaker:
+    """
+    Build an AsyncSession factory.
+    
+    Objects stay loaded after commit, because touching an expired
+    attribute outside ``run_sync`` would need implicit IO.
+    """
+    return async_sessionmaker(
+        bind=async_engine,
+        class_=AsyncSession,
+        autoflush=False,
+        expire_on_commit=False
+    )
+
+
+# Async engine, only built when DATABASE_ASYNC is enabled
+async_engine = create_async_engine(
+    async_database_url(settings.DATABASE_URL),
+    **engine_options(settings.DATABASE_URL, use_async=True)
+) if settings.DATABASE_ASYNC else None
+AsyncSessionLocal = create_async_session_factory(async_engine) if async_engine is not None else None
+
+
 def get_db():
     """Dependency to get database session"""
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db():
+    """Dependency to get an asyncio database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def begin_sqlite_write(db: Session) -> None:
+    """
+    Open the transaction explicitly on SQLite, as a write.
+
+    pysqlite only BEGINs before DML, so a SAVEPOINT issued first would be
+    the outermost transaction and releasing it would commit. IMMEDIATE
+    takes the write lock up front, waiting out the busy timeout, instead of
+    failing to upgrade a read lock halfway through; writers that read
+    first (e.g. claiming outbox events) are thereby serialized.
+    """
+    if db.get_bind().dialect.name != "sqlite":
+        return
+    connection = db.connection()
+    if not connection.connection.driver_connection.in_transaction:
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
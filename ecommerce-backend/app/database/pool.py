@@ -0,0 +1,118 @@
+import threading
+import time
+from typing import Any, Dict
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from app.config.settings import settings
+
+
+class PoolTelemetry:
+    """Checkout wait-time counters shared by the timed pool classes"""
+
+    def _init_telemetry(self) -> None:
+        self._telemetry_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def _timed_get(self, do_get):
+        started = time.perf_counter()
+        try:
+            return do_get()
+        except PoolTimeoutError:
+            with self._telemetry_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            with self._telemetry_lock:
+                self.checkouts += 1
+                self.wait_seconds_total += waited
+                self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+
+class TimedQueuePool(PoolTelemetry, QueuePool):
+    """QueuePool that records how long each checkout waited for a connection"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._init_telemetry()
+
+    def _do_get(self):
+        return self._timed_get(super()._do_get)
+
+
+class TimedAsyncAdaptedQueuePool(PoolTelemetry, AsyncAdaptedQueuePool):
+    """Asyncio flavour of ``TimedQueuePool``"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._init_telemetry()
+
+    def _do_get(self):
+        return self._timed_get(super()._do_get)
+
+
+def engine_options(database_url: str, use_async: bool = False) -> Dict[str, Any]:
+    """
+    Keyword arguments for ``create_engine`` / ``create_async_engine``.
+
+    Pool sizing, timeouts, recycling and pre-ping come from the ``DB_*``
+    settings. SQLite keeps SQLAlchemy's defaults. With ``DB_PGBOUNCER``
+    pooling is left to PgBouncer (NullPool) and asyncpg's prepared
+    statement caches are disabled, which transaction pooling requires.
+    """
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite":
+        return {}
+
+    options: Dict[str, Any] = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+
+    if settings.DB_PGBOUNCER:
+        options["poolclass"] = NullPool
+        if use_async:
+            options["connect_args"] = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+            }
+        return options
+
+    options.update(
+        poolclass=TimedAsyncAdaptedQueuePool if use_async else TimedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    return options
+
+
+def pool_status(engine) -> Dict[str, Any]:
+    """Gauges and checkout wait statistics of an engine's pool"""
+    # Async engines wrap a sync engine that owns the pool
+    pool = getattr(engine, "sync_engine", engine).pool
+    status: Dict[str, Any] = {"class": type(pool).__name__}
+
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=pool._max_overflow,
+        )
+
+    if isinstance(pool, PoolTelemetry):
+        checkouts = pool.checkouts
+        status.update(
+            checkouts=checkouts,
+            timeouts=pool.timeouts,
+            wait_ms_avg=round(pool.wait_seconds_total / checkouts * 1000, 3) if checkouts else 0.0,
+            wait_ms_max=round(pool.wait_seconds_max * 1000, 3),
+        )
+
+    return status
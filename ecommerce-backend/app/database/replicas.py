@@ -0,0 +1,310 @@
+import hashlib
+import hmac
+import itertools
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import Depends, Request
+from jose import JWTError, jwt
+from sqlalchemy import create_engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config.settings import settings
+from app.database import connection
+from app.database.connection import async_database_url, get_async_db, get_db
+from app.database.pool import engine_options, pool_status
+from app.models.user import User
+from app.utils.dependencies import get_current_user, get_current_user_async
+
+# Session.info flag set when a read was pinned to the primary for
+# read-your-writes; such reads also skip the product cache, which a
+# lagging replica may have refilled with the pre-write version.
+READ_YOUR_WRITES = "read_your_writes"
+
+# Cookie carrying the caller's signed read-your-writes deadline
+WRITE_MARKER_COOKIE = "rw_until"
+
+# Request state key under which ``track_write`` leaves the writer
+_WROTE_AS = "wrote_as"
+
+
+class ReplicaSet:
+    """
+    Round-robin selection over replica engines.
+
+    A replica that fails to hand out a connection is skipped for
+    ``retry_after`` seconds, after which it is tried again.
+    """
+
+    def __init__(self, engines: List[Any], retry_after: float, clock: Callable[[], float] = time.monotonic):
+        self.engines = list(engines)
+        self.retry_after = retry_after
+        self.clock = clock
+        self.failures = 0
+        self._down_until: Dict[int, float] = {}
+        self._turn = itertools.count()
+        self._lock = threading.Lock()
+
+    def candidates(self) -> List[Any]:
+        """Healthy replicas, starting with the next one in rotation"""
+        if not self.engines:
+            return []
+
+        start = next(self._turn) % len(self.engines)
+        order = list(range(start, len(self.engines))) + list(range(start))
+        now = self.clock()
+        with self._lock:
+            return [self.engines[i] for i in order if self._down_until.get(i, 0.0) <= now]
+
+    def mark_down(self, engine) -> None:
+        """Take a replica out of rotation for ``retry_after`` seconds"""
+        with self._lock:
+            self._down_until[self.engines.index(engine)] = self.clock() + self.retry_after
+            self.failures += 1
+
+    def status(self) -> List[Dict[str, Any]]:
+        """Health and pool gauges of every replica"""
+        now = self.clock()
+        return [
+            {
+                "url": engine.url.render_as_string(hide_password=True),
+                "healthy": self._down_until.get(i, 0.0) <= now,
+                "pool": pool_status(engine),
+            }
+            for i, engine in enumerate(self.engines)
+        ]
+
+
+class RecentWriters:
+    """Principals that wrote within the last ``window`` seconds"""
+
+    def __init__(self, window: float, clock: Callable[[], float] = time.monotonic):
+        self.window = window
+        self.clock = clock
+        self._writes: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def note(self, principal: Optional[str]) -> None:
+        """Record a write by ``principal``"""
+        if principal is None:
+            return
+
+        now = self.clock()
+        with self._lock:
+            self._writes[principal] = now
+            # Forget expired writers now and then so the map stays small
+            if len(self._writes) > 1024:
+                self._writes = {
+                    key: wrote for key, wrote in self._writes.items()
+                    if now - wrote < self.window
+                }
+
+    def is_recent(self, principal: Optional[str]) -> bool:
+        """Whether ``principal`` wrote within the window"""
+        if principal is None:
+            return False
+
+        wrote = self._writes.get(principal)
+        return wrote is not None and self.clock() - wrote < self.window
+
+
+class WriteMarkers:
+    """
+    Signed read-your-writes deadlines handed to clients.
+
+    ``RecentWriters`` only sees the writes made through its own process, so
+    with several workers the next read may land where the write is
+    unknown. The deadline therefore also travels with the client, signed
+    with ``SECRET_KEY`` and bound to the principal. It is wall-clock time,
+    as it is compared across processes.
+    """
+
+    def __init__(self, window: float, secret: str, clock: Callable[[], float] = time.time):
+        self.window = window
+        self.secret = secret
+        self.clock = clock
+
+    def _signature(self, principal: str, deadline: int) -> str:
+        message = f"{principal}:{deadline}".encode()
+        return hmac.new(self.secret.encode(), message, hashlib.sha256).hexdigest()
+
+    def issue(self, principal: str) -> str:
+        """Marker valid for ``window`` seconds from now"""
+        deadline = int((self.clock() + self.window) * 1000)
+        return f"{deadline}.{self._signature(principal, deadline)}"
+
+    def is_recent(self, principal: Optional[str], marker: Optional[str]) -> bool:
+        """Whether ``marker`` was issued to ``principal`` and has not expired"""
+        if principal is None or not marker:
+            return False
+
+        deadline, _, signature = marker.partition(".")
+        if not deadline.isdigit():
+            return False
+        if not hmac.compare_digest(signature, self._signature(principal, int(deadline))):
+            return False
+        return self.clock() * 1000 < int(deadline)
+
+
+def replica_urls() -> List[str]:
+    """Configured replica URLs"""
+    return [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+
+
+def request_principal(request: Request) -> Optional[str]:
+    """
+    Username carried by the request's bearer token, if any.
+
+    The token is not verified here: it only decides where the request's
+    own reads go, and authentication still happens in the user
+    dependencies. Writes are recorded with the authenticated user instead.
+    """
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+
+    try:
+        return jwt.get_unverified_claims(token).get("sub")
+    except JWTError:
+        return None
+
+
+replicas = ReplicaSet(
+    [create_engine(url, **engine_options(url)) for url in replica_urls()],
+    retry_after=settings.DB_REPLICA_RETRY_SECONDS,
+)
+async_replicas = ReplicaSet(
+    [
+        create_async_engine(async_database_url(url), **engine_options(url, use_async=True))
+        for url in replica_urls()
+    ] if settings.DATABASE_ASYNC else [],
+    retry_after=settings.DB_REPLICA_RETRY_SECONDS,
+)
+recent_writers = RecentWriters(settings.DB_READ_YOUR_WRITES_SECONDS)
+write_markers = WriteMarkers(settings.DB_READ_YOUR_WRITES_SECONDS, settings.SECRET_KEY)
+
+
+def track_write(request: Request, current_user: User = Depends(get_current_user)):
+    """
+    Dependency for write endpoints: keeps the caller's reads on the primary.
+
+    Runs after authentication, so only the authenticated user is pinned.
+    The write is noted both before the handler runs and after it finishes,
+    so the window covers reads issued while the write is still in flight.
+    ``ReadYourWritesMiddleware`` also hands the caller a write marker, for
+    reads served by other worker processes.
+    """
+    recent_writers.note(current_user.username)
+    setattr(request.state, _WROTE_AS, current_user.username)
+    yield
+    recent_writers.note(current_user.username)
+
+
+async def track_write_async(request: Request, current_user: User = Depends(get_current_user_async)):
+    """Asyncio twin of ``track_write``"""
+    recent_writers.note(current_user.username)
+    setattr(request.state, _WROTE_AS, current_user.username)
+    yield
+    recent_writers.note(current_user.username)
+
+
+def wrote_recently(request: Request) -> bool:
+    """Whether the caller wrote within the window, per this process or their marker"""
+    principal = request_principal(request)
+    return (
+        recent_writers.is_recent(principal)
+        or write_markers.is_recent(principal, request.cookies.get(WRITE_MARKER_COOKIE))
+    )
+
+
+class ReadYourWritesMiddleware:
+    """
+    Set the write marker cookie on responses to tracked writes.
+
+    Only done when replicas are configured and the request succeeded; the
+    cookie is written with the response headers, when the handler (and
+    thus the write) is done.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                principal = scope.get("state", {}).get(_WROTE_AS)
+                if (
+                    principal is not None and message["status"] < 400
+                    and (replicas.engines or async_replicas.engines)
+                ):
+                    MutableHeaders(scope=message).append("Set-Cookie", (
+                        f"{WRITE_MARKER_COOKIE}={write_markers.issue(principal)}; "
+                        f"Max-Age={math.ceil(write_markers.window)}; Path=/; HttpOnly; SameSite=lax"
+                    ))
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def get_read_db(request: Request, db: Session = Depends(get_db)):
+    """
+    Dependency to get a session for read-only handlers.
+
+    Reads go to the next healthy replica, or to the primary session when
+    no replica is configured or reachable, or when the caller wrote
+    recently (read-your-writes).
+    """
+    sticky = bool(replicas.engines) and wrote_recently(request)
+    db.info[READ_YOUR_WRITES] = sticky
+
+    if not sticky:
+        for engine in replicas.candidates():
+            session = connection.SessionLocal(bind=engine)
+            try:
+                session.connection()
+            except DBAPIError:
+                session.close()
+                replicas.mark_down(engine)
+                continue
+
+            try:
+                yield session
+            finally:
+                session.close()
+            return
+
+    yield db
+
+
+async def get_async_read_db(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Asyncio twin of ``get_read_db``"""
+    sticky = bool(async_replicas.engines) and wrote_recently(request)
+    db.info[READ_YOUR_WRITES] = sticky
+
+    if not sticky:
+        for engine in async_replicas.candidates():
+            session = connection.AsyncSessionLocal(bind=engine)
+            try:
+                await session.connection()
+            except DBAPIError:
+                await session.close()
+                async_replicas.mark_down(engine)
+                continue
+
+            try:
+                yield session
+            finally:
+                await session.close()
+            return
+
+    yield db
@@ -0,0 +1,15 @@
+from typing import Callable, Optional
+
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+# INSERT constructs that support ON CONFLICT ... DO UPDATE, per dialect
+INSERTS = {
+    "postgresql": postgresql_insert,
+    "sqlite": sqlite_insert,
+}
+
+
+def upsert_insert(bind) -> Optional[Callable]:
+    """The ``insert`` with ``on_conflict_do_update`` for ``bind``'s dialect, if any"""
+    return INSERTS.get(bind.dialect.name)
@@ -1,13 +1,28 @@
-from fastapi import FastAPI
+from typing import Literal
+
+from fastapi import FastAPI, HTTPException, Query, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from app.cache.body_cache import encoded_bodies
+from app.cache.principal_cache import principal_cache
+from app.cache.product_cache import product_cache
 from app.config.settings import settings
-from app.routers import auth, products, orders
+from app.database.pool import pool_status
+from app.database.replicas import ReadYourWritesMiddleware
+from app.routers import auth, products, orders, analytics
+from app.services.outbox import outbox_dispatcher
+from app.utils.auth import PasswordHasherBusy, password_hasher
+from app.utils.compression import CompressionMiddleware
+from app.utils.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, metrics
+from app.utils.profiling import ProfilingMiddleware, instrument_engine, statement_stats
+from app.utils.responses import DefaultJSONResponse
 
 # Initialize FastAPI app
 app = FastAPI(
     title=settings.APP_NAME,
     description="A complete e-commerce backend API with authentication and CRUD operations",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=DefaultJSONResponse
 )
 
 # Configure CORS
@@ -19,6 +34,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Read-your-writes marker cookie for callers of write endpoints
+app.add_middleware(ReadYourWritesMiddleware)
+
+# Compress responses (outside CORS, so it also covers CORS-decorated responses)
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MIN_SIZE)
+
+# Per-request SQL tracking (slow-query log route tags, Server-Timing)
+app.add_middleware(ProfilingMiddleware)
+
+# Request metrics (outermost, so latency includes compression)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, registry=metrics)
+
 
 @app.on_event("startup")
 def startup_event():
@@ -33,10 +62,56 @@ def startup_event():
         # Ignore errors during startup (will be handled by tests)
         pass
 
-# Include routers
-app.include_router(auth.router)
-app.include_router(products.router)
-app.include_router(orders.router)
+
+@app.on_event("startup")
+def instrument_engines():
+    """Track statements on the primary and replica engines (metrics and SQL profiling)"""
+    from app.database.connection import engine, async_engine
+    from app.database.replicas import replicas, async_replicas
+    for bound in [engine, async_engine, *replicas.engines, *async_replicas.engines]:
+        if bound is not None:
+            instrument_engine(bound)
+
+
+@app.on_event("startup")
+async def start_outbox_dispatcher():
+    """Deliver outbox events (order side effects) in the background"""
+    if settings.OUTBOX_DISPATCHER_ENABLED:
+        outbox_dispatcher.start()
+
+
+@app.on_event("shutdown")
+def shutdown_event():
+    """Stop the password hashing pool"""
+    password_hasher.shutdown()
+
+
+@app.on_event("shutdown")
+async def stop_outbox_dispatcher():
+    await outbox_dispatcher.stop()
+
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    """Shed login/registration load instead of queueing it"""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "1"}
+    )
+
+# Include routers (asyncio twins on AsyncSession when DATABASE_ASYNC is set)
+if settings.DATABASE_ASYNC:
+    from app.routers import async_auth, async_products, async_orders, async_analytics
+    app.include_router(async_auth.router)
+    app.include_router(async_products.router)
+    app.include_router(async_orders.router)
+    app.include_router(async_analytics.router)
+else:
+    app.include_router(auth.router)
+    app.include_router(products.router)
+    app.include_router(orders.router)
+    app.include_router(analytics.router)
 
 
 @app.get("/")
@@ -52,4 +127,48 @@ def root():
 @app.get("/health")
 def health_check():
     """Health check endpoint"""
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+
+@app.get("/health/pool")
+def pool_health():
+    """Connection pool gauges, checkout wait times and replica health"""
+    from app.database.connection import engine, async_engine
+    from app.database.replicas import replicas, async_replicas
+    pools = {"primary": pool_status(engine), "replicas": replicas.status()}
+    if async_engine is not None:
+        pools["primary_async"] = pool_status(async_engine)
+        pools["replicas_async"] = async_replicas.status()
+    return pools
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics_endpoint():
+    """Request, query and pool metrics in the Prometheus text format"""
+    health = pool_health()
+    pools = {name: health[name] for name in ("primary", "primary_async") if name in health}
+    for group in ("replicas", "replicas_async"):
+        for replica in health.get(group, []):
+            pools[f"{group}:{replica['url']}"] = replica["pool"]
+    return PlainTextResponse(metrics.render(pools), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.get("/debug/sql/slowest", include_in_schema=False)
+def slowest_statements(
+    limit: int = Query(20, ge=1, le=200),
+    by: Literal["total", "mean", "max"] = "total"
+):
+    """Slowest normalized statements since startup, with the routes issuing them (DEBUG only)"""
+    if not settings.DEBUG:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    return {"statements": statement_stats.slowest(limit, by), "untracked": statement_stats.dropped}
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    """Cache hit/miss counters"""
+    return {
+        "products": product_cache.stats(),
+        "principals": principal_cache.stats(),
+        "encoded_bodies": encoded_bodies.stats()
+    }
\ No newline at end of file
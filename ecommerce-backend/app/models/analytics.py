@@ -0,0 +1,46 @@
+from sqlalchemy import Column, Integer, String, Float, Date, Index
+from app.database.connection import Base
+
+# Rollup tables behind /api/analytics. Order writes publish outbox events,
+# which are folded into the rollups by the outbox dispatcher
+# (app/services/analytics.py); the rollups can be rebuilt from orders.
+# Sales figures exclude cancelled orders.
+
+
+class DailySales(Base):
+    """Orders, revenue and units sold per calendar day (UTC)"""
+    
+    __tablename__ = "daily_sales"
+    
+    day = Column(Date, primary_key=True)
+    orders = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)
+    units = Column(Integer, nullable=False, default=0)
+
+
+class ProductSales(Base):
+    """Units sold and revenue per product"""
+    
+    __tablename__ = "product_sales"
+    __table_args__ = (
+        # Top-N by either measure reads only N index entries
+        Index("ix_product_sales_units", "units", "product_id"),
+        Index("ix_product_sales_revenue", "revenue", "product_id"),
+    )
+    
+    # No FK: sales history outlives deleted products
+    product_id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False)  # as of the latest order
+    orders = Column(Integer, nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)
+
+
+class OrderStatusCount(Base):
+    """Number of orders currently in each status"""
+    
+    __tablename__ = "order_status_counts"
+    
+    status = Column(String, primary_key=True)
+    orders = Column(Integer, nullable=False, default=0)
+
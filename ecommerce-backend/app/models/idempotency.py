@@ -0,0 +1,27 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, JSON
+from app.database.connection import Base
+
+
+class IdempotencyRecord(Base):
+    """
+    Outcome of a request sent with an ``Idempotency-Key`` header.
+
+    A row without a status code is a request still in flight; it holds
+    the key until ``locked_until``, after which its owner is presumed dead
+    and a retry may take over. The response is written in the same
+    transaction as the order it describes. Rows are purged once ``expires_at`` passes.
+    """
+
+    __tablename__ = "idempotency_keys"
+
+    # "<scope>:<client key>", the scope being e.g. "orders:<user id>"
+    key = Column(String, primary_key=True)
+    fingerprint = Column(String(64), nullable=False)
+    # Random per claim: a request whose lock lapsed cannot complete over its successor
+    token = Column(String(32), nullable=False)
+    status_code = Column(Integer)
+    response = Column(JSON)
+    locked_until = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
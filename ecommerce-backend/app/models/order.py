@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
+from typing import List
 from app.database.connection import Base
 
 
@@ -8,15 +9,68 @@ class Order(Base):
     """Order model for tracking customer orders"""
     
     __tablename__ = "orders"
+    __table_args__ = (
+        # Serves per-user listings and their keyset pagination
+        Index("ix_orders_user_id_id", "user_id", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     total_amount = Column(Float, nullable=False)
     status = Column(String, default="pending")  # pending, processing, completed, cancelled
     shipping_address = Column(String)
-    items = Column(JSON)  # Store order items as JSON
+    # Snapshot of the line items as placed; order_items is the source of
+    # truth, this copy feeds the streaming export and ``line_items`` of
+    # orders placed before order_items existed
+    items_json = Column("items", JSON)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
-    user = relationship("User", back_populates="orders")
\ No newline at end of file
+    user = relationship("User", back_populates="orders")
+    # selectin: a page of orders loads all of its items in one extra query
+    items = relationship(
+        "OrderItem",
+        back_populates="order",
+        lazy="selectin",
+        order_by="OrderItem.id",
+        cascade="all, delete-orphan"
+    )
+    
+    @property
+    def line_items(self) -> List["OrderItem"]:
+        """
+        The order's line items.
+        
+        Orders placed before the order_items table existed have no rows
+        there until app.database.backfill converts them; their lines are
+        read from the JSON snapshot instead, as transient OrderItems.
+        """
+        if self.items or not self.items_json:
+            return self.items
+        return [
+            OrderItem(
+                product_id=item.get("product_id"),
+                name=item.get("name") or "",
+                quantity=item["quantity"],
+                price=float(item["price"])
+            )
+            for item in self.items_json
+        ]
+
+
+class OrderItem(Base):
+    """Line item of an order"""
+    
+    __tablename__ = "order_items"
+    
+    id = Column(Integer, primary_key=True)
+    order_id = Column(Integer, ForeignKey("orders.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Kept when the product is deleted; name and price are snapshots
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="SET NULL"), index=True)
+    name = Column(String, nullable=False)
+    quantity = Column(Integer, nullable=False)
+    price = Column(Float, nullable=False)
+    
+    # Relationships
+    order = relationship("Order", back_populates="items")
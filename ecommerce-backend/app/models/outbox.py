@@ -0,0 +1,32 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Text, Index, text
+from app.database.connection import Base
+
+
+class OutboxEvent(Base):
+    """
+    Event written in the same transaction as the change it describes,
+    delivered to its handlers later by the outbox dispatcher.
+    """
+
+    __tablename__ = "outbox_events"
+    __table_args__ = (
+        # The dispatcher only ever scans events that are due
+        Index(
+            "ix_outbox_events_due",
+            "available_at",
+            "id",
+            postgresql_where=text("status = 'pending'"),
+            sqlite_where=text("status = 'pending'")
+        ),
+    )
+
+    id = Column(Integer, primary_key=True)
+    topic = Column(String, nullable=False)  # e.g. order.placed
+    payload = Column(JSON, nullable=False)
+    status = Column(String, nullable=False, default="pending")  # pending, dispatched, dead
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    dispatched_at = Column(DateTime)
@@ -1,7 +1,29 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Index, func, literal_column, text
+# Registers the typed to_tsvector/to_tsquery constructs before func uses them
+import sqlalchemy.dialects.postgresql  # noqa: F401
 from datetime import datetime
 from app.database.connection import Base
 
+# Text search configuration of the PostgreSQL full-text index
+SEARCH_CONFIG = "english"
+
+
+def search_vector(name, description):
+    """
+    Weighted ``tsvector`` of a product: name as A, description as B.
+    
+    Queries must build the vector through this function so that it matches
+    the GIN index expression exactly; constants are inlined for the same
+    reason.
+    """
+    config = literal_column(f"'{SEARCH_CONFIG}'")
+    empty = literal_column("''")
+    return func.setweight(
+        func.to_tsvector(config, func.coalesce(name, empty)), literal_column("'A'")
+    ).op("||")(
+        func.setweight(func.to_tsvector(config, func.coalesce(description, empty)), literal_column("'B'"))
+    )
+
 
 class Product(Base):
     """Product model for e-commerce catalog"""
@@ -9,6 +31,7 @@ class Product(Base):
     __tablename__ = "products"
     
     id = Column(Integer, primary_key=True, index=True)
+    sku = Column(String, unique=True, index=True)  # optional; bulk imports upsert on it
     name = Column(String, nullable=False, index=True)
     description = Column(Text)
     price = Column(Float, nullable=False)
@@ -16,4 +39,32 @@ class Product(Base):
     category = Column(String, index=True)
     image_url = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
\ No newline at end of file
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Declared after the columns they index. create_all skips existing
+    # tables: see "Database Migrations" in the README for existing databases
+    __table_args__ = (
+        # Category listings filtered or sorted by price (id breaks ties for keyset pages)
+        Index("ix_products_category_price", category, price, id),
+        # Price ranges and price sorts across categories
+        Index("ix_products_price", price, id),
+        Index("ix_products_created_at", created_at, id),
+        # Low-stock reports read the lowest stock levels first
+        Index("ix_products_stock", stock, id),
+        # Only in-stock rows. The predicate is spelled with an inline 0 so
+        # that the filter in app.services.products provably matches it.
+        Index(
+            "ix_products_in_stock",
+            category, price, id,
+            postgresql_where=text("stock > 0"),
+            sqlite_where=text("stock > 0")
+        ),
+        # PostgreSQL only: SQLite search uses the in-process index in
+        # app.services.search_index instead
+        Index(
+            "ix_products_search",
+            search_vector(name, description),
+            postgresql_using="gin"
+        ).ddl_if(dialect="postgresql"),
+    )
+
@@ -15,6 +15,8 @@ class User(Base):
     hashed_password = Column(String, nullable=False)
     full_name = Column(String)
     is_active = Column(Integer, default=1)
+    # Staff access to store-wide reports (analytics); granted in the database
+    is_admin = Column(Integer, default=0, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
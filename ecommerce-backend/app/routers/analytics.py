@@ -0,0 +1,56 @@
+from datetime import date
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional
+
+from app.database.replicas import get_read_db
+from app.models.user import User
+from app.schemas.analytics import DailyRevenue, LowStockProduct, TopProduct, TopProductsBy
+from app.services import analytics as analytics_service
+from app.utils.dependencies import get_current_admin
+
+# Store-wide reports, for admins only; read from rollup tables that the
+# outbox dispatcher keeps up to date behind the order write paths
+router = APIRouter(prefix="/api/analytics", tags=["Analytics"])
+
+
+@router.get("/revenue", response_model=List[DailyRevenue])
+def revenue_by_day(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin)
+):
+    """Orders, revenue and units sold per day (defaults to the last 30 days)"""
+    return analytics_service.revenue_by_day(db, start, end)
+
+
+@router.get("/top-products", response_model=List[TopProduct])
+def top_products(
+    by: TopProductsBy = "units",
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin)
+):
+    """Best-selling products by units sold or revenue"""
+    return analytics_service.top_products(db, by, limit)
+
+
+@router.get("/low-stock", response_model=List[LowStockProduct])
+def low_stock(
+    threshold: int = Query(10, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin)
+):
+    """Products with at most ``threshold`` units in stock, lowest first"""
+    return analytics_service.low_stock(db, threshold, limit)
+
+
+@router.get("/order-status", response_model=Dict[str, int])
+def status_breakdown(
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin)
+):
+    """Number of orders in each status"""
+    return analytics_service.status_breakdown(db)
@@ -0,0 +1,55 @@
+from datetime import date
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Optional
+
+from app.database.replicas import get_async_read_db
+from app.models.user import User
+from app.schemas.analytics import DailyRevenue, LowStockProduct, TopProduct, TopProductsBy
+from app.services import analytics as analytics_service
+from app.utils.dependencies import get_current_admin_async
+
+# Asyncio twin of app.routers.analytics, mounted when DATABASE_ASYNC is set
+router = APIRouter(prefix="/api/analytics", tags=["Analytics"])
+
+
+@router.get("/revenue", response_model=List[DailyRevenue])
+async def revenue_by_day(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_admin_async)
+):
+    """Orders, revenue and units sold per day (defaults to the last 30 days)"""
+    return await db.run_sync(analytics_service.revenue_by_day, start, end)
+
+
+@router.get("/top-products", response_model=List[TopProduct])
+async def top_products(
+    by: TopProductsBy = "units",
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_admin_async)
+):
+    """Best-selling products by units sold or revenue"""
+    return await db.run_sync(analytics_service.top_products, by, limit)
+
+
+@router.get("/low-stock", response_model=List[LowStockProduct])
+async def low_stock(
+    threshold: int = Query(10, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_admin_async)
+):
+    """Products with at most ``threshold`` units in stock, lowest first"""
+    return await db.run_sync(analytics_service.low_stock, threshold, limit)
+
+
+@router.get("/order-status", response_model=Dict[str, int])
+async def status_breakdown(
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_admin_async)
+):
+    """Number of orders in each status"""
+    return await db.run_sync(analytics_service.status_breakdown)
@@ -0,0 +1,122 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import timedelta
+
+from app.config.settings import settings
+from app.database.connection import get_async_db
+from app.database.replicas import get_async_read_db, recent_writers
+from app.models.user import User
+from app.routers.auth import oauth2_scheme
+from app.schemas.user import UserCreate, UserResponse, Token
+from app.utils.auth import password_hasher, create_access_token, verify_token
+from app.utils.dependencies import resolve_user
+
+# Asyncio twin of app.routers.auth, mounted when DATABASE_ASYNC is set
+router = APIRouter(prefix="/api/auth", tags=["Authentication"])
+
+
+async def get_current_user_async_dep(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_read_db)
+) -> User:
+    """Get current authenticated user for this router"""
+    
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    
+    username = verify_token(token)
+    
+    if username is None:
+        raise credentials_exception
+    
+    user = await db.run_sync(resolve_user, username)
+    
+    if user is None:
+        raise credentials_exception
+    
+    return user
+
+
+@router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
+async def register_user(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    """Register a new user"""
+    
+    # Check if email already exists
+    db_user = await db.scalar(select(User).where(User.email == user.email))
+    if db_user:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
+    
+    # Check if username already exists
+    db_user = await db.scalar(select(User).where(User.username == user.username))
+    if db_user:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Username already taken"
+        )
+    
+    # Create new user
+    hashed_password = await password_hasher.hash(user.password)
+    new_user = User(
+        email=user.email,
+        username=user.username,
+        full_name=user.full_name,
+        hashed_password=hashed_password
+    )
+    
+    # Keep the new user's first reads (e.g. /me) off lagging replicas
+    recent_writers.note(new_user.username)
+    
+    db.add(new_user)
+    await db.commit()
+    await db.refresh(new_user)
+    
+    return new_user
+
+
+@router.post("/login", response_model=Token)
+async def login(
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Login user and return JWT token"""
+    
+    # Find user by username
+    user = await db.scalar(select(User).where(User.username == form_data.username))
+    
+    if not user or not await password_hasher.verify(form_data.password, user.hashed_password):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect username or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Inactive user"
+        )
+    
+    # Create access token
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(
+        data={"sub": user.username},
+        expires_delta=access_token_expires
+    )
+    
+    return {"access_token": access_token, "token_type": "bearer"}
+
+
+@router.get("/me", response_model=UserResponse)
+async def get_current_user_info(
+    current_user: User = Depends(get_current_user_async_dep)
+):
+    """Get current user information"""
+    return current_user
@@ -0,0 +1,133 @@
+from fastapi import APIRouter, Depends, Header, Response, status, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Union
+
+from app.database.connection import get_async_db
+from app.database.replicas import get_async_read_db, track_write_async
+from app.models.user import User
+from app.schemas.order import (
+    OrderCreate, OrderUpdate, OrderResponse, OrderBulkCancel, OrderPage, serialize_order, serialize_orders
+)
+from app.routers.orders import replayed_response
+from app.services import orders as order_service
+from app.services.idempotency import StoredResponse, idempotency
+from app.utils.dependencies import get_current_user_async
+from app.utils.export import ExportFormat, export_response
+from app.utils.responses import json_response
+
+# Asyncio twin of app.routers.orders, mounted when DATABASE_ASYNC is set
+router = APIRouter(prefix="/api/orders", tags=["Orders"])
+
+
+@router.post(
+    "/",
+    response_model=OrderResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(track_write_async)]
+)
+async def create_order(
+    order_data: OrderCreate,
+    response: Response,
+    idempotency_key: Optional[str] = Header(
+        None,
+        max_length=255,
+        description="Client-chosen key; retries with the same key return the first response"
+    ),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """Create a new order (requires authentication; see the sync router for Idempotency-Key)"""
+    if idempotency_key is None:
+        order = await db.run_sync(order_service.place_order, current_user, order_data)
+        return json_response(serialize_order(order), status_code=status.HTTP_201_CREATED)
+    
+    scope = f"orders:{current_user.id}"
+    claim = await idempotency.claim(scope, idempotency_key, order_data.model_dump(mode="json"))
+    if isinstance(claim, StoredResponse):
+        return replayed_response(response, claim.status_code, claim.body)
+    
+    try:
+        order = await db.run_sync(order_service.place_order, current_user, order_data, claim)
+    except BaseException:
+        # Cancellation included: a disconnected client must not leave the key
+        # held. Roll back first, the transaction may hold a lock the release needs
+        await db.rollback()
+        await run_in_threadpool(idempotency.release, claim)
+        raise
+    return json_response(serialize_order(order), status_code=status.HTTP_201_CREATED)
+
+
+@router.get("/", response_model=Union[List[OrderResponse], OrderPage])
+async def get_user_orders(
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[str] = Query(
+        None,
+        description="Opaque cursor from a previous page; send it empty for the first page"
+    ),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """Get all orders for the current user (see the sync router)"""
+    orders = await db.run_sync(order_service.list_orders, current_user, skip, limit, after)
+    return json_response(serialize_orders(orders))
+
+
+@router.get("/export")
+async def export_orders(
+    format: ExportFormat = "ndjson",
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """Stream the current user's whole order history (see the sync router)"""
+    return export_response(order_service.export_orders_async(db, current_user, format), format, "orders")
+
+
+@router.get("/{order_id}", response_model=OrderResponse)
+async def get_order(
+    order_id: int,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """Get a specific order by ID"""
+    order = await db.run_sync(order_service.get_order, current_user, order_id)
+    return json_response(serialize_order(order))
+
+
+@router.put("/{order_id}", response_model=OrderResponse, dependencies=[Depends(track_write_async)])
+async def update_order(
+    order_id: int,
+    order_update: OrderUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """Update order status or shipping address"""
+    order = await db.run_sync(order_service.update_order, current_user, order_id, order_update)
+    return json_response(serialize_order(order))
+
+
+@router.post("/cancel", response_model=List[OrderResponse], dependencies=[Depends(track_write_async)])
+async def cancel_orders(
+    cancel_data: OrderBulkCancel,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """Cancel several orders in one transaction and restore product stock"""
+    orders = await db.run_sync(order_service.cancel_orders, current_user, cancel_data.order_ids)
+    return json_response(serialize_orders(orders))
+
+
+@router.delete(
+    "/{order_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(track_write_async)]
+)
+async def cancel_order(
+    order_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """Cancel an order and restore product stock"""
+    await db.run_sync(order_service.cancel_order, current_user, order_id)
+    return None
@@ -0,0 +1,175 @@
+import asyncio
+
+from fastapi import APIRouter, Depends, status, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Union
+
+from app.database.connection import get_async_db
+from app.database.replicas import get_async_read_db, track_write_async
+from app.models.user import User
+from app.routers.products import listing_etag, product_etag
+from app.schemas.product import (
+    ProductCreate, ProductUpdate, ProductResponse, ProductPage, ProductSearchHit, ProductSort, ProductImportReport,
+    product_adapter
+)
+from app.services import catalog
+from app.services import products as product_service
+from app.services import search as search_service
+from app.services.search_index import search_index
+from app.utils.dependencies import get_current_user_async
+from app.utils.export import ExportFormat, export_response
+from app.utils.http_cache import to_datetime, conditional_response
+from app.utils.compression import precompressed_response
+from app.utils.responses import json_response
+
+# Asyncio twin of app.routers.products, mounted when DATABASE_ASYNC is set
+router = APIRouter(prefix="/api/products", tags=["Products"])
+
+# The first search builds the in-process index under a thread lock, and
+# run_sync hands the event loop to other requests mid-build; a second
+# search would then block the loop thread on that lock. Searches take
+# turns here until the index exists.
+_index_build = asyncio.Lock()
+
+
+@router.get("/", response_model=Union[List[ProductResponse], ProductPage])
+async def get_products(
+    request: Request,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=100),
+    category: Optional[str] = None,
+    after: Optional[str] = Query(
+        None,
+        description="Opaque cursor from a previous page; send it empty for the first page"
+    ),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    in_stock: Optional[bool] = None,
+    sort: Optional[ProductSort] = None,
+    facets: bool = Query(False, description="Include category and price bucket counts"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Get list of products with optional filtering (see the sync router)"""
+    
+    filters = {"min_price": min_price, "max_price": max_price, "in_stock": in_stock}
+    
+    version = await db.run_sync(product_service.listing_version, category)
+    etag = listing_etag(
+        version, category=category, skip=skip, limit=limit, after=after,
+        sort=sort, facets=facets, **filters
+    )
+    # ETag only: max(updated_at) does not move when a product is deleted
+    not_modified = conditional_response(request, response, etag, None)
+    if not_modified:
+        return not_modified
+    
+    page = await db.run_sync(product_service.list_products, skip, limit, category, after, sort=sort, **filters)
+    if not facets:
+        return precompressed_response(request, response, page, etag)
+    
+    if after is None:
+        page = {"items": page, "next_cursor": None}
+    return json_response(
+        {**page, "facets": await db.run_sync(product_service.product_facets, category, **filters)},
+        response=response
+    )
+
+
+@router.get("/search", response_model=List[ProductSearchHit])
+async def search_products(
+    q: str = Query(..., min_length=1, max_length=200, description="Words to match; each matches as a prefix"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Full-text search over product names and descriptions (see the sync router)"""
+    if search_index.built_at is None and db.get_bind().dialect.name != "postgresql":
+        async with _index_build:
+            return json_response(await db.run_sync(search_service.search_products, q, skip, limit))
+    return json_response(await db.run_sync(search_service.search_products, q, skip, limit))
+
+
+@router.get("/export")
+async def export_products(
+    format: ExportFormat = "ndjson",
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Stream the whole catalog as NDJSON or CSV (see the sync router)"""
+    return export_response(catalog.export_products_async(db, format), format, "products")
+
+
+@router.post("/bulk", response_model=ProductImportReport, dependencies=[Depends(track_write_async)])
+async def import_products(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """Create or update products from an NDJSON or CSV body (see the sync router)"""
+    body_format = catalog.import_format(request.headers.get("content-type"))
+    return await catalog.import_products(
+        request.stream(),
+        body_format,
+        lambda chunk: db.run_sync(catalog.upsert_products, chunk)
+    )
+
+
+@router.get("/{product_id}", response_model=ProductResponse)
+async def get_product(
+    product_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Get a specific product by ID (supports ETag / Last-Modified revalidation)"""
+    
+    data = await db.run_sync(product_service.get_product, product_id)
+    
+    not_modified = conditional_response(request, response, product_etag(data), to_datetime(data["updated_at"]))
+    if not_modified:
+        return not_modified
+    
+    return json_response(data, response=response)
+
+
+@router.post(
+    "/",
+    response_model=ProductResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(track_write_async)]
+)
+async def create_product(
+    product: ProductCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """Create a new product (requires authentication)"""
+    return json_response(
+        await db.run_sync(product_service.create_product, product), product_adapter, status.HTTP_201_CREATED
+    )
+
+
+@router.put("/{product_id}", response_model=ProductResponse, dependencies=[Depends(track_write_async)])
+async def update_product(
+    product_id: int,
+    product_update: ProductUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """Update a product (requires authentication)"""
+    return json_response(await db.run_sync(product_service.update_product, product_id, product_update), product_adapter)
+
+
+@router.delete(
+    "/{product_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(track_write_async)]
+)
+async def delete_product(
+    product_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """Delete a product (requires authentication)"""
+    await db.run_sync(product_service.delete_product, product_id)
+    return None
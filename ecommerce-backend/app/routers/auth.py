@@ -1,13 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from datetime import timedelta
 
 from app.database.connection import get_db
+from app.database.replicas import get_read_db, recent_writers
 from app.models.user import User
 from app.schemas.user import UserCreate, UserResponse, Token
-from app.utils.auth import get_password_hash, verify_password, create_access_token, verify_token
+from app.utils.auth import password_hasher, create_access_token, verify_token
 from app.config.settings import settings
+from app.utils.dependencies import resolve_user
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
@@ -18,7 +21,7 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 async def get_current_user_sync_dep(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ) -> User:
     """Get current authenticated user for this router"""
     
@@ -33,7 +36,7 @@ async def get_current_user_sync_dep(
     if username is None:
         raise credentials_exception
     
-    user = db.query(User).filter(User.username == username).first()
+    user = resolve_user(db, username)
     
     if user is None:
         raise credentials_exception
@@ -42,11 +45,11 @@ async def get_current_user_sync_dep(
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
-    """Register a new user"""
+async def register_user(user: UserCreate, db: Session = Depends(get_db)):
+    """Register a new user (bcrypt runs on the password hashing pool)"""
     
     # Check if email already exists
-    db_user = db.query(User).filter(User.email == user.email).first()
+    db_user = await run_in_threadpool(db.query(User).filter(User.email == user.email).first)
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -54,7 +57,7 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Check if username already exists
-    db_user = db.query(User).filter(User.username == user.username).first()
+    db_user = await run_in_threadpool(db.query(User).filter(User.username == user.username).first)
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -62,7 +65,7 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Create new user
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await password_hasher.hash(user.password)
     new_user = User(
         email=user.email,
         username=user.username,
@@ -70,24 +73,27 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
         hashed_password=hashed_password
     )
     
+    # Keep the new user's first reads (e.g. /me) off lagging replicas
+    recent_writers.note(new_user.username)
+    
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await run_in_threadpool(db.commit)
+    await run_in_threadpool(db.refresh, new_user)
     
     return new_user
 
 
 @router.post("/login", response_model=Token)
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
-    """Login user and return JWT token"""
+    """Login user and return JWT token (bcrypt runs on the password hashing pool)"""
     
     # Find user by username
-    user = db.query(User).filter(User.username == form_data.username).first()
+    user = await run_in_threadpool(db.query(User).filter(User.username == form_data.username).first)
     
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await password_hasher.verify(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -1,122 +1,125 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, Response, status, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Union
 
 from app.database.connection import get_db
-from app.models.order import Order
-from app.models.product import Product
+from app.database.replicas import get_read_db, track_write
 from app.models.user import User
-from app.schemas.order import OrderCreate, OrderUpdate, OrderResponse
+from app.schemas.order import (
+    OrderCreate, OrderUpdate, OrderResponse, OrderBulkCancel, OrderPage, serialize_order, serialize_orders
+)
+from app.services import orders as order_service
+from app.services.idempotency import StoredResponse, idempotency
 from app.utils.dependencies import get_current_user
+from app.utils.export import ExportFormat, export_response
+from app.utils.responses import json_response
 
 router = APIRouter(prefix="/api/orders", tags=["Orders"])
 
 
-@router.post("/", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
-def create_order(
+@router.post(
+    "/",
+    response_model=OrderResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(track_write)]
+)
+async def create_order(
     order_data: OrderCreate,
+    response: Response,
+    idempotency_key: Optional[str] = Header(
+        None,
+        max_length=255,
+        description="Client-chosen key; retries with the same key return the first response"
+    ),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Create a new order (requires authentication)"""
-    
-    # Validate products and calculate total
-    total_amount = 0.0
-    order_items = []
-    
-    for item in order_data.items:
-        # Check if product exists
-        product = db.query(Product).filter(Product.id == item.product_id).first()
-        
-        if not product:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Product with ID {item.product_id} not found"
-            )
-        
-        # Check stock availability
-        if product.stock < item.quantity:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Insufficient stock for product '{product.name}'. Available: {product.stock}, Requested: {item.quantity}"
-            )
-        
-        # Calculate item total
-        item_total = float(product.price) * item.quantity
-        total_amount += item_total
-        
-        # Decrease product stock
-        product.stock -= item.quantity
-        
-        # Prepare order item data
-        order_items.append({
-            "product_id": item.product_id,
-            "name": item.name,
-            "quantity": item.quantity,
-            "price": float(item.price)
-        })
-    
-    # Create the order
-    new_order = Order(
-        user_id=current_user.id,
-        total_amount=total_amount,
-        status="pending",
-        shipping_address=order_data.shipping_address,
-        items=order_items
-    )
-    
-    db.add(new_order)
-    db.commit()
-    db.refresh(new_order)
-    
-    return new_order
+    """
+    Create a new order (requires authentication).
+    
+    With an ``Idempotency-Key`` header the order is placed at most once
+    per key: retries get the stored response (marked with
+    ``Idempotent-Replayed: true``), and concurrent duplicates wait for
+    the first request to finish. The handler is async so that a waiting
+    duplicate holds no threadpool thread; the order is placed in one.
+    """
+    if idempotency_key is None:
+        order = await run_in_threadpool(order_service.place_order, db, current_user, order_data)
+        return json_response(serialize_order(order), status_code=status.HTTP_201_CREATED)
+    
+    scope = f"orders:{current_user.id}"
+    claim = await idempotency.claim(scope, idempotency_key, order_data.model_dump(mode="json"))
+    if isinstance(claim, StoredResponse):
+        return replayed_response(response, claim.status_code, claim.body)
+    
+    try:
+        order = await run_in_threadpool(order_service.place_order, db, current_user, order_data, claim)
+    except BaseException:
+        # Cancellation included: a disconnected client must not leave the key
+        # held. Roll back first, the transaction may hold a lock the release needs
+        await run_in_threadpool(db.rollback)
+        await run_in_threadpool(idempotency.release, claim)
+        raise
+    return json_response(serialize_order(order), status_code=status.HTTP_201_CREATED)
 
 
-@router.get("/", response_model=List[OrderResponse])
+def replayed_response(response: Response, status_code: int, body):
+    """A stored response, as sent to a retried request"""
+    response.headers["Idempotent-Replayed"] = "true"
+    response.status_code = status_code
+    return json_response(body, status_code=status_code, response=response)
+
+
+@router.get("/", response_model=Union[List[OrderResponse], OrderPage])
 def get_user_orders(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    after: Optional[str] = Query(
+        None,
+        description="Opaque cursor from a previous page; send it empty for the first page"
+    ),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get all orders for the current user"""
-    
-    orders = db.query(Order)\
-        .filter(Order.user_id == current_user.id)\
-        .offset(skip)\
-        .limit(limit)\
-        .all()
-    
-    return orders
+    """
+    Get all orders for the current user.
+    
+    Without ``after`` this returns a plain list paged by skip/limit. With
+    ``after`` it returns an ``OrderPage`` envelope paged by order id.
+    """
+    orders = order_service.list_orders(db, current_user, skip, limit, after)
+    return json_response(serialize_orders(orders))
+
+
+@router.get("/export")
+def export_orders(
+    format: ExportFormat = "ndjson",
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Stream the current user's whole order history as NDJSON or CSV.
+    
+    Rows are read from a server-side cursor in batches of
+    ``ORDER_EXPORT_BATCH_SIZE`` and written straight from the result
+    tuples, so memory stays flat however many orders the account has.
+    In CSV, ``items`` is a JSON array.
+    """
+    return export_response(order_service.export_orders(db, current_user, format), format, "orders")
 
 
 @router.get("/{order_id}", response_model=OrderResponse)
 def get_order(
     order_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific order by ID"""
-    
-    order = db.query(Order).filter(Order.id == order_id).first()
-    
-    if not order:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Order not found"
-        )
-    
-    # Check if order belongs to current user
-    if order.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to access this order"
-        )
-    
-    return order
+    return json_response(serialize_order(order_service.get_order(db, current_user, order_id)))
 
 
-@router.put("/{order_id}", response_model=OrderResponse)
+@router.put("/{order_id}", response_model=OrderResponse, dependencies=[Depends(track_write)])
 def update_order(
     order_id: int,
     order_update: OrderUpdate,
@@ -124,87 +127,29 @@ def update_order(
     current_user: User = Depends(get_current_user)
 ):
     """Update order status or shipping address"""
-    
-    order = db.query(Order).filter(Order.id == order_id).first()
-    
-    if not order:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Order not found"
-        )
-    
-    # Check if order belongs to current user
-    if order.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to modify this order"
-        )
-    
-    # Prevent updating completed or cancelled orders
-    if order.status in ["completed", "cancelled"] and order_update.status:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Cannot update {order.status} order"
-        )
-    
-    # Update fields
-    update_data = order_update.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(order, field, value)
-    
-    db.commit()
-    db.refresh(order)
-    
-    return order
+    return json_response(serialize_order(order_service.update_order(db, current_user, order_id, order_update)))
+
+
+@router.post("/cancel", response_model=List[OrderResponse], dependencies=[Depends(track_write)])
+def cancel_orders(
+    cancel_data: OrderBulkCancel,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Cancel several orders in one transaction and restore product stock"""
+    return json_response(serialize_orders(order_service.cancel_orders(db, current_user, cancel_data.order_ids)))
 
 
-@router.delete("/{order_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete(
+    "/{order_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(track_write)]
+)
 def cancel_order(
     order_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Cancel an order and restore product stock"""
-    
-    order = db.query(Order).filter(Order.id == order_id).first()
-    
-    if not order:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Order not found"
-        )
-    
-    # Check if order belongs to current user
-    if order.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to cancel this order"
-        )
-    
-    # Prevent cancelling completed orders
-    if order.status == "completed":
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Cannot cancel completed order"
-        )
-    
-    # Already cancelled
-    if order.status == "cancelled":
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Order is already cancelled"
-        )
-    
-    # Restore product stock
-    for item in order.items:
-        product = db.query(Product).filter(Product.id == item["product_id"]).first()
-        if product:
-            product.stock += item["quantity"]
-    
-    # Mark order as cancelled
-    order.status = "cancelled"
-    
-    db.commit()
-    db.refresh(order)
-    
-    return None
\ No newline at end of file
+    order_service.cancel_order(db, current_user, order_id)
+    return None
@@ -1,67 +1,187 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, status, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Union
 
 from app.database.connection import get_db
-from app.models.product import Product
+from app.database.replicas import get_read_db, track_write
 from app.models.user import User
-from app.schemas.product import ProductCreate, ProductUpdate, ProductResponse
+from app.schemas.product import (
+    ProductCreate, ProductUpdate, ProductResponse, ProductPage, ProductSearchHit, ProductSort, ProductImportReport,
+    product_adapter
+)
+from app.services import catalog
+from app.services import products as product_service
+from app.services import search as search_service
 from app.utils.dependencies import get_current_user
+from app.utils.export import ExportFormat, export_response
+from app.utils.http_cache import make_etag, to_datetime, conditional_response
+from app.utils.compression import precompressed_response
+from app.utils.responses import json_response
 
 router = APIRouter(prefix="/api/products", tags=["Products"])
 
 
-@router.get("/", response_model=List[ProductResponse])
+def listing_etag(version, **params) -> str:
+    """Weak ETag of a listing page under a given catalog version"""
+    return make_etag(
+        "products", *(f"{name}={params[name]}" for name in sorted(params)),
+        version["last_modified"], version["count"],
+        weak=True
+    )
+
+
+def product_etag(data) -> str:
+    """ETag of a serialized product"""
+    return make_etag("product", data["id"], data["updated_at"])
+
+
+@router.get("/", response_model=Union[List[ProductResponse], ProductPage])
 def get_products(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     category: Optional[str] = None,
-    db: Session = Depends(get_db)
+    after: Optional[str] = Query(
+        None,
+        description="Opaque cursor from a previous page; send it empty for the first page"
+    ),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    in_stock: Optional[bool] = None,
+    sort: Optional[ProductSort] = None,
+    facets: bool = Query(False, description="Include category and price bucket counts"),
+    db: Session = Depends(get_read_db)
 ):
-    """Get list of products with optional filtering"""
-    
-    query = db.query(Product)
-    
-    if category:
-        query = query.filter(Product.category == category)
+    """
+    Get list of products with optional filtering.
+    
+    Without ``after`` this returns a plain list paged by skip/limit. With
+    ``after`` it returns a ``ProductPage`` envelope paged by the sort key,
+    whose ``next_cursor`` is passed back as ``after`` for the next page.
+    ``facets=true`` also returns the envelope, with category and price
+    bucket counts of the filtered catalog.
+    
+    Responses carry a weak ``ETag`` derived from the filtered catalog's
+    ``max(updated_at)`` and row count, so revalidation costs one aggregate
+    (usually cached) instead of a page fetch. There is no
+    ``Last-Modified``: deletes do not advance ``max(updated_at)``.
+    Compressed bodies of plain pages are cached under the same ETag, so
+    hot pages are not recompressed per request.
+    """
+    
+    filters = {"min_price": min_price, "max_price": max_price, "in_stock": in_stock}
+    
+    version = product_service.listing_version(db, category)
+    etag = listing_etag(
+        version, category=category, skip=skip, limit=limit, after=after,
+        sort=sort, facets=facets, **filters
+    )
+    # ETag only: max(updated_at) does not move when a product is deleted
+    not_modified = conditional_response(request, response, etag, None)
+    if not_modified:
+        return not_modified
+    
+    page = product_service.list_products(db, skip, limit, category, after, sort=sort, **filters)
+    if not facets:
+        return precompressed_response(request, response, page, etag)
+    
+    if after is None:
+        page = {"items": page, "next_cursor": None}
+    return json_response(
+        {**page, "facets": product_service.product_facets(db, category, **filters)},
+        response=response
+    )
+
+
+@router.get("/search", response_model=List[ProductSearchHit])
+def search_products(
+    q: str = Query(..., min_length=1, max_length=200, description="Words to match; each matches as a prefix"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Full-text search over product names and descriptions.
     
-    products = query.offset(skip).limit(limit).all()
-    return products
+    Results are ranked by relevance (name matches count more than
+    description matches) and carry highlighted snippets.
+    """
+    return json_response(search_service.search_products(db, q, skip, limit))
+
+
+@router.get("/export")
+def export_products(
+    format: ExportFormat = "ndjson",
+    db: Session = Depends(get_read_db)
+):
+    """
+    Stream the whole catalog as NDJSON or CSV.
+    
+    Rows are read from a server-side cursor in batches of
+    ``PRODUCT_EXPORT_BATCH_SIZE``, so memory stays flat however large the
+    catalog is. A CSV export can be sent back to ``POST /bulk`` as is.
+    """
+    return export_response(catalog.export_products(db, format), format, "products")
+
+
+@router.post("/bulk", response_model=ProductImportReport, dependencies=[Depends(track_write)])
+async def import_products(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Create or update products from an NDJSON or CSV body (requires authentication).
+    
+    The body is parsed as it streams in. Rows are validated like
+    ``POST /`` and upserted on ``sku`` in chunks of
+    ``PRODUCT_IMPORT_CHUNK_SIZE``; rows without a SKU are always inserted.
+    Invalid rows are reported by line number and do not stop the import.
+    """
+    body_format = catalog.import_format(request.headers.get("content-type"))
+    return await catalog.import_products(
+        request.stream(),
+        body_format,
+        lambda chunk: run_in_threadpool(catalog.upsert_products, db, chunk)
+    )
 
 
 @router.get("/{product_id}", response_model=ProductResponse)
-def get_product(product_id: int, db: Session = Depends(get_db)):
-    """Get a specific product by ID"""
+def get_product(
+    product_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db)
+):
+    """Get a specific product by ID (supports ETag / Last-Modified revalidation)"""
     
-    product = db.query(Product).filter(Product.id == product_id).first()
+    data = product_service.get_product(db, product_id)
     
-    if not product:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Product not found"
-        )
+    not_modified = conditional_response(request, response, product_etag(data), to_datetime(data["updated_at"]))
+    if not_modified:
+        return not_modified
     
-    return product
+    return json_response(data, response=response)
 
 
-@router.post("/", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/",
+    response_model=ProductResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(track_write)]
+)
 def create_product(
     product: ProductCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Create a new product (requires authentication)"""
-    
-    new_product = Product(**product.model_dump())
-    
-    db.add(new_product)
-    db.commit()
-    db.refresh(new_product)
-    
-    return new_product
+    return json_response(product_service.create_product(db, product), product_adapter, status.HTTP_201_CREATED)
 
 
-@router.put("/{product_id}", response_model=ProductResponse)
+@router.put("/{product_id}", response_model=ProductResponse, dependencies=[Depends(track_write)])
 def update_product(
     product_id: int,
     product_update: ProductUpdate,
@@ -69,43 +189,19 @@ def update_product(
     current_user: User = Depends(get_current_user)
 ):
     """Update a product (requires authentication)"""
-    
-    product = db.query(Product).filter(Product.id == product_id).first()
-    
-    if not product:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Product not found"
-        )
-    
-    # Update only provided fields
-    update_data = product_update.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(product, field, value)
-    
-    db.commit()
-    db.refresh(product)
-    
-    return product
+    return json_response(product_service.update_product(db, product_id, product_update), product_adapter)
 
 
-@router.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete(
+    "/{product_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(track_write)]
+)
 def delete_product(
     product_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Delete a product (requires authentication)"""
-    
-    product = db.query(Product).filter(Product.id == product_id).first()
-    
-    if not product:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Product not found"
-        )
-    
-    db.delete(product)
-    db.commit()
-    
-    return None
\ No newline at end of file
+    product_service.delete_product(db, product_id)
+    return None
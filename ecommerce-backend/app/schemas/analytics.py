@@ -0,0 +1,31 @@
+from pydantic import BaseModel
+from typing import Literal, Optional
+from datetime import date
+
+TopProductsBy = Literal["units", "revenue"]
+
+
+class DailyRevenue(BaseModel):
+    """Schema for one day of sales (cancelled orders excluded)"""
+    day: date
+    orders: int
+    revenue: float
+    units: int
+
+
+class TopProduct(BaseModel):
+    """Schema for a best-selling product"""
+    product_id: int
+    name: str
+    orders: int
+    units: int
+    revenue: float
+
+
+class LowStockProduct(BaseModel):
+    """Schema for a product running out of stock"""
+    product_id: int
+    name: str
+    sku: Optional[str] = None
+    category: Optional[str] = None
+    stock: int
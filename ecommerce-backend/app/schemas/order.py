@@ -1,7 +1,9 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from typing import Any, Dict, Optional, List, Union
 from datetime import datetime
 
+from app.utils.responses import loaded_attributes
+
 
 class OrderItem(BaseModel):
     """Schema for individual order item"""
@@ -23,6 +25,22 @@ class OrderUpdate(BaseModel):
     shipping_address: Optional[str] = None
 
 
+class OrderBulkCancel(BaseModel):
+    """Schema for cancelling several orders at once"""
+    order_ids: List[int] = Field(..., min_length=1, max_length=500)
+
+
+class OrderItemResponse(BaseModel):
+    """Schema for an order line item in responses"""
+    product_id: Optional[int]  # None once the product has been deleted
+    name: str
+    quantity: int
+    price: float
+    
+    class Config:
+        from_attributes = True
+
+
 class OrderResponse(BaseModel):
     """Schema for order response"""
     id: int
@@ -30,9 +48,40 @@ class OrderResponse(BaseModel):
     total_amount: float
     status: str
     shipping_address: str
-    items: List[Dict[str, Any]]
+    items: List[OrderItemResponse]
     created_at: datetime
     updated_at: datetime
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class OrderPage(BaseModel):
+    """Schema for a cursor-paginated page of orders"""
+    items: List[OrderResponse]
+    next_cursor: Optional[str] = None
+
+
+
+ORDER_FIELDS = tuple(OrderResponse.model_fields)
+ORDER_ITEM_FIELDS = tuple(OrderItemResponse.model_fields)
+
+
+def serialize_order(order) -> Dict[str, Any]:
+    """
+    ``OrderResponse``-shaped dict of an Order row, for orjson.
+
+    Validating ORM rows from attributes dominates the cost of encoding
+    order lists; rows read from the database already have the schema's
+    types, so their loaded values are copied as they are.
+    """
+    data = loaded_attributes(order, ORDER_FIELDS)
+    data["items"] = [loaded_attributes(item, ORDER_ITEM_FIELDS) for item in order.line_items]
+    return data
+
+
+def serialize_orders(result: Union[List[Any], Dict[str, Any]]) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
+    """``serialize_order`` over a list of orders or an ``OrderPage``-shaped dict"""
+    if isinstance(result, dict):
+        return {**result, "items": [serialize_order(order) for order in result["items"]]}
+    return [serialize_order(order) for order in result]
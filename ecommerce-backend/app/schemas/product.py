@@ -1,10 +1,11 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, TypeAdapter
+from typing import Dict, Literal, Optional, List
 from datetime import datetime
 
 
 class ProductBase(BaseModel):
     """Base product schema with common attributes"""
+    sku: Optional[str] = Field(None, min_length=1, max_length=64)
     name: str = Field(..., min_length=1, max_length=200)
     description: Optional[str] = None
     price: float = Field(..., gt=0)
@@ -20,6 +21,7 @@ class ProductCreate(ProductBase):
 
 class ProductUpdate(BaseModel):
     """Schema for updating a product (all fields optional)"""
+    sku: Optional[str] = Field(None, min_length=1, max_length=64)
     name: Optional[str] = Field(None, min_length=1, max_length=200)
     description: Optional[str] = None
     price: Optional[float] = Field(None, gt=0)
@@ -35,4 +37,61 @@ class ProductResponse(ProductBase):
     updated_at: datetime
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+# Sort options of product listings ("-" = descending)
+ProductSort = Literal["price", "-price", "created_at", "-created_at", "name"]
+
+
+class FacetCount(BaseModel):
+    """Number of matching products with a given value"""
+    value: Optional[str] = None
+    count: int
+
+
+class PriceBucket(BaseModel):
+    """Number of matching products in a price range (``max`` is exclusive, None = open)"""
+    min: float
+    max: Optional[float] = None
+    count: int
+
+
+class ProductFacets(BaseModel):
+    """Facet counts of a filtered product listing"""
+    categories: List[FacetCount]
+    price: List[PriceBucket]
+
+
+class ProductPage(BaseModel):
+    """Schema for a page of products (cursor-paginated and/or with facets)"""
+    items: List[ProductResponse]
+    next_cursor: Optional[str] = None
+    facets: Optional[ProductFacets] = None
+
+
+class ProductSearchHit(ProductResponse):
+    """Schema for a ranked search result"""
+    rank: float
+    highlights: Dict[str, Optional[str]] = Field(
+        ...,
+        description="Name and description snippet with matches wrapped in <mark> tags"
+    )
+
+
+class ImportRowError(BaseModel):
+    """Schema for a rejected import row"""
+    line: int
+    errors: List[str]
+
+
+class ProductImportReport(BaseModel):
+    """Schema for the outcome of a bulk import"""
+    received: int
+    upserted: int
+    failed: int
+    errors: List[ImportRowError]
+
+
+# Prebuilt adapter for encoding ORM results straight to JSON bytes
+product_adapter = TypeAdapter(ProductResponse)
@@ -0,0 +1,310 @@
+"""
+Sales analytics served from rollup tables, which outbox handlers keep up
+to date from order events; ``python -m app.services.analytics`` rebuilds
+them from orders.
+"""
+import argparse
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Date, cast, delete, func, insert, literal, select, text
+from sqlalchemy.orm import Session
+
+from app.database.connection import SessionLocal, begin_sqlite_write
+from app.database.upsert import upsert_insert
+from app.models.analytics import DailySales, OrderStatusCount, ProductSales
+from app.models.order import Order, OrderItem
+from app.models.outbox import OutboxEvent
+from app.models.product import Product
+from app.services import outbox
+
+logger = logging.getLogger("app.analytics")
+
+# Orders in these statuses do not count towards sales
+EXCLUDED_STATUSES = ("cancelled",)
+
+ROLLUPS = (DailySales, ProductSales, OrderStatusCount)
+
+
+class RollupsUnsupportedError(Exception):
+    """Raised when the database has no ON CONFLICT upsert to keep the rollups with"""
+
+
+def counts_as_sale(order_status: Optional[str]) -> bool:
+    return order_status not in EXCLUDED_STATUSES
+
+
+class RollupDelta:
+    """Increments to the rollup tables, built from order events and applied in one go"""
+
+    def __init__(self):
+        self.days: Dict[date, List[float]] = defaultdict(lambda: [0, 0.0, 0])
+        # product id -> [name, orders, units, revenue, renamed]; only new line
+        # items carry the product's latest name, status changes do not
+        self.products: Dict[int, List[Any]] = {}
+        self.statuses: Dict[str, int] = defaultdict(int)
+
+    def add_sales(self, event: Dict[str, Any], sign: int, rename: bool) -> None:
+        """Count (sign=1) or uncount (sign=-1) the sales of an order event"""
+        day = self.days[datetime.fromisoformat(event["created_at"]).date()]
+        day[0] += sign
+        day[1] += sign * event["total_amount"]
+        day[2] += sign * sum(item["quantity"] for item in event["items"])
+
+        seen = set()
+        for item in event["items"]:
+            product_id = item["product_id"]
+            if product_id is None:
+                continue
+            product = self.products.setdefault(product_id, [item["name"], 0, 0, 0.0, False])
+            if rename:
+                product[0], product[4] = item["name"], True
+            if product_id not in seen:
+                seen.add(product_id)
+                product[1] += sign
+            product[2] += sign * item["quantity"]
+            product[3] += sign * item["quantity"] * item["price"]
+
+    def add_placed(self, event: Dict[str, Any], sign: int = 1) -> None:
+        """Count an ``order.placed`` event (sign=-1 takes it back out)"""
+        self.statuses[event["status"]] += sign
+        if counts_as_sale(event["status"]):
+            self.add_sales(event, sign, rename=sign > 0)
+
+    def add_status_change(self, event: Dict[str, Any], sign: int = 1) -> None:
+        """Count an ``order.status_changed`` event (sign=-1 takes it back out)"""
+        previous, current = event["previous_status"], event["status"]
+        self.statuses[previous] -= sign
+        self.statuses[current] += sign
+        if counts_as_sale(previous) != counts_as_sale(current):
+            self.add_sales(event, sign if counts_as_sale(current) else -sign, rename=False)
+
+    def add(self, topic: str, event: Dict[str, Any], sign: int = 1) -> None:
+        """Count an event of either topic"""
+        if topic == outbox.ORDER_PLACED:
+            self.add_placed(event, sign)
+        else:
+            self.add_status_change(event, sign)
+
+    def apply(self, db: Session) -> None:
+        """Write the increments; keys go in sorted order so row locks are taken consistently"""
+        insert_ = upsert_insert(db.get_bind())
+        if insert_ is None:
+            raise RollupsUnsupportedError("Analytics rollups need PostgreSQL or SQLite")
+
+        days = [
+            {"day": day, "orders": orders, "revenue": revenue, "units": units}
+            for day, (orders, revenue, units) in sorted(self.days.items())
+            if orders or units
+        ]
+        products = {True: [], False: []}
+        for product_id, (name, orders, units, revenue, renamed) in sorted(self.products.items()):
+            if orders or units:
+                products[renamed].append(
+                    {"product_id": product_id, "name": name, "orders": orders, "units": units, "revenue": revenue}
+                )
+        statuses = [
+            {"status": order_status, "orders": orders}
+            for order_status, orders in sorted(self.statuses.items())
+            if orders
+        ]
+
+        for model, key, rows, extra in (
+            (DailySales, "day", days, ()),
+            (ProductSales, "product_id", products[True], ("name",)),
+            (ProductSales, "product_id", products[False], ()),
+            (OrderStatusCount, "status", statuses, ()),
+        ):
+            if not rows:
+                continue
+            statement = insert_(model)
+            increments = {
+                column: getattr(model, column) + statement.excluded[column]
+                for column in rows[0] if column not in (key, "name")
+            }
+            db.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[key],
+                    set_={**increments, **{column: statement.excluded[column] for column in extra}}
+                ),
+                rows
+            )
+
+
+ROLLUP_TOPICS = (outbox.ORDER_PLACED, outbox.ORDER_STATUS_CHANGED)
+
+
+@outbox.subscribe(outbox.ORDER_PLACED, transactional=True)
+def fold_placed(db: Session, payload: Dict[str, Any]) -> None:
+    """Outbox handler counting a new order in the rollups"""
+    delta = RollupDelta()
+    delta.add_placed(payload)
+    delta.apply(db)
+
+
+@outbox.subscribe(outbox.ORDER_STATUS_CHANGED, transactional=True)
+def fold_status_change(db: Session, payload: Dict[str, Any]) -> None:
+    """Outbox handler moving an order between statuses in the rollups"""
+    delta = RollupDelta()
+    delta.add_status_change(payload)
+    delta.apply(db)
+
+
+def rebuild_rollups(db: Session) -> Dict[str, int]:
+    """
+    Recompute every rollup table from orders in one transaction.
+
+    Order events still pending in the outbox are already reflected in the
+    orders, so their increments are taken back out of the rebuilt rows and
+    they add them again when dispatched. The outbox and the rollup tables
+    are locked first (on SQLite, the database), so no event is published
+    or dispatched in between.
+
+    Returns:
+        dict: Rows written per rollup table
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        db.execute(text(
+            "LOCK TABLE " + ", ".join(model.__tablename__ for model in (OutboxEvent, *ROLLUPS)) + " IN EXCLUSIVE MODE"
+        ))
+    begin_sqlite_write(db)
+
+    for model in ROLLUPS:
+        db.execute(delete(model))
+
+    # SQLite has no DATE type; date() yields the ISO day the Date column reads back
+    day = func.date(Order.created_at) if dialect == "sqlite" else cast(Order.created_at, Date)
+    counted = Order.status.notin_(EXCLUDED_STATUSES)
+
+    units_per_order = select(OrderItem.order_id, func.sum(OrderItem.quantity).label("units"))\
+        .group_by(OrderItem.order_id)\
+        .subquery()
+    db.execute(insert(DailySales).from_select(
+        ["day", "orders", "revenue", "units"],
+        select(
+            day.label("day"),
+            func.count(Order.id),
+            func.sum(Order.total_amount),
+            func.coalesce(func.sum(units_per_order.c.units), 0)
+        )
+        .outerjoin(units_per_order, units_per_order.c.order_id == Order.id)
+        .where(counted)
+        .group_by(day)
+    ))
+
+    # The name on the product's latest line item, cancelled or not
+    latest_line = select(func.max(OrderItem.id).label("id"))\
+        .where(OrderItem.product_id.isnot(None))\
+        .group_by(OrderItem.product_id)\
+        .subquery()
+    latest_name = select(OrderItem.product_id, OrderItem.name)\
+        .join(latest_line, latest_line.c.id == OrderItem.id)\
+        .subquery()
+    totals = select(
+        OrderItem.product_id,
+        func.count(func.distinct(OrderItem.order_id)).label("orders"),
+        func.sum(OrderItem.quantity).label("units"),
+        func.sum(OrderItem.quantity * OrderItem.price).label("revenue")
+    )\
+        .join(Order, Order.id == OrderItem.order_id)\
+        .where(counted, OrderItem.product_id.isnot(None))\
+        .group_by(OrderItem.product_id)\
+        .subquery()
+    db.execute(insert(ProductSales).from_select(
+        ["product_id", "name", "orders", "units", "revenue"],
+        select(totals.c.product_id, latest_name.c.name, totals.c.orders, totals.c.units, totals.c.revenue)
+        .join(latest_name, latest_name.c.product_id == totals.c.product_id)
+    ))
+
+    db.execute(insert(OrderStatusCount).from_select(
+        ["status", "orders"],
+        select(func.coalesce(Order.status, literal("pending")), func.count(Order.id))
+        .group_by(func.coalesce(Order.status, literal("pending")))
+    ))
+
+    pending = RollupDelta()
+    for topic, payload in db.execute(
+        select(OutboxEvent.topic, OutboxEvent.payload)
+        .where(OutboxEvent.status == "pending", OutboxEvent.topic.in_(ROLLUP_TOPICS))
+        .order_by(OutboxEvent.id)
+    ):
+        pending.add(topic, payload, sign=-1)
+    pending.apply(db)
+
+    db.commit()
+    return {
+        model.__tablename__: db.scalar(select(func.count()).select_from(model))
+        for model in ROLLUPS
+    }
+
+
+def revenue_by_day(db: Session, start: Optional[date], end: Optional[date]) -> List[Dict[str, Any]]:
+    """Daily sales between ``start`` and ``end`` inclusive (default: the last 30 UTC days)"""
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=29)
+    rows = db.execute(
+        select(DailySales.day, DailySales.orders, DailySales.revenue, DailySales.units)
+        .where(DailySales.day.between(start, end), DailySales.orders > 0)
+        .order_by(DailySales.day)
+    )
+    return [
+        {"day": day, "orders": orders, "revenue": round(revenue, 2), "units": units}
+        for day, orders, revenue, units in rows
+    ]
+
+
+def top_products(db: Session, by: str, limit: int) -> List[Dict[str, Any]]:
+    """Best-selling products by units or revenue"""
+    measure = getattr(ProductSales, by)
+    rows = db.execute(
+        select(ProductSales.product_id, ProductSales.name, ProductSales.orders, ProductSales.units, ProductSales.revenue)
+        .where(ProductSales.units > 0)
+        .order_by(measure.desc(), ProductSales.product_id.desc())
+        .limit(limit)
+    )
+    return [
+        {"product_id": product_id, "name": name, "orders": orders, "units": units, "revenue": round(revenue, 2)}
+        for product_id, name, orders, units, revenue in rows
+    ]
+
+
+def low_stock(db: Session, threshold: int, limit: int) -> List[Dict[str, Any]]:
+    """Products at or below ``threshold`` in stock, lowest first"""
+    rows = db.execute(
+        select(Product.id, Product.name, Product.sku, Product.category, Product.stock)
+        .where(Product.stock <= threshold)
+        .order_by(Product.stock, Product.id)
+        .limit(limit)
+    )
+    return [
+        {"product_id": product_id, "name": name, "sku": sku, "category": category, "stock": stock}
+        for product_id, name, sku, category, stock in rows
+    ]
+
+
+def status_breakdown(db: Session) -> Dict[str, int]:
+    """Number of orders in each status"""
+    rows = db.execute(
+        select(OrderStatusCount.status, OrderStatusCount.orders)
+        .where(OrderStatusCount.orders != 0)
+        .order_by(OrderStatusCount.status)
+    )
+    return {order_status: orders for order_status, orders in rows}
+
+
+def main() -> None:
+    from app.database.connection import Base, engine
+
+    argparse.ArgumentParser(description="Rebuild the analytics rollups from orders").parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        logger.info("rollups rebuilt: %s", rebuild_rollups(db))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+import csv
+import codecs
+import json
+from datetime import datetime
+from typing import Any, AsyncIterable, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.cache.product_cache import product_cache
+from app.config.settings import settings
+from app.database.upsert import upsert_insert
+from app.models.product import Product
+from app.schemas.product import ProductCreate
+from app.services.search_index import search_index
+from app.utils.export import stream_rows, stream_rows_async
+
+# Bulk catalog import and export. Import parsing is incremental, so request
+# bodies are never held in memory; each validated chunk is upserted on
+# ``sku`` with one batched INSERT ... ON CONFLICT and committed on its own.
+
+IMPORT_FORMATS = {
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "text/csv": "csv",
+}
+
+# Columns written by the export, in order
+EXPORT_COLUMNS = (
+    Product.id, Product.sku, Product.name, Product.description, Product.price,
+    Product.stock, Product.category, Product.image_url, Product.created_at, Product.updated_at,
+)
+
+# Columns an upsert overwrites on an existing SKU
+UPSERT_COLUMNS = ("name", "description", "price", "stock", "category", "image_url")
+
+# A parsed row: (line number, field dict or an error message)
+ParsedRow = Tuple[int, Any]
+
+
+def import_format(content_type: Optional[str]) -> str:
+    """
+    Map a request Content-Type to an import format.
+
+    Raises:
+        HTTPException: If the media type is not supported
+    """
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type not in IMPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Send NDJSON ({', '.join(k for k, v in IMPORT_FORMATS.items() if v == 'ndjson')}) or text/csv"
+        )
+    return IMPORT_FORMATS[media_type]
+
+
+class _RecordContinues(Exception):
+    """Raised into ``csv.reader`` when it asks for a line not received yet"""
+
+
+def _record_lines(lines: List[str]) -> Iterable[str]:
+    yield from lines
+    raise _RecordContinues
+
+
+class RowParser:
+    """
+    Push parser turning body chunks into rows.
+
+    NDJSON rows are one JSON object per line. CSV rows follow a header
+    line; a quoted field may span lines, and ``csv.reader`` itself decides
+    where a record ends. Lines are decoded one by one, so invalid UTF-8
+    only fails the row it is in. Line numbers are 1-based and count the
+    CSV header.
+    """
+
+    def __init__(self, body_format: str):
+        self.format = body_format
+        self.line = 0
+        self.header: Optional[List[str]] = None
+        self._tail = b""
+        self._record: List[str] = []
+        self._record_line = 0
+        self._record_error: Optional[str] = None
+
+    def feed(self, data: bytes) -> List[ParsedRow]:
+        """Parse the complete lines in ``data`` plus any earlier remainder"""
+        lines = (self._tail + data).split(b"\n")
+        self._tail = lines.pop()
+        return [row for line in lines for row in self._parse_line(line)]
+
+    def close(self) -> List[ParsedRow]:
+        """Parse whatever is left at the end of the body"""
+        rows = list(self._parse_line(self._tail))
+        self._tail = b""
+        if self._record:
+            rows.append((self._record_line, "Unterminated quoted field"))
+            self._record = []
+        return rows
+
+    def _parse_line(self, data: bytes) -> Iterable[ParsedRow]:
+        self.line += 1
+        if self.line == 1 and data.startswith(codecs.BOM_UTF8):
+            data = data[len(codecs.BOM_UTF8):]
+        try:
+            line, error = data.decode("utf-8"), None
+        except UnicodeDecodeError as exc:
+            # Decoded anyway so that CSV record boundaries are still found
+            line, error = data.decode("utf-8", errors="replace"), f"Invalid UTF-8 at byte {exc.start}"
+        if self.format == "ndjson":
+            if error:
+                yield self.line, error
+            else:
+                yield from self._parse_json(line)
+        else:
+            yield from self._parse_csv(line, error)
+
+    def _parse_json(self, line: str) -> Iterable[ParsedRow]:
+        if not line.strip():
+            return
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield self.line, f"Invalid JSON: {exc}"
+            return
+        yield self.line, row if isinstance(row, dict) else "Expected a JSON object"
+
+    def _parse_csv(self, line: str, error: Optional[str]) -> Iterable[ParsedRow]:
+        if not self._record:
+            if not line.strip() and not error:
+                return
+            self._record_line = self.line
+            self._record_error = None
+        self._record.append(line + "\n")
+        self._record_error = self._record_error or error
+
+        try:
+            values = next(csv.reader(_record_lines(self._record)))
+        except _RecordContinues:
+            # The reader is inside a quoted field that goes on past this line
+            return
+        except csv.Error as exc:
+            values, self._record_error = [], self._record_error or f"Invalid CSV: {exc}"
+        self._record = []
+
+        if self.header is None:
+            self.header = [name.strip() for name in values]
+            if self._record_error:
+                yield self._record_line, self._record_error
+            return
+        if self._record_error:
+            yield self._record_line, self._record_error
+            return
+        if len(values) != len(self.header):
+            yield self._record_line, f"Expected {len(self.header)} fields, got {len(values)}"
+            return
+        # Empty cells mean "not set", so schema defaults apply
+        yield self._record_line, {name: value for name, value in zip(self.header, values) if value != ""}
+
+
+def validate_rows(rows: Sequence[ParsedRow]) -> Tuple[List[Tuple[int, ProductCreate]], List[Dict[str, Any]]]:
+    """Split parsed rows into valid products and per-row errors"""
+    valid, errors = [], []
+    for line, row in rows:
+        if isinstance(row, str):
+            errors.append({"line": line, "errors": [row]})
+            continue
+        try:
+            valid.append((line, ProductCreate.model_validate(row)))
+        except ValidationError as exc:
+            errors.append({
+                "line": line,
+                "errors": [f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors()],
+            })
+    return valid, errors
+
+
+def upsert_products(db: Session, products: Sequence[Tuple[int, ProductCreate]]) -> List[Dict[str, Any]]:
+    """
+    Insert or update a chunk of products in one batched statement.
+
+    Rows with a known ``sku`` update that product; the rest are inserted.
+    When a SKU repeats within the chunk the last row wins. A chunk the
+    database rejects is rolled back and retried row by row, so that only
+    the offending lines are reported.
+
+    Returns:
+        list: Per-row errors (empty when the chunk was written)
+    """
+    if not products:
+        return []
+
+    insert = upsert_insert(db.get_bind())
+    if insert is None:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Bulk import needs PostgreSQL or SQLite"
+        )
+
+    now = datetime.utcnow()
+    rows: Dict[Any, Dict[str, Any]] = {}
+    for line, product in products:
+        row = {**product.model_dump(), "created_at": now, "updated_at": now}
+        rows[row["sku"] if row["sku"] is not None else ("line", line)] = row
+    rows = list(rows.values())
+
+    skus = [row["sku"] for row in rows if row["sku"] is not None]
+
+    statement = insert(Product)
+    statement = statement.on_conflict_do_update(
+        index_elements=[Product.sku],
+        set_={
+            **{column: statement.excluded[column] for column in UPSERT_COLUMNS},
+            "updated_at": now,
+        }
+    ).returning(Product.id, sort_by_parameter_order=True)
+
+    try:
+        # Categories before the write, so listings a product leaves are dropped too
+        previous = db.execute(
+            select(Product.category).where(Product.sku.in_(skus)).distinct()
+        ).scalars().all() if skus else []
+        ids = db.execute(statement, rows).scalars().all()
+        db.commit()
+    except DBAPIError as exc:
+        db.rollback()
+        if len(products) > 1:
+            return [error for row in products for error in upsert_products(db, [row])]
+        return [{"line": products[0][0], "errors": [f"Database error: {exc.orig}"]}]
+
+    product_cache.invalidate_products([(product_id, None) for product_id in ids])
+    product_cache.invalidate_category(*previous, *(row["category"] for row in rows))
+    search_index.apply(
+        (product_id, (row["name"], row["description"])) for product_id, row in zip(ids, rows)
+    )
+    return []
+
+
+async def import_products(
+    body: AsyncIterable[bytes],
+    body_format: str,
+    write_chunk: Callable[[List[Tuple[int, ProductCreate]]], Awaitable[List[Dict[str, Any]]]]
+) -> Dict[str, Any]:
+    """
+    Stream a request body into the catalog, one chunk at a time.
+
+    ``write_chunk`` runs ``upsert_products`` on the caller's session (in
+    the threadpool, or through ``AsyncSession.run_sync``).
+    """
+    parser = RowParser(body_format)
+    report = {"received": 0, "upserted": 0, "failed": 0, "errors": []}
+    pending: List[Tuple[int, ProductCreate]] = []
+
+    def record_errors(errors):
+        report["failed"] += len(errors)
+        room = settings.PRODUCT_IMPORT_MAX_ERRORS - len(report["errors"])
+        report["errors"].extend(errors[:max(room, 0)])
+
+    async def flush():
+        chunk = pending[:]
+        pending.clear()
+        errors = await write_chunk(chunk)
+        record_errors(errors)
+        report["upserted"] += len(chunk) - len(errors)
+
+    async def consume(rows):
+        report["received"] += len(rows)
+        valid, errors = validate_rows(rows)
+        record_errors(errors)
+        pending.extend(valid)
+        if len(pending) >= settings.PRODUCT_IMPORT_CHUNK_SIZE:
+            await flush()
+
+    async for data in body:
+        await consume(parser.feed(data))
+    await consume(parser.close())
+    if pending:
+        await flush()
+
+    return report
+
+
+def export_statement():
+    """Whole-catalog export query, in id order"""
+    return select(*EXPORT_COLUMNS).order_by(Product.id)
+
+
+def export_products(db: Session, export_format: str) -> Iterable[str]:
+    """Stream the catalog from a server-side cursor"""
+    return stream_rows(db, export_statement(), export_format, settings.PRODUCT_EXPORT_BATCH_SIZE)
+
+
+def export_products_async(db: AsyncSession, export_format: str) -> AsyncIterable[str]:
+    """Asyncio variant of ``export_products``"""
+    return stream_rows_async(db, export_statement(), export_format, settings.PRODUCT_EXPORT_BATCH_SIZE)
@@ -0,0 +1,344 @@
+"""
+``Idempotency-Key`` support for order creation: retries with the same key
+get the first response back instead of placing the order again.
+"""
+import asyncio
+import hashlib
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Callable, NamedTuple, Optional, Union
+
+import orjson
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, delete, event, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config.settings import settings
+from app.database.connection import SessionLocal
+from app.models.idempotency import IdempotencyRecord
+
+# Seconds between sweeps of expired rows by the database store
+PURGE_INTERVAL = 60.0
+
+
+class StoredResponse(NamedTuple):
+    """Response recorded for a key, replayed to retries"""
+    status_code: int
+    body: Any
+
+
+class Claim(NamedTuple):
+    """A key held by the current request; ``token`` tells it from later holders"""
+    key: str
+    token: str
+
+
+class IdempotencyError(Exception):
+    """Base class for keys that cannot be claimed or completed"""
+
+
+class KeyReuseError(IdempotencyError):
+    """Raised when a key comes back with a different request"""
+
+
+class ClaimLostError(IdempotencyError):
+    """Raised on completing a claim whose lock lapsed and was taken over"""
+
+
+def request_fingerprint(payload: Any) -> str:
+    """SHA-256 of the request's canonical JSON (sorted keys)"""
+    return hashlib.sha256(orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+class IdempotencyStore(ABC):
+    """Where keys, fingerprints and stored responses live"""
+
+    @abstractmethod
+    def try_claim(self, key: str, fingerprint: str) -> Union[Claim, StoredResponse, None]:
+        """
+        Claim ``key`` for a new request, or return the response stored
+        under it; ``None`` while another request holds it. Raises
+        ``KeyReuseError``.
+        """
+
+    @abstractmethod
+    def complete(self, db: Session, claim: Claim, status_code: int, body: Any) -> None:
+        """
+        Store the response of the request holding ``claim`` as part of
+        ``db``'s transaction. Raises ``ClaimLostError``.
+        """
+
+    @abstractmethod
+    def release(self, claim: Claim) -> None:
+        """Give up an in-flight claim so that a retry runs afresh"""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Forget every key"""
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "token", "status_code", "body", "locked_until", "expires_at")
+
+    def __init__(self, fingerprint: str, token: str, locked_until: float, expires_at: float):
+        self.fingerprint = fingerprint
+        self.token = token
+        self.status_code: Optional[int] = None
+        self.body: Any = None
+        self.locked_until = locked_until
+        self.expires_at = expires_at
+
+
+class MemoryIdempotencyStore(IdempotencyStore):
+    """
+    Process-local store. A response is recorded when the transaction it
+    was completed in commits.
+
+    Entries are kept in claim order, so expired ones are swept from the
+    front. Beyond ``max_entries`` the oldest are dropped early.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        lock_seconds: float,
+        max_entries: int = 100000,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.ttl = ttl
+        self.lock_seconds = lock_seconds
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def try_claim(self, key: str, fingerprint: str) -> Union[Claim, StoredResponse, None]:
+        with self._lock:
+            now = self.clock()
+            self._sweep(now)
+            entry = self._entries.get(key)
+            if entry is None or (entry.status_code is None and entry.locked_until <= now):
+                token = uuid.uuid4().hex
+                self._entries[key] = _Entry(fingerprint, token, now + self.lock_seconds, now + self.ttl)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                return Claim(key, token)
+            if entry.fingerprint != fingerprint:
+                raise KeyReuseError(key)
+            if entry.status_code is not None:
+                return StoredResponse(entry.status_code, entry.body)
+            return None
+
+    def complete(self, db: Session, claim: Claim, status_code: int, body: Any) -> None:
+        with self._lock:
+            if self._holder(claim) is None:
+                raise ClaimLostError(claim.key)
+
+        def record(session: Session) -> None:
+            with self._lock:
+                entry = self._holder(claim)
+                if entry is not None:
+                    entry.status_code = status_code
+                    entry.body = body
+
+        event.listen(db, "after_commit", record, once=True)
+
+    def release(self, claim: Claim) -> None:
+        with self._lock:
+            if self._holder(claim) is not None:
+                del self._entries[claim.key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _holder(self, claim: Claim) -> Optional[_Entry]:
+        """The entry of ``claim`` if it is still in flight and held by it"""
+        entry = self._entries.get(claim.key)
+        if entry is None or entry.token != claim.token or entry.status_code is not None:
+            return None
+        return entry
+
+    def _sweep(self, now: float) -> None:
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry.expires_at > now:
+                return
+            del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DatabaseIdempotencyStore(IdempotencyStore):
+    """
+    Store on the ``idempotency_keys`` table, shared across processes.
+
+    A claim is an INSERT that the primary key makes exclusive, committed
+    on its own so that other workers see it before the request runs. The
+    response is written by an UPDATE conditional on the claim's token, in
+    the request's own transaction: the table must live in the database
+    the request writes to.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        ttl: float,
+        lock_seconds: float
+    ):
+        self.session_factory = session_factory
+        self.ttl = ttl
+        self.lock_seconds = lock_seconds
+        self._purged_at = 0.0
+
+    def try_claim(self, key: str, fingerprint: str) -> Union[Claim, StoredResponse, None]:
+        while True:
+            now = datetime.utcnow()
+            token = uuid.uuid4().hex
+            with self.session_factory() as db:
+                self._purge(db, now)
+                db.add(IdempotencyRecord(
+                    key=key,
+                    fingerprint=fingerprint,
+                    token=token,
+                    locked_until=now + timedelta(seconds=self.lock_seconds),
+                    expires_at=now + timedelta(seconds=self.ttl)
+                ))
+                try:
+                    db.commit()
+                    return Claim(key, token)
+                except IntegrityError:
+                    db.rollback()
+
+                record = db.get(IdempotencyRecord, key)
+                if record is None:
+                    # Released between the insert and the read
+                    continue
+                if record.expires_at <= now or (record.status_code is None and record.locked_until <= now):
+                    # Conditional, so only a row that is still stale is removed
+                    db.execute(delete(IdempotencyRecord).where(
+                        IdempotencyRecord.key == key,
+                        or_(
+                            IdempotencyRecord.expires_at <= now,
+                            and_(IdempotencyRecord.status_code.is_(None), IdempotencyRecord.locked_until <= now)
+                        )
+                    ))
+                    db.commit()
+                    continue
+                if record.fingerprint != fingerprint:
+                    raise KeyReuseError(key)
+                if record.status_code is not None:
+                    return StoredResponse(record.status_code, record.response)
+                return None
+
+    def complete(self, db: Session, claim: Claim, status_code: int, body: Any) -> None:
+        result = db.execute(
+            update(IdempotencyRecord)
+            .where(
+                IdempotencyRecord.key == claim.key,
+                IdempotencyRecord.token == claim.token,
+                IdempotencyRecord.status_code.is_(None)
+            )
+            .values(status_code=status_code, response=body)
+        )
+        if result.rowcount == 0:
+            raise ClaimLostError(claim.key)
+
+    def release(self, claim: Claim) -> None:
+        with self.session_factory() as db:
+            db.execute(delete(IdempotencyRecord).where(
+                IdempotencyRecord.key == claim.key,
+                IdempotencyRecord.token == claim.token,
+                IdempotencyRecord.status_code.is_(None)
+            ))
+            db.commit()
+
+    def clear(self) -> None:
+        with self.session_factory() as db:
+            db.execute(delete(IdempotencyRecord))
+            db.commit()
+
+    def _purge(self, db: Session, now: datetime) -> None:
+        """Delete expired rows, at most once per ``PURGE_INTERVAL``"""
+        if time.monotonic() - self._purged_at < PURGE_INTERVAL:
+            return
+        self._purged_at = time.monotonic()
+        db.execute(delete(IdempotencyRecord).where(IdempotencyRecord.expires_at <= now))
+        db.commit()
+
+
+class Idempotency:
+    """
+    Key handling for the routers: scopes keys, fingerprints requests,
+    waits for requests in flight and turns store errors into HTTP errors.
+    """
+
+    def __init__(self, store: IdempotencyStore, wait_seconds: float, poll_interval: float = 0.05):
+        self.store = store
+        self.wait_seconds = wait_seconds
+        self.poll_interval = poll_interval
+
+    async def claim(self, scope: str, key: str, payload: Any) -> Union[Claim, StoredResponse]:
+        """
+        Claim ``key`` within ``scope`` (e.g. one user's orders) for the
+        request described by ``payload``, or return its stored response.
+
+        A duplicate of a request in flight polls the store, sleeping on the
+        event loop in between, so waiting holds no worker thread.
+        """
+        scoped_key = f"{scope}:{key}"
+        fingerprint = request_fingerprint(payload)
+        deadline = time.monotonic() + self.wait_seconds
+        while True:
+            try:
+                result = await run_in_threadpool(self.store.try_claim, scoped_key, fingerprint)
+            except KeyReuseError:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="Idempotency-Key was already used for a different request"
+                )
+            if result is not None:
+                return result
+            if time.monotonic() >= deadline:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A request with this Idempotency-Key is still being processed"
+                )
+            await asyncio.sleep(self.poll_interval)
+
+    def complete(self, db: Session, claim: Claim, status_code: int, body: Any) -> None:
+        """
+        Store a response in ``db``'s transaction, which the caller then
+        commits; ``body`` is kept as plain JSON (datetimes become strings).
+        """
+        try:
+            self.store.complete(db, claim, status_code, orjson.loads(orjson.dumps(body)))
+        except ClaimLostError:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="This request's Idempotency-Key was taken over by a retry"
+            )
+
+    def release(self, claim: Claim) -> None:
+        self.store.release(claim)
+
+
+def create_store(backend: str) -> IdempotencyStore:
+    """Store named by ``IDEMPOTENCY_BACKEND``"""
+    options = dict(ttl=settings.IDEMPOTENCY_TTL_SECONDS, lock_seconds=settings.IDEMPOTENCY_LOCK_SECONDS)
+    if backend == "memory":
+        return MemoryIdempotencyStore(max_entries=settings.IDEMPOTENCY_MAX_ENTRIES, **options)
+    if backend == "database":
+        return DatabaseIdempotencyStore(SessionLocal, **options)
+    raise ValueError(f"Unknown IDEMPOTENCY_BACKEND {backend!r} (use 'database' or 'memory')")
+
+
+idempotency = Idempotency(create_store(settings.IDEMPOTENCY_BACKEND), wait_seconds=settings.IDEMPOTENCY_WAIT_SECONDS)
@@ -0,0 +1,219 @@
+import asyncio
+import random
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, select, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from sqlalchemy.util import await_only
+
+from app.config.settings import settings
+from app.database.connection import begin_sqlite_write
+from app.models.product import Product
+
+# Postgres error codes worth retrying: deadlock, serialization failure, lock timeout
+RETRYABLE_PGCODES = {"40P01", "40001", "55P03"}
+
+
+class InventoryError(Exception):
+    """Base class for stock reservation failures"""
+
+
+class ProductNotFoundError(InventoryError):
+    """Raised when an order references a product that does not exist"""
+
+    def __init__(self, product_id: int):
+        self.product_id = product_id
+        super().__init__(f"Product with ID {product_id} not found")
+
+
+class InsufficientStockError(InventoryError):
+    """Raised when a product cannot cover the requested quantity (summed over the order's lines)"""
+
+    def __init__(self, product: Product, requested: int):
+        self.product_id = product.id
+        self.available = product.stock
+        self.requested = requested
+        super().__init__(
+            f"Insufficient stock for product '{product.name}'. "
+            f"Available: {product.stock}, Requested: {requested}"
+        )
+
+
+def aggregate_quantities(items: Iterable) -> Dict[int, int]:
+    """Sum requested quantities per product, keeping first-seen order"""
+    quantities: Dict[int, int] = {}
+    for item in items:
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+    return quantities
+
+
+def order_quantities(orders: Iterable) -> Dict[int, int]:
+    """Sum item quantities per product across one or more stored orders"""
+    return aggregate_quantities(
+        item for order in orders for item in order.line_items
+        # Lines of deleted products have nothing to restock
+        if item.product_id is not None
+    )
+
+
+def load_products(
+    db: Session,
+    product_ids: Iterable[int],
+    lock: bool = False
+) -> Dict[int, Product]:
+    """
+    Load every referenced product with a single IN (...) query.
+
+    With ``lock`` the rows are taken with ``SELECT ... FOR UPDATE`` in
+    ascending id order, so concurrent checkouts touching overlapping
+    products always acquire their row locks in the same order and cannot
+    deadlock each other.
+    """
+    query = db.query(Product)\
+        .filter(Product.id.in_(list(product_ids)))\
+        .order_by(Product.id)\
+        .populate_existing()
+    
+    if lock:
+        query = query.with_for_update()
+    
+    return {product.id: product for product in query.all()}
+
+
+def apply_decrements(db: Session, quantities: Dict[int, int]) -> List[int]:
+    """
+    Decrement stock for all products in one conditional UPDATE.
+
+    Only rows that still hold enough stock are updated; the ids of the
+    rows that could not be reserved are returned in request order.
+    """
+    requested = case(quantities, value=Product.id)
+    stmt = (
+        update(Product)
+        .where(Product.id.in_(list(quantities)), Product.stock >= requested)
+        .values(stock=Product.stock - requested)
+        .returning(Product.id)
+        .execution_options(synchronize_session=False)
+    )
+    reserved = set(db.execute(stmt).scalars())
+    return [product_id for product_id in quantities if product_id not in reserved]
+
+
+def is_retryable(exc: DBAPIError) -> bool:
+    """Tell whether a database error is a transient lock conflict"""
+    if getattr(exc.orig, "pgcode", None) in RETRYABLE_PGCODES:
+        return True
+    return "database is locked" in str(exc.orig)
+
+
+def reserve_stock(db: Session, items: Iterable) -> Dict[int, Product]:
+    """
+    Reserve stock for every order line item.
+
+    The decrement itself is an atomic compare-and-decrement, so stock can
+    never be oversold. Each attempt runs in a savepoint, so a transient
+    lock conflict (deadlock, serialization failure, busy SQLite file)
+    only undoes the reservation, not the rest of the caller's
+    transaction; it is retried a bounded number of times with jittered
+    backoff before being re-raised.
+
+    Args:
+        db: Database session
+        items: Order line items with ``product_id`` and ``quantity``
+
+    Returns:
+        Dict[int, Product]: The referenced products keyed by id
+
+    Raises:
+        ProductNotFoundError: If a referenced product does not exist
+        InsufficientStockError: If a product cannot cover its quantity
+    """
+    quantities = aggregate_quantities(items)
+    attempt = 0
+    
+    while True:
+        try:
+            begin_sqlite_write(db)
+            with db.begin_nested():
+                return _reserve(db, quantities)
+        except DBAPIError as exc:
+            if attempt >= settings.INVENTORY_MAX_RETRIES or not is_retryable(exc):
+                raise
+            attempt += 1
+            backoff = settings.INVENTORY_RETRY_BACKOFF_MS / 1000.0 * 2 ** (attempt - 1)
+            backoff_sleep(db, random.uniform(0, backoff))
+
+
+def backoff_sleep(db: Session, seconds: float) -> None:
+    """Wait between attempts without blocking the event loop of an async session"""
+    if db.get_bind().dialect.is_async:
+        # Under AsyncSession.run_sync: yield to the loop, as the driver's own IO does
+        await_only(asyncio.sleep(seconds))
+    else:
+        time.sleep(seconds)
+
+
+def _reserve(db: Session, quantities: Dict[int, int]) -> Dict[int, Product]:
+    """Run one reservation attempt (inside the caller's savepoint)"""
+    products = load_products(db, quantities, lock=settings.INVENTORY_LOCK_ROWS)
+
+    # Validate in cart order so the first offending item is reported
+    for product_id, quantity in quantities.items():
+        product = products.get(product_id)
+        if product is None:
+            raise ProductNotFoundError(product_id)
+        if product.stock < quantity:
+            raise InsufficientStockError(product, quantity)
+
+    failed = apply_decrements(db, quantities)
+    if failed:
+        # Stock moved underneath us; raising rolls the savepoint (and the
+        # partial reservation) back
+        product = products[failed[0]]
+        db.refresh(product)
+        raise InsufficientStockError(product, quantities[failed[0]])
+
+    # The UPDATE bypassed the identity map, so drop the stale values
+    for product in products.values():
+        db.expire(product, ["stock", "updated_at"])
+
+    return products
+
+
+def restore_stock(db: Session, quantities: Dict[int, int]) -> List[Tuple[int, Optional[str]]]:
+    """
+    Return stock for many products in one grouped UPDATE.
+
+    Issues ``UPDATE products SET stock = stock + CASE id ... END WHERE
+    id IN (...)``; products that no longer exist are silently skipped.
+    The caller owns the transaction.
+
+    Returns:
+        List[Tuple[int, Optional[str]]]: ``(id, category)`` of every
+            restocked product, for cache invalidation
+    """
+    if not quantities:
+        return []
+    
+    product_ids = sorted(quantities)
+    
+    # Take the row locks in the same order as reservations do
+    if settings.INVENTORY_LOCK_ROWS:
+        db.execute(
+            select(Product.id)
+            .where(Product.id.in_(product_ids))
+            .order_by(Product.id)
+            .with_for_update()
+        ).all()
+    
+    restored = case(quantities, value=Product.id)
+    result = db.execute(
+        update(Product)
+        .where(Product.id.in_(product_ids))
+        .values(stock=Product.stock + restored)
+        .returning(Product.id, Product.category)
+        .execution_options(synchronize_session=False)
+    )
+    return [tuple(row) for row in result]
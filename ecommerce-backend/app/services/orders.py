@@ -0,0 +1,340 @@
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple, Union
+
+from fastapi import HTTPException, status
+from sqlalchemy import Text, cast, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.cache.product_cache import product_cache
+from app.config.settings import settings
+from app.models.order import Order, OrderItem
+from app.models.user import User
+from app.schemas.order import OrderCreate, OrderUpdate, serialize_order
+from app.services import outbox
+from app.services.idempotency import Claim, idempotency
+from app.services.inventory import (
+    reserve_stock,
+    restore_stock,
+    order_quantities,
+    ProductNotFoundError,
+    InsufficientStockError,
+)
+from app.utils.export import stream_rows, stream_rows_async
+from app.utils.pagination import keyset_page
+
+# Order operations shared by the sync and async routers. Every function
+# takes a sync Session, so async handlers run them with AsyncSession.run_sync.
+
+
+def place_order(
+    db: Session,
+    current_user: User,
+    order_data: OrderCreate,
+    idempotency_claim: Optional[Claim] = None
+) -> Order:
+    """
+    Reserve stock and create an order in one transaction; with
+    ``idempotency_claim`` the response is stored in that transaction too.
+    """
+
+    # Validate products and reserve stock in bulk
+    try:
+        products = reserve_stock(db, order_data.items)
+    except ProductNotFoundError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(exc)
+        )
+    except InsufficientStockError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc)
+        )
+
+    # Calculate total
+    total_amount = 0.0
+    order_items = []
+
+    for item in order_data.items:
+        product = products[item.product_id]
+
+        # Calculate item total
+        item_total = float(product.price) * item.quantity
+        total_amount += item_total
+
+        # Prepare order item data
+        order_items.append({
+            "product_id": item.product_id,
+            "name": item.name,
+            "quantity": item.quantity,
+            "price": float(item.price)
+        })
+
+    # Create the order
+    new_order = Order(
+        user_id=current_user.id,
+        total_amount=total_amount,
+        status="pending",
+        shipping_address=order_data.shipping_address,
+        items_json=order_items
+    )
+
+    touched = [(product.id, product.category) for product in products.values()]
+
+    db.add(new_order)
+    db.flush()
+    # One executemany for the line items: the ORM would insert them one
+    # by one on SQLite, which cannot return batched ids in order
+    db.execute(insert(OrderItem), [{"order_id": new_order.id, **item} for item in order_items])
+    # Downstream consumers (e.g. the analytics rollups) run later, from the outbox, not in checkout
+    outbox.publish(db, outbox.ORDER_PLACED, [placed_event(new_order, order_items)])
+    if idempotency_claim is not None:
+        # A retry finds either the order and its stored response, or neither
+        idempotency.complete(db, idempotency_claim, status.HTTP_201_CREATED, serialize_order(new_order))
+    db.commit()
+    db.refresh(new_order)
+
+    product_cache.invalidate_products(touched)
+
+    return new_order
+
+
+def placed_event(order: Order, order_items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Payload of an ``order.placed`` outbox event"""
+    return {
+        "order_id": order.id,
+        "user_id": order.user_id,
+        "total_amount": order.total_amount,
+        "shipping_address": order.shipping_address,
+        "status": order.status,
+        "items": order_items,
+        "created_at": order.created_at.isoformat(),
+    }
+
+
+def status_changed_event(order: Order, previous_status: str) -> Dict[str, Any]:
+    """Payload of an ``order.status_changed`` outbox event"""
+    return {
+        "order_id": order.id,
+        "user_id": order.user_id,
+        "previous_status": previous_status,
+        "status": order.status,
+        "total_amount": order.total_amount,
+        "items": [
+            {"product_id": item.product_id, "name": item.name, "quantity": item.quantity, "price": item.price}
+            for item in order.line_items
+        ],
+        "created_at": order.created_at.isoformat(),
+    }
+
+
+def publish_status_changes(db: Session, changes: List[Tuple[Order, str]]) -> None:
+    """Queue events for the orders whose status changed; ``changes`` pairs each order with its previous status"""
+    outbox.publish(db, outbox.ORDER_STATUS_CHANGED, [
+        status_changed_event(order, previous_status)
+        for order, previous_status in changes
+        if order.status != previous_status
+    ])
+
+
+def list_orders(
+    db: Session,
+    current_user: User,
+    skip: int,
+    limit: int,
+    after: Optional[str]
+) -> Union[List[Order], Dict[str, Any]]:
+    """Orders of the current user, as a list or a keyset page envelope"""
+
+    query = db.query(Order).filter(Order.user_id == current_user.id)
+
+    # Keyset pagination: cost does not grow with page depth
+    if after is not None:
+        orders, next_cursor = keyset_page(query, [Order.id], after, limit)
+        return {"items": orders, "next_cursor": next_cursor}
+
+    orders = query\
+        .order_by(Order.id)\
+        .offset(skip)\
+        .limit(limit)\
+        .all()
+
+    return orders
+
+
+def export_statement(user_id: int):
+    """
+    Order history export query for one user, in id order.
+
+    ``items`` is the JSON snapshot stored with the order, selected as text
+    so rows can be written out without decoding it or touching order_items.
+    """
+    return select(
+        Order.id, Order.status, Order.total_amount, Order.shipping_address,
+        cast(Order.items_json, Text).label("items"), Order.created_at, Order.updated_at
+    ).where(Order.user_id == user_id).order_by(Order.id)
+
+
+def export_orders(db: Session, current_user: User, export_format: str) -> Iterator[str]:
+    """Stream the current user's order history from a server-side cursor"""
+    return stream_rows(
+        db, export_statement(current_user.id), export_format,
+        settings.ORDER_EXPORT_BATCH_SIZE, raw_json=["items"]
+    )
+
+
+def export_orders_async(db: AsyncSession, current_user: User, export_format: str) -> AsyncIterator[str]:
+    """Asyncio variant of ``export_orders``"""
+    return stream_rows_async(
+        db, export_statement(current_user.id), export_format,
+        settings.ORDER_EXPORT_BATCH_SIZE, raw_json=["items"]
+    )
+
+
+def get_order(db: Session, current_user: User, order_id: int) -> Order:
+    """Load an order owned by the current user"""
+
+    order = db.query(Order).filter(Order.id == order_id).first()
+
+    if not order:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Order not found"
+        )
+
+    # Check if order belongs to current user
+    if order.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this order"
+        )
+
+    return order
+
+
+def update_order(db: Session, current_user: User, order_id: int, order_update: OrderUpdate) -> Order:
+    """Update order status or shipping address"""
+
+    order = db.query(Order).filter(Order.id == order_id).first()
+
+    if not order:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Order not found"
+        )
+
+    # Check if order belongs to current user
+    if order.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to modify this order"
+        )
+
+    # Prevent updating completed or cancelled orders
+    if order.status in ["completed", "cancelled"] and order_update.status:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Cannot update {order.status} order"
+        )
+
+    previous_status = order.status
+
+    # Update fields
+    update_data = order_update.model_dump(exclude_unset=True)
+    for field, value in update_data.items():
+        setattr(order, field, value)
+
+    publish_status_changes(db, [(order, previous_status)])
+    db.commit()
+    db.refresh(order)
+
+    return order
+
+
+def check_cancellable(order: Optional[Order], order_id: int, current_user: User) -> None:
+    """Raise if the current user may not cancel the given order"""
+
+    if not order:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Order {order_id} not found"
+        )
+
+    # Check if order belongs to current user
+    if order.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to cancel this order"
+        )
+
+    # Prevent cancelling completed orders
+    if order.status == "completed":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cannot cancel completed order"
+        )
+
+    # Already cancelled
+    if order.status == "cancelled":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Order is already cancelled"
+        )
+
+
+def cancel_orders(db: Session, current_user: User, order_ids: List[int]) -> List[Order]:
+    """Cancel several orders in one transaction and restore product stock"""
+
+    order_ids = list(dict.fromkeys(order_ids))
+    orders = {
+        order.id: order
+        for order in db.query(Order).filter(Order.id.in_(order_ids)).all()
+    }
+
+    # All-or-nothing: validate every order before touching stock
+    for order_id in order_ids:
+        check_cancellable(orders.get(order_id), order_id, current_user)
+
+    # Restore product stock, grouped per product
+    restocked = restore_stock(db, order_quantities(orders.values()))
+
+    changes = []
+    for order in orders.values():
+        changes.append((order, order.status))
+        order.status = "cancelled"
+    publish_status_changes(db, changes)
+
+    db.commit()
+    product_cache.invalidate_products(restocked)
+
+    # Reload all cancelled orders in one query, in request order
+    cancelled = db.query(Order).filter(Order.id.in_(order_ids)).all()
+    position = {order_id: index for index, order_id in enumerate(order_ids)}
+    cancelled.sort(key=lambda order: position[order.id])
+
+    return cancelled
+
+
+def cancel_order(db: Session, current_user: User, order_id: int) -> None:
+    """Cancel an order and restore product stock"""
+
+    order = db.query(Order).filter(Order.id == order_id).first()
+
+    if not order:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Order not found"
+        )
+
+    check_cancellable(order, order_id, current_user)
+
+    # Restore product stock in one grouped update
+    restocked = restore_stock(db, order_quantities([order]))
+
+    # Mark order as cancelled
+    previous_status = order.status
+    order.status = "cancelled"
+    publish_status_changes(db, [(order, previous_status)])
+
+    db.commit()
+    product_cache.invalidate_products(restocked)
@@ -0,0 +1,189 @@
+"""
+Transactional outbox: order writes ``publish`` events in their own
+transaction, and ``OutboxDispatcher`` later delivers them to the handlers
+registered with ``subscribe``.
+"""
+import argparse
+import asyncio
+import logging
+import random
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from app.config.settings import settings
+from app.database.connection import SessionLocal, begin_sqlite_write
+from app.models.outbox import OutboxEvent
+from app.utils.background import BatchWorker
+
+logger = logging.getLogger("app.outbox")
+
+ORDER_PLACED = "order.placed"
+ORDER_STATUS_CHANGED = "order.status_changed"
+
+# Seconds between purges of dispatched events
+PURGE_INTERVAL = 300.0
+
+Handler = Callable[..., None]
+
+# topic -> [(handler, transactional)]
+_handlers: Dict[str, List[Tuple[Handler, bool]]] = defaultdict(list)
+
+
+def subscribe(topic: str, transactional: bool = False) -> Callable[[Handler], Handler]:
+    """
+    Decorator registering a handler for ``topic`` events.
+
+    Handlers are called with the event payload. A ``transactional`` handler
+    is called as ``handler(db, payload)`` instead, and its writes commit
+    together with the event's dispatched status, so they happen exactly
+    once even though delivery is at least once.
+    """
+    def register(handler: Handler) -> Handler:
+        _handlers[topic].append((handler, transactional))
+        return handler
+    return register
+
+
+def unsubscribe(topic: str, handler: Handler) -> None:
+    _handlers[topic] = [entry for entry in _handlers.get(topic, ()) if entry[0] is not handler]
+
+
+def publish(db: Session, topic: str, payloads: List[Dict[str, Any]]) -> None:
+    """Queue events in the caller's transaction (one statement); nothing is sent before it commits"""
+    if payloads:
+        db.execute(insert(OutboxEvent), [{"topic": topic, "payload": payload} for payload in payloads])
+
+
+def retry_delay(attempts: int) -> float:
+    """Seconds before the next attempt: exponential in ``attempts``, capped, with full jitter"""
+    backoff = min(settings.OUTBOX_RETRY_BACKOFF_SECONDS * 2 ** (attempts - 1), settings.OUTBOX_RETRY_MAX_SECONDS)
+    return random.uniform(0, backoff)
+
+
+def handled_topics() -> List[str]:
+    return [topic for topic, handlers in _handlers.items() if handlers]
+
+
+def deliver(db: Session, topic: str, payload: Dict[str, Any]) -> None:
+    """Run every handler of ``topic``; the first failure propagates"""
+    for handler, transactional in list(_handlers.get(topic, ())):
+        if transactional:
+            handler(db, payload)
+        else:
+            handler(payload)
+
+
+def dispatch_batch(db: Session, batch_size: int, now: Optional[datetime] = None) -> int:
+    """
+    Deliver up to ``batch_size`` due events of subscribed topics and commit
+    their outcomes.
+
+    Returns:
+        int: Number of events attempted
+    """
+    topics = handled_topics()
+    if not topics:
+        return 0
+    now = now or datetime.utcnow()
+    # SQLite has no SKIP LOCKED: take the write lock before claiming instead
+    begin_sqlite_write(db)
+    query = select(OutboxEvent)\
+        .where(
+            OutboxEvent.status == "pending",
+            OutboxEvent.available_at <= now,
+            OutboxEvent.topic.in_(topics)
+        )\
+        .order_by(OutboxEvent.available_at, OutboxEvent.id)\
+        .limit(batch_size)
+    if db.get_bind().dialect.name == "postgresql":
+        query = query.with_for_update(skip_locked=True)
+    events = db.scalars(query).all()
+
+    for event in events:
+        event.attempts += 1
+        try:
+            # A failed event's transactional writes are rolled back on their own
+            with db.begin_nested():
+                deliver(db, event.topic, event.payload)
+        except Exception as exc:
+            event.last_error = f"{type(exc).__name__}: {exc}"[:2000]
+            if event.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                event.status = "dead"
+                logger.error("outbox event %s (%s) gave up after %d attempts: %s",
+                             event.id, event.topic, event.attempts, event.last_error)
+            else:
+                event.available_at = now + timedelta(seconds=retry_delay(event.attempts))
+                logger.warning("outbox event %s (%s) failed, attempt %d: %s",
+                               event.id, event.topic, event.attempts, event.last_error)
+        else:
+            event.status = "dispatched"
+            event.dispatched_at = now
+
+    db.commit()
+    return len(events)
+
+
+def purge_dispatched(db: Session, before: datetime) -> int:
+    """Delete events dispatched before ``before``; dead events are kept for inspection"""
+    result = db.execute(
+        delete(OutboxEvent).where(OutboxEvent.status == "dispatched", OutboxEvent.dispatched_at < before)
+    )
+    db.commit()
+    return result.rowcount
+
+
+class OutboxDispatcher(BatchWorker):
+    """Drains the outbox, a batch of due events at a time"""
+
+    name = "outbox dispatch"
+
+    def __init__(self, session_factory: Callable[[], Session], batch_size: int, poll_interval: float):
+        super().__init__(session_factory, batch_size, poll_interval)
+        self._purged_at = 0.0
+
+    def drain_once(self) -> int:
+        """Dispatch one batch (and purge old events when due); returns events attempted"""
+        with self.session_factory() as db:
+            if time.monotonic() - self._purged_at >= PURGE_INTERVAL:
+                self._purged_at = time.monotonic()
+                purge_dispatched(db, datetime.utcnow() - timedelta(hours=settings.OUTBOX_RETENTION_HOURS))
+            return dispatch_batch(db, self.batch_size)
+
+
+outbox_dispatcher = OutboxDispatcher(
+    SessionLocal,
+    batch_size=settings.OUTBOX_BATCH_SIZE,
+    poll_interval=settings.OUTBOX_POLL_INTERVAL_SECONDS
+)
+
+
+def main() -> None:
+    # ``python -m`` runs this file as __main__, a copy of the module without
+    # the subscriptions: use the real module, with the app (and thereby
+    # every subscriber) imported
+    import app.main  # noqa: F401
+    from app.database.connection import Base, engine
+    from app.services import outbox
+
+    parser = argparse.ArgumentParser(description="Deliver outbox events to their handlers")
+    parser.add_argument("--once", action="store_true", help="Drain the events that are due, then exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    Base.metadata.create_all(bind=engine)
+    if args.once:
+        logger.info("attempted %d events", outbox.outbox_dispatcher.drain())
+        return
+    try:
+        asyncio.run(outbox.outbox_dispatcher.run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+from typing import Any, Dict, List, Optional, Union
+
+from fastapi import HTTPException, status
+from sqlalchemy import case, func, literal_column, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.cache.product_cache import product_cache, serialize_product
+from app.database.replicas import READ_YOUR_WRITES
+from app.models.product import Product
+from app.schemas.product import ProductCreate, ProductUpdate
+from app.utils.pagination import keyset_page
+
+# Product operations shared by the sync and async routers. Every function
+# takes a sync Session, so async handlers run them with AsyncSession.run_sync.
+
+
+def cached(db: Session, key: str) -> Optional[Any]:
+    """Cache lookup, skipped when the caller must read its own writes"""
+    if db.info.get(READ_YOUR_WRITES):
+        return None
+    return product_cache.get(key)
+
+
+def listing_version(db: Session, category: Optional[str]) -> Dict[str, Any]:
+    """Aggregate version (max updated_at, row count) of a product listing"""
+
+    cache_key = product_cache.listing_key(category, version=True)
+    version = cached(db, cache_key)
+    if version is not None:
+        return version
+
+    query = db.query(func.max(Product.updated_at), func.count(Product.id))
+
+    if category:
+        query = query.filter(Product.category == category)
+
+    last_modified, count = query.one()
+    version = {
+        "last_modified": last_modified.isoformat() if last_modified else None,
+        "count": count
+    }
+    return product_cache.set(cache_key, version)
+
+
+# Sort options of product listings: key columns (id breaks ties, so keyset
+# cursors stay unique) and direction
+SORTS = {
+    "price": ((Product.price, Product.id), False),
+    "-price": ((Product.price, Product.id), True),
+    "created_at": ((Product.created_at, Product.id), False),
+    "-created_at": ((Product.created_at, Product.id), True),
+    "name": ((Product.name, Product.id), False),
+}
+
+# Lower bounds of the price facet buckets; the last bucket is open-ended
+PRICE_BUCKETS = (0, 25, 50, 100, 250, 500, 1000)
+
+
+def filter_products(
+    query,
+    category: Optional[str],
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    in_stock: Optional[bool] = None
+):
+    """Apply listing filters to a query over products"""
+
+    if category:
+        query = query.filter(Product.category == category)
+
+    if min_price is not None:
+        query = query.filter(Product.price >= min_price)
+
+    if max_price is not None:
+        query = query.filter(Product.price <= max_price)
+
+    # Inline 0: a bound parameter would not provably match the predicate
+    # of the partial index ix_products_in_stock
+    if in_stock is True:
+        query = query.filter(Product.stock > literal_column("0"))
+    elif in_stock is False:
+        query = query.filter(or_(Product.stock <= literal_column("0"), Product.stock.is_(None)))
+
+    return query
+
+
+def list_products(
+    db: Session,
+    skip: int,
+    limit: int,
+    category: Optional[str],
+    after: Optional[str],
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    in_stock: Optional[bool] = None,
+    sort: Optional[str] = None
+) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
+    """Serialized listing page, read through the product cache"""
+
+    cache_key = product_cache.listing_key(
+        category, skip=skip, limit=limit, after=after,
+        min_price=min_price, max_price=max_price, in_stock=in_stock, sort=sort
+    )
+    page = cached(db, cache_key)
+    if page is not None:
+        return page
+
+    query = filter_products(db.query(Product), category, min_price, max_price, in_stock)
+    columns, descending = SORTS.get(sort, ((Product.id,), False))
+
+    # Keyset pagination: cost does not grow with page depth
+    if after is not None:
+        products, next_cursor = keyset_page(query, columns, after, limit, descending)
+        page = {"items": [serialize_product(p) for p in products], "next_cursor": next_cursor}
+        return product_cache.set(cache_key, page)
+
+    order = [column.desc() for column in columns] if descending else columns
+    products = query.order_by(*order).offset(skip).limit(limit).all()
+    return product_cache.set(cache_key, [serialize_product(p) for p in products])
+
+
+def product_facets(
+    db: Session,
+    category: Optional[str],
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    in_stock: Optional[bool] = None
+) -> Dict[str, Any]:
+    """
+    Category and price-bucket counts of the filtered catalog.
+
+    Both facets come from one query grouped by (category, bucket); the
+    per-facet totals are summed from that small cross-tab.
+    """
+
+    cache_key = product_cache.listing_key(
+        category, facets=True, min_price=min_price, max_price=max_price, in_stock=in_stock
+    )
+    facets = cached(db, cache_key)
+    if facets is not None:
+        return facets
+
+    bucket = case(
+        *[(Product.price < upper, index) for index, upper in enumerate(PRICE_BUCKETS[1:])],
+        else_=len(PRICE_BUCKETS) - 1
+    ).label("bucket")
+    query = db.query(Product.category, bucket, func.count(Product.id))
+    rows = filter_products(query, category, min_price, max_price, in_stock)\
+        .group_by(Product.category, bucket)\
+        .all()
+
+    categories: Dict[Optional[str], int] = {}
+    buckets = [0] * len(PRICE_BUCKETS)
+    for row_category, row_bucket, count in rows:
+        categories[row_category] = categories.get(row_category, 0) + count
+        buckets[row_bucket] += count
+
+    upper_bounds = PRICE_BUCKETS[1:] + (None,)
+    facets = {
+        "categories": [
+            {"value": value, "count": count}
+            for value, count in sorted(categories.items(), key=lambda item: (-item[1], item[0] or ""))
+        ],
+        "price": [
+            {"min": lower, "max": upper, "count": count}
+            for lower, upper, count in zip(PRICE_BUCKETS, upper_bounds, buckets)
+        ],
+    }
+    return product_cache.set(cache_key, facets)
+
+
+def get_product(db: Session, product_id: int) -> Dict[str, Any]:
+    """Serialized product, read through the product cache"""
+
+    cache_key = product_cache.product_key(product_id)
+    data = cached(db, cache_key)
+    if data is not None:
+        return data
+
+    product = db.query(Product).filter(Product.id == product_id).first()
+
+    if not product:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Product not found"
+        )
+
+    return product_cache.set(cache_key, serialize_product(product))
+
+
+def commit_product(db: Session, sku: Optional[str]) -> None:
+    """Commit a product write, reporting a taken SKU as a conflict"""
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"A product with SKU {sku!r} already exists"
+        )
+
+
+def create_product(db: Session, product: ProductCreate) -> Product:
+    """Insert a product and invalidate the listings it appears on"""
+
+    new_product = Product(**product.model_dump())
+
+    db.add(new_product)
+    commit_product(db, new_product.sku)
+    db.refresh(new_product)
+
+    product_cache.invalidate_category(new_product.category)
+
+    return new_product
+
+
+def update_product(db: Session, product_id: int, product_update: ProductUpdate) -> Product:
+    """Apply a partial update and invalidate the cached product"""
+
+    product = db.query(Product).filter(Product.id == product_id).first()
+
+    if not product:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Product not found"
+        )
+
+    previous_category = product.category
+
+    # Update only provided fields
+    update_data = product_update.model_dump(exclude_unset=True)
+    for field, value in update_data.items():
+        setattr(product, field, value)
+
+    commit_product(db, product.sku)
+    db.refresh(product)
+
+    product_cache.invalidate_product(product_id, previous_category, product.category)
+
+    return product
+
+
+def delete_product(db: Session, product_id: int) -> None:
+    """Delete a product and invalidate the cached product"""
+
+    product = db.query(Product).filter(Product.id == product_id).first()
+
+    if not product:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Product not found"
+        )
+
+    category = product.category
+
+    db.delete(product)
+    db.commit()
+
+    product_cache.invalidate_product(product_id, category)
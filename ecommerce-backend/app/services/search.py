@@ -0,0 +1,98 @@
+from typing import Any, Dict, List
+
+from sqlalchemy import func, literal_column
+from sqlalchemy.orm import Session
+
+from app.cache.product_cache import serialize_product
+from app.models.product import Product, SEARCH_CONFIG, search_vector
+from app.services.search_index import highlight, search_index, tokenize
+
+# Words kept around the first match in description snippets
+SNIPPET_WORDS = 25
+
+HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>"
+
+
+def prefix_tsquery(terms: List[str]) -> str:
+    """``to_tsquery`` text requiring every term, each as a prefix"""
+    return " & ".join(f"{term}:*" for term in terms)
+
+
+def search_products(db: Session, q: str, skip: int, limit: int) -> List[Dict[str, Any]]:
+    """
+    Ranked product matches for a free-text query, with highlighted fields.
+    
+    Every word of ``q`` must match the start of a word in the product's
+    name or description; name matches rank higher. PostgreSQL answers
+    from the GIN index, other databases from the in-process index.
+    """
+    terms = list(dict.fromkeys(tokenize(q)))
+    if not terms:
+        return []
+
+    if db.get_bind().dialect.name == "postgresql":
+        return _search_postgres(db, terms, skip, limit)
+    return _search_index(db, q, terms, skip, limit)
+
+
+def _search_postgres(db: Session, terms: List[str], skip: int, limit: int) -> List[Dict[str, Any]]:
+    config = literal_column(f"'{SEARCH_CONFIG}'")
+    query = func.to_tsquery(config, prefix_tsquery(terms))
+    vector = search_vector(Product.name, Product.description)
+    rank = func.ts_rank_cd(vector, query)
+
+    # Rank and page first, so headlines are only built for the page
+    ranked = db.query(Product.id, rank.label("rank"))\
+        .filter(vector.op("@@")(query))\
+        .order_by(rank.desc(), Product.id)\
+        .offset(skip)\
+        .limit(limit)\
+        .subquery()
+
+    rows = db.query(
+        Product,
+        ranked.c.rank,
+        func.ts_headline(config, Product.name, query, f"{HEADLINE_OPTIONS}, HighlightAll=true"),
+        func.ts_headline(
+            config, Product.description, query,
+            f"{HEADLINE_OPTIONS}, MaxWords={SNIPPET_WORDS}, MinWords={SNIPPET_WORDS // 2}"
+        ),
+    )\
+        .join(ranked, ranked.c.id == Product.id)\
+        .order_by(ranked.c.rank.desc(), Product.id)\
+        .all()
+
+    return [
+        {
+            **serialize_product(product),
+            "rank": float(score),
+            "highlights": {"name": name, "description": description},
+        }
+        for product, score, name, description in rows
+    ]
+
+
+def _search_index(db: Session, q: str, terms: List[str], skip: int, limit: int) -> List[Dict[str, Any]]:
+    search_index.ensure_built(db)
+    hits = search_index.search(q, limit, skip)
+    if not hits:
+        return []
+
+    products = {
+        product.id: product
+        for product in db.query(Product).filter(Product.id.in_([product_id for product_id, _ in hits]))
+    }
+
+    return [
+        {
+            **serialize_product(products[product_id]),
+            "rank": score,
+            "highlights": {
+                "name": highlight(products[product_id].name, terms),
+                "description": highlight(products[product_id].description, terms, SNIPPET_WORDS),
+            },
+        }
+        for product_id, score in hits
+        # Skip products deleted elsewhere since the index was built
+        if product_id in products
+    ]
@@ -0,0 +1,289 @@
+import bisect
+import heapq
+import math
+import re
+import sys
+import threading
+import time
+from array import array
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app.config.settings import settings
+from app.models.product import Product
+
+# Letters and digits; underscores split words, as in the PostgreSQL parser
+WORD = re.compile(r"[^\W_]+")
+
+# Field weights, mirroring PostgreSQL's default A/B rank weights
+NAME_WEIGHT = 1.0
+DESCRIPTION_WEIGHT = 0.4
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Session.info key for product text changes waiting for their commit
+PENDING_CHANGES = "search_index_changes"
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lower-cased word tokens of a text"""
+    return WORD.findall(text.lower()) if text else []
+
+
+def highlight(text: Optional[str], terms: Sequence[str], max_words: Optional[int] = None) -> Optional[str]:
+    """
+    Wrap words starting with any of ``terms`` in ``<mark>`` tags.
+
+    With ``max_words`` only a fragment around the first match is kept, the
+    way ``ts_headline`` trims long descriptions.
+    """
+    if text is None:
+        return None
+
+    words = list(WORD.finditer(text))
+    matches = [i for i, word in enumerate(words) if word.group().lower().startswith(tuple(terms))]
+
+    start, end = 0, len(text)
+    if max_words is not None and len(words) > max_words:
+        first = max((matches[0] if matches else 0) - max_words // 3, 0)
+        last = min(first + max_words, len(words)) - 1
+        start, end = words[first].start(), words[last].end()
+
+    parts, position = [], start
+    for i in matches:
+        word = words[i]
+        if word.start() < start or word.end() > end:
+            continue
+        parts.extend([text[position:word.start()], "<mark>", word.group(), "</mark>"])
+        position = word.end()
+    parts.append(text[position:end])
+    return "".join(parts)
+
+
+class ProductSearchIndex:
+    """
+    In-process inverted index over product names and descriptions.
+
+    Used where the database has no full-text search (SQLite). Each term
+    maps to the products containing it with a field-weighted term
+    frequency; queries are ranked with BM25. Every query term matches as
+    a prefix, expanded through the sorted vocabulary.
+
+    The index is built lazily from the database, kept current from
+    committed ORM changes in this process, and rebuilt after ``max_age``
+    seconds to pick up writes made elsewhere.
+    """
+
+    def __init__(
+        self,
+        max_age: float,
+        max_expansions: int = 50,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_age = max_age
+        self.max_expansions = max_expansions
+        self.clock = clock
+        self.built_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._replay: Optional[List[Tuple[int, Optional[Tuple[str, Optional[str]]]]]] = None
+        self._reset()
+
+    def _reset(self) -> None:
+        # term -> (product ids, weighted term frequencies); arrays keep a
+        # million-product catalog to a few bytes per posting
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._doc_terms: Dict[int, Tuple[str, ...]] = {}
+        self._lengths: Dict[int, float] = {}
+        self._total_length = 0.0
+        self._vocabulary: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def ensure_built(self, db: Session) -> None:
+        """Build the index on first use and rebuild it once it is too old"""
+        if self.built_at is not None and self.clock() - self.built_at < self.max_age:
+            return
+
+        # While a rebuild runs elsewhere, serve the current (stale) index
+        if not self._build_lock.acquire(blocking=self.built_at is None):
+            return
+
+        try:
+            if self.built_at is not None and self.clock() - self.built_at < self.max_age:
+                return
+            self.rebuild(db)
+        finally:
+            self._build_lock.release()
+
+    def rebuild(self, db: Session, batch: int = 10000) -> None:
+        """Re-read every product and swap in a fresh index"""
+        fresh = ProductSearchIndex(self.max_age, self.max_expansions, self.clock)
+        with self._lock:
+            self._replay = []
+
+        rows = db.execute(
+            select(Product.id, Product.name, Product.description).execution_options(yield_per=batch)
+        )
+        for product_id, name, description in rows:
+            fresh._add(product_id, name, description, sort=False)
+        fresh._vocabulary = sorted(fresh._postings)
+
+        with self._lock:
+            self._postings = fresh._postings
+            self._doc_terms = fresh._doc_terms
+            self._lengths = fresh._lengths
+            self._total_length = fresh._total_length
+            self._vocabulary = fresh._vocabulary
+            # Changes committed while the snapshot was read win over it
+            replay, self._replay = self._replay, None
+            for product_id, text in replay:
+                self._apply(product_id, text)
+            self.built_at = self.clock()
+
+    def apply(self, changes: Iterable[Tuple[int, Optional[Tuple[str, Optional[str]]]]]) -> None:
+        """Apply committed ``(product_id, (name, description) or None)`` changes"""
+        with self._lock:
+            for product_id, text in changes:
+                if self._replay is not None:
+                    self._replay.append((product_id, text))
+                if self.built_at is not None:
+                    self._apply(product_id, text)
+
+    def clear(self) -> None:
+        """Drop the index; the next search rebuilds it"""
+        with self._lock:
+            self._reset()
+            self.built_at = None
+
+    def search(self, query: str, limit: int, offset: int = 0) -> List[Tuple[int, float]]:
+        """``(product_id, score)`` of the best matches, highest score first"""
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        with self._lock:
+            matches: Optional[Dict[int, float]] = None
+            # Every term must match: score the rarest first, then only
+            # score the remaining terms for products still in the running
+            for term in sorted(dict.fromkeys(terms), key=self._document_frequency):
+                term_scores = self._score(term, matches)
+                if matches is None:
+                    matches = term_scores
+                else:
+                    matches = {doc: matches[doc] + score for doc, score in term_scores.items()}
+                if not matches:
+                    return []
+
+        best = heapq.nsmallest(offset + limit, matches.items(), key=lambda item: (-item[1], item[0]))
+        return [(doc, round(score, 6)) for doc, score in best[offset:]]
+
+    def expand(self, term: str) -> List[str]:
+        """Indexed terms starting with ``term``, capped at ``max_expansions``"""
+        start = bisect.bisect_left(self._vocabulary, term)
+        expansions = []
+        for candidate in self._vocabulary[start:start + self.max_expansions]:
+            if not candidate.startswith(term):
+                break
+            expansions.append(candidate)
+        return expansions
+
+    def _document_frequency(self, term: str) -> int:
+        return sum(len(self._postings[candidate][0]) for candidate in self.expand(term))
+
+    def _score(self, term: str, restrict: Optional[Dict[int, float]]) -> Dict[int, float]:
+        """BM25 contribution of one (prefix) query term per matching product"""
+        documents = len(self._lengths)
+        average = self._total_length / documents if documents else 1.0
+        lengths = self._lengths
+        scores: Dict[int, float] = {}
+
+        for candidate in self.expand(term):
+            docs, frequencies = self._postings[candidate]
+            idf = math.log(1 + (documents - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc, frequency in zip(docs, frequencies):
+                if restrict is not None and doc not in restrict:
+                    continue
+                norm = frequency + K1 * (1 - B + B * lengths[doc] / average)
+                scores[doc] = scores.get(doc, 0.0) + idf * frequency * (K1 + 1) / norm
+
+        return scores
+
+    def _apply(self, product_id: int, text: Optional[Tuple[str, Optional[str]]]) -> None:
+        self._remove(product_id)
+        if text is not None:
+            self._add(product_id, *text)
+
+    def _add(self, product_id: int, name: Optional[str], description: Optional[str], sort: bool = True) -> None:
+        frequencies: Dict[str, float] = {}
+        # Interned, so every product's term tuple shares one copy per word
+        for term in tokenize(name):
+            term = sys.intern(term)
+            frequencies[term] = frequencies.get(term, 0.0) + NAME_WEIGHT
+        for term in tokenize(description):
+            term = sys.intern(term)
+            frequencies[term] = frequencies.get(term, 0.0) + DESCRIPTION_WEIGHT
+
+        for term, frequency in frequencies.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = (array("q"), array("f"))
+                if sort:
+                    bisect.insort(self._vocabulary, term)
+            postings[0].append(product_id)
+            postings[1].append(frequency)
+
+        length = sum(frequencies.values())
+        self._doc_terms[product_id] = tuple(frequencies)
+        self._lengths[product_id] = length
+        self._total_length += length
+
+    def _remove(self, product_id: int) -> None:
+        terms = self._doc_terms.pop(product_id, None)
+        if terms is None:
+            return
+
+        self._total_length -= self._lengths.pop(product_id)
+        for term in terms:
+            docs, frequencies = self._postings[term]
+            # Linear, but in C; updates are rare next to searches
+            position = docs.index(product_id)
+            del docs[position]
+            del frequencies[position]
+            if not docs:
+                del self._postings[term]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, term)]
+
+
+search_index = ProductSearchIndex(max_age=settings.SEARCH_INDEX_MAX_AGE_SECONDS)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_product_changes(session, flush_context):
+    """Remember flushed product text changes until the transaction ends"""
+    changes = session.info.setdefault(PENDING_CHANGES, [])
+    for product in session.new | session.dirty:
+        if isinstance(product, Product):
+            changes.append((product.id, (product.name, product.description)))
+    for product in session.deleted:
+        if isinstance(product, Product):
+            changes.append((product.id, None))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_product_changes(session):
+    """Index product changes once they are committed"""
+    changes = session.info.pop(PENDING_CHANGES, None)
+    if changes:
+        search_index.apply(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_product_changes(session):
+    """Forget product changes that were rolled back"""
+    session.info.pop(PENDING_CHANGES, None)
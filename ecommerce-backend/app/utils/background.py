@@ -0,0 +1,78 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Callable, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger("app.background")
+
+
+class BatchWorker(ABC):
+    """
+    Background task processing queued rows in batches: back to back while
+    full batches keep coming, then every ``poll_interval`` seconds.
+
+    Subclasses implement ``drain_once``, which runs in the threadpool;
+    ``stop`` lets the batch in flight finish, so that its outcome is
+    committed rather than processed again on the next start.
+    """
+
+    name = "batch worker"
+
+    def __init__(self, session_factory: Callable[[], Session], batch_size: int, poll_interval: float):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._task: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+
+    @abstractmethod
+    def drain_once(self) -> int:
+        """Process one batch; returns the number of rows taken"""
+
+    def drain(self) -> int:
+        """Process batches until one comes back short; returns rows taken"""
+        total = 0
+        while True:
+            taken = self.drain_once()
+            total += taken
+            if taken < self.batch_size:
+                return total
+
+    async def run(self) -> None:
+        """Drain until ``stop``; the stop request is only checked between batches"""
+        self._stopping = asyncio.Event()
+        while not self._stopping.is_set():
+            try:
+                taken = await run_in_threadpool(self.drain_once)
+            except Exception:
+                # e.g. the database is unreachable; keep the task alive and try again later
+                logger.exception("%s failed", self.name)
+                taken = 0
+            if taken < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    def start(self) -> None:
+        """Run as a task of the current event loop"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self) -> None:
+        """Ask the task to stop and wait for the batch in flight to be committed"""
+        if self._task is not None:
+            if self._stopping is not None:
+                self._stopping.set()
+            else:
+                # Not started running yet: nothing is in flight
+                self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._stopping = None
@@ -0,0 +1,254 @@
+"""
+Response compression.
+
+``CompressionMiddleware`` compresses response bodies with brotli or gzip,
+whichever the client prefers (brotli only when the optional ``brotli``
+package is installed). Bodies below ``minimum_size`` are sent as is.
+Streaming responses (exports) are compressed chunk by chunk and flushed
+after each one, so clients still receive rows as they are produced.
+
+Responses that already carry a ``Content-Encoding`` pass through
+untouched. ``precompressed_response`` relies on that to serve hot
+catalog pages from compressed bodies kept in ``encoded_bodies``, so
+repeated requests skip compression entirely.
+"""
+import zlib
+from typing import Any, Dict, Optional
+
+import orjson
+from fastapi import Request, Response
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.cache.body_cache import encoded_bodies
+from app.config.settings import settings
+from app.utils.responses import carry_headers, json_response
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+# Preferred first when the client accepts several with equal weight
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+)
+
+# Precompressed bodies are built once per page version, so they can
+# afford a slower, denser setting than per-request compression
+PRECOMPRESSED_GZIP_LEVEL = 9
+PRECOMPRESSED_BROTLI_QUALITY = 9
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick a supported content coding from an ``Accept-Encoding`` header.
+
+    Highest q-value wins, ties go to the order of ``ENCODINGS``; ``q=0``
+    rules a coding out, and ``*`` covers codings not listed. Returns
+    ``None`` when the body should be sent uncompressed.
+    """
+    if not accept_encoding:
+        return None
+
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip().lower()] = weight
+
+    wildcard = weights.get("*", 0.0)
+    best, best_weight = None, 0.0
+    for coding in ENCODINGS:
+        weight = weights.get(coding, wildcard)
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+class Compressor:
+    """Incremental brotli or gzip encoder"""
+
+    def __init__(self, encoding: str, level: Optional[int] = None):
+        if encoding == "br":
+            quality = settings.COMPRESSION_BROTLI_QUALITY if level is None else level
+            self._brotli = brotli.Compressor(quality=quality)
+            self._zlib = None
+        else:
+            level = settings.COMPRESSION_GZIP_LEVEL if level is None else level
+            # wbits 16+: gzip container rather than a raw zlib stream
+            self._zlib = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self._brotli = None
+
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        """Encode a chunk; ``flush`` makes everything so far decodable by the client"""
+        if self._zlib is not None:
+            return self._zlib.compress(data) + (self._zlib.flush(zlib.Z_SYNC_FLUSH) if flush else b"")
+        return self._brotli.process(data) + (self._brotli.flush() if flush else b"")
+
+    def finish(self, data: bytes = b"") -> bytes:
+        """Encode the last chunk and close the stream"""
+        if self._zlib is not None:
+            return self._zlib.compress(data) + self._zlib.flush()
+        return self._brotli.process(data) + self._brotli.finish()
+
+
+def compress(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """Compress a whole body"""
+    return Compressor(encoding, level).finish(data)
+
+
+def is_compressible(headers: Headers) -> bool:
+    """Whether a response's headers allow (re)encoding its body"""
+    if "content-encoding" in headers:
+        return False
+    content_type = headers.get("content-type", "")
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def mark_encoded(headers: MutableHeaders, encoding: str) -> None:
+    """Headers of a compressed representation"""
+    headers["Content-Encoding"] = encoding
+    headers.add_vary_header("Accept-Encoding")
+    # The bytes differ from the identity representation, so a strong
+    # validator no longer applies to them (as nginx does)
+    etag = headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        headers["ETag"] = "W/" + etag
+
+
+class CompressionMiddleware:
+    """
+    Compress responses with brotli or gzip above a minimum size.
+
+    Plain ASGI middleware, so streaming responses stay streaming: a body
+    sent in several messages is encoded incrementally, without
+    ``Content-Length``, and flushed after every message.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        await _CompressedSend(self.app, encoding, self.minimum_size)(scope, receive, send)
+
+
+class _CompressedSend:
+    """State of one response passing through ``CompressionMiddleware``"""
+
+    def __init__(self, app: ASGIApp, encoding: str, minimum_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start: Optional[Message] = None
+        self.compressor: Optional[Compressor] = None
+        self.passthrough = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Held back until the first body message shows how large the body is
+            self.start = message
+            self.passthrough = not is_compressible(Headers(raw=message["headers"]))
+            return
+
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.passthrough:
+            await self._send_start()
+            await self.send(message)
+            return
+
+        if self.compressor is None:
+            if not more_body and len(body) < self.minimum_size:
+                self.passthrough = True
+                await self._send_start()
+                await self.send(message)
+                return
+
+            self.compressor = Compressor(self.encoding)
+            headers = MutableHeaders(raw=self.start["headers"])
+            mark_encoded(headers, self.encoding)
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                body = self.compressor.finish(body)
+                headers["Content-Length"] = str(len(body))
+                await self._send_start()
+                await self.send({"type": "http.response.body", "body": body})
+                return
+            await self._send_start()
+
+        if more_body:
+            chunk = self.compressor.compress(body, flush=True)
+        else:
+            chunk = self.compressor.finish(body)
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    async def _send_start(self) -> None:
+        if self.start is not None:
+            start, self.start = self.start, None
+            await self.send(start)
+
+
+def precompressed_response(request: Request, response: Response, content: Any, key: str) -> Any:
+    """
+    ``json_response`` for a hot cached page, served from a cached compressed body.
+
+    ``key`` must identify the page's representation (its ETag); the
+    encoded body is stored in ``encoded_bodies`` under that key and the
+    negotiated coding, so a changed page is compressed afresh and the old
+    body ages out through the LRU. Falls back to
+    ``json_response`` (and the middleware) when compression or fast JSON
+    is off, the client accepts no supported coding, or the page is below
+    the size threshold.
+    """
+    encoding = negotiate(request.headers.get("accept-encoding"))
+    if not (
+        settings.COMPRESSION_ENABLED and settings.COMPRESSION_PRECOMPRESS_CATALOG
+        and settings.FAST_JSON_RESPONSES and encoding
+    ):
+        return json_response(content, response=response)
+
+    cache_key = f"encoded:{encoding}:{key}"
+    body = encoded_bodies.get(cache_key)
+    if body is None:
+        raw = orjson.dumps(content)
+        if len(raw) < settings.COMPRESSION_MIN_SIZE:
+            return json_response(content, response=response)
+        level = PRECOMPRESSED_BROTLI_QUALITY if encoding == "br" else PRECOMPRESSED_GZIP_LEVEL
+        body = encoded_bodies.set(cache_key, compress(raw, encoding, level))
+
+    result = carry_headers(Response(body, media_type="application/json"), response)
+    mark_encoded(result.headers, encoding)
+    return result
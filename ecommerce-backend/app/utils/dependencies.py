@@ -1,8 +1,11 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from typing import Optional
 
-from app.database.connection import get_db
+from app.cache.principal_cache import principal_cache
+from app.database.connection import get_db, get_async_db
 from app.models.user import User
 from app.utils.auth import verify_token
 
@@ -10,6 +13,25 @@ from app.utils.auth import verify_token
 security = HTTPBearer()
 
 
+def resolve_user(db: Session, username: str) -> Optional[User]:
+    """
+    Look up the user behind a token subject.
+    
+    Served from the short-TTL principal cache when possible, so most
+    authenticated requests need no database round trip for this.
+    """
+    
+    user = principal_cache.get(username)
+    if user is not None:
+        return user
+    
+    user = db.query(User).filter(User.username == username).first()
+    if user is not None:
+        principal_cache.set(user)
+    
+    return user
+
+
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
@@ -43,8 +65,8 @@ def get_current_user(
     if username is None:
         raise credentials_exception
     
-    # Query the user from database
-    user = db.query(User).filter(User.username == username).first()
+    # Resolve the user (cached) from the database
+    user = resolve_user(db, username)
     
     if user is None:
         raise credentials_exception
@@ -56,4 +78,68 @@ def get_current_user(
             detail="Inactive user"
         )
     
-    return user
\ No newline at end of file
+    return user
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """
+    Asyncio twin of ``get_current_user`` for the async routers.
+    
+    Raises:
+        HTTPException: If token is invalid or user not found
+    """
+    
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    
+    username = verify_token(credentials.credentials)
+    
+    if username is None:
+        raise credentials_exception
+    
+    user = await db.run_sync(resolve_user, username)
+    
+    if user is None:
+        raise credentials_exception
+    
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Inactive user"
+        )
+    
+    return user
+
+
+def get_current_admin(current_user: User = Depends(get_current_user)) -> User:
+    """
+    Dependency restricting an endpoint to admins (store-wide reports).
+    
+    Raises:
+        HTTPException: If the authenticated user is not an admin
+    """
+    
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required"
+        )
+    
+    return current_user
+
+
+async def get_current_admin_async(current_user: User = Depends(get_current_user_async)) -> User:
+    """Asyncio twin of ``get_current_admin``"""
+    
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required"
+        )
+    
+    return current_user
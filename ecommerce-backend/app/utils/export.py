@@ -0,0 +1,113 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Iterator, Literal, Sequence
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+ExportFormat = Literal["ndjson", "csv"]
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def serialize_rows(
+    names: Sequence[str],
+    rows: Sequence[Sequence[Any]],
+    export_format: str,
+    header: bool = False,
+    raw_json: Sequence[str] = ()
+) -> str:
+    """
+    Serialize a batch of result tuples as NDJSON lines or CSV records.
+
+    Columns named in ``raw_json`` already hold JSON text (selected with a
+    cast to text), which is spliced into NDJSON objects as is instead of
+    being decoded and re-encoded. In CSV they stay JSON text.
+    """
+    if export_format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        if header:
+            writer.writerow(names)
+        writer.writerows(
+            [value.isoformat() if isinstance(value, datetime) else value for value in row]
+            for row in rows
+        )
+        return buffer.getvalue()
+
+    raw = [names.index(name) for name in raw_json]
+    plain = [index for index in range(len(names)) if index not in raw]
+    lines = []
+    for row in rows:
+        line = json.dumps({names[i]: row[i] for i in plain}, default=_json_default, separators=(",", ":"))
+        if raw:
+            line = line[:-1] + "".join(
+                f',"{names[i]}":{"null" if row[i] is None else row[i]}' for i in raw
+            ) + "}"
+        lines.append(line + "\n")
+    return "".join(lines)
+
+
+def stream_rows(
+    db: Session,
+    statement: Select,
+    export_format: str,
+    batch_size: int,
+    raw_json: Sequence[str] = ()
+) -> Iterator[str]:
+    """
+    Stream a query's rows from a server-side cursor, one batch at a time.
+
+    Runs on its own session over ``db``'s connection target, so the
+    stream does not depend on the request session staying open.
+    """
+    with Session(bind=db.get_bind()) as session:
+        result = session.execute(statement.execution_options(yield_per=batch_size))
+        names = list(result.keys())
+        header = export_format == "csv"
+        for partition in result.partitions():
+            yield serialize_rows(names, partition, export_format, header, raw_json)
+            header = False
+        if header:
+            yield serialize_rows(names, [], export_format, header)
+
+
+async def stream_rows_async(
+    db: AsyncSession,
+    statement: Select,
+    export_format: str,
+    batch_size: int,
+    raw_json: Sequence[str] = ()
+) -> AsyncIterator[str]:
+    """Asyncio variant of ``stream_rows``, streaming with ``AsyncSession.stream``"""
+    async with AsyncSession(bind=db.bind) as session:
+        result = await session.stream(statement.execution_options(yield_per=batch_size))
+        names = list(result.keys())
+        header = export_format == "csv"
+        async for partition in result.partitions():
+            yield serialize_rows(names, partition, export_format, header, raw_json)
+            header = False
+        if header:
+            yield serialize_rows(names, [], export_format, header)
+
+
+def export_response(chunks, export_format: str, filename: str) -> StreamingResponse:
+    """Streaming download of serialized export chunks"""
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'}
+    )
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
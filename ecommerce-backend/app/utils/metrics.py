@@ -0,0 +1,186 @@
+"""
+Request and database metrics in the Prometheus text format.
+
+``MetricsMiddleware`` times every request and records its status code
+under the matched route template (``/api/products/{product_id}``, never
+the raw path, so label cardinality stays bounded). Statement counts and
+times come from the request's ``RequestQueries`` cell, filled by the
+engine hooks in ``app.utils.profiling``.
+
+Shared counters are only ever updated by the middleware, on the event
+loop thread, so no locks are taken. Database events write to the
+request's own cell, which the middleware folds into the route's totals
+when the response is done. The hot path therefore allocates one small
+cell per request; series and histogram buckets are created once per route.
+
+``render`` produces the ``/metrics`` page, adding pool gauges at scrape
+time.
+"""
+import time
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.profiling import RequestQueries, background, begin_request, end_request, route_label
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; the Prometheus client defaults
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Statements per request; high counts point at N+1 query patterns
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# Cumulative fields of ``pool_status``; the others are gauges
+POOL_COUNTERS = {"checkouts", "timeouts"}
+
+
+class Histogram:
+    """Fixed-bucket histogram; counts are kept per bucket and summed on render"""
+
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        # One slot per bucket plus the +Inf overflow
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def samples(self, name: str, labels: str) -> Iterable[str]:
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        cumulative += self.counts[-1]
+        yield f'{name}_bucket{{{labels},le="+Inf"}} {cumulative}'
+        yield f"{name}_sum{{{labels}}} {self.sum}"
+        yield f"{name}_count{{{labels}}} {cumulative}"
+
+
+class RouteStats:
+    """Series of one (method, route) pair"""
+
+    __slots__ = ("statuses", "latency", "queries", "db_seconds")
+
+    def __init__(self):
+        self.statuses: Dict[int, int] = {}
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.db_seconds = 0.0
+
+
+class Metrics:
+    """Registry behind ``/metrics``"""
+
+    def __init__(self):
+        self.routes: Dict[Tuple[str, str], RouteStats] = {}
+        self.in_flight = 0
+
+    def record(self, method: str, route: str, status_code: int, seconds: float, cell: RequestQueries) -> None:
+        key = (method, route)
+        stats = self.routes.get(key)
+        if stats is None:
+            stats = self.routes[key] = RouteStats()
+        stats.statuses[status_code] = stats.statuses.get(status_code, 0) + 1
+        stats.latency.observe(seconds)
+        stats.queries.observe(cell.count)
+        stats.db_seconds += cell.seconds
+
+    def clear(self) -> None:
+        self.routes.clear()
+
+    def render(self, pools: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+        """The registry (and ``pools``, as returned by ``pool_status``) in the text format"""
+        lines: List[str] = []
+        routes = sorted(self.routes.items())
+
+        def family(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        family("http_requests_total", "counter", "HTTP requests by route and status code.")
+        for (method, route), stats in routes:
+            for status_code, count in sorted(stats.statuses.items()):
+                lines.append(
+                    f'http_requests_total{{method="{method}",route="{_escape(route)}",status="{status_code}"}} {count}'
+                )
+
+        family("http_request_duration_seconds", "histogram", "Time to the last response byte, by route.")
+        for (method, route), stats in routes:
+            lines.extend(stats.latency.samples("http_request_duration_seconds", _route_labels(method, route)))
+
+        family("http_requests_in_flight", "gauge", "Requests currently being served.")
+        lines.append(f"http_requests_in_flight {self.in_flight}")
+
+        family("db_queries_per_request", "histogram", "Database statements executed per request, by route.")
+        for (method, route), stats in routes:
+            lines.extend(stats.queries.samples("db_queries_per_request", _route_labels(method, route)))
+
+        family("db_query_duration_seconds_total", "counter", "Time spent executing statements, by route.")
+        for (method, route), stats in routes:
+            lines.append(f"db_query_duration_seconds_total{{{_route_labels(method, route)}}} {stats.db_seconds}")
+
+        family("db_background_queries_total", "counter", "Statements executed outside any request.")
+        lines.append(f"db_background_queries_total {background.count}")
+        family("db_background_query_duration_seconds_total", "counter", "Time spent on those statements.")
+        lines.append(f"db_background_query_duration_seconds_total {background.seconds}")
+
+        series: Dict[str, List[str]] = {}
+        for pool, status in (pools or {}).items():
+            for name, value in status.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    metric = f"db_pool_{name}_total" if name in POOL_COUNTERS else f"db_pool_{name}"
+                    series.setdefault(metric, []).append(f'{metric}{{pool="{_escape(pool)}"}} {value}')
+        for metric, samples in sorted(series.items()):
+            kind = "counter" if metric.endswith("_total") else "gauge"
+            family(metric, kind, f"Connection pool {metric[len('db_pool_'):].replace('_', ' ')}.")
+            lines.extend(samples)
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _route_labels(method: str, route: str) -> str:
+    return f'method="{method}",route="{_escape(route)}"'
+
+
+class MetricsMiddleware:
+    """Record latency, status and database work of every HTTP request"""
+
+    def __init__(self, app: ASGIApp, registry: "Metrics"):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        registry = self.registry
+        cell, token = begin_request(scope)
+        status_code = 500
+        started = time.perf_counter()
+        registry.in_flight += 1
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            registry.in_flight -= 1
+            registry.record(scope["method"], route_label(scope), status_code, time.perf_counter() - started, cell)
+            end_request(token)
+
+
+metrics = Metrics()
@@ -0,0 +1,106 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence
+
+from fastapi import HTTPException, status
+from sqlalchemy import DateTime, Float, Integer, String, tuple_
+from sqlalchemy.orm import Query
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the sort key of the last row of a page as an opaque cursor"""
+    raw = json.dumps(list(values), default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> Optional[List[Any]]:
+    """
+    Decode a cursor produced by ``encode_cursor``.
+
+    An empty cursor means "first page" and decodes to ``None``.
+
+    Raises:
+        HTTPException: If the cursor is malformed
+    """
+    if not cursor:
+        return None
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        values = None
+
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+    return values
+
+
+def keyset_page(query: Query, columns: Sequence, after: str, limit: int, descending: bool = False):
+    """
+    Fetch one page of ``query`` ordered by ``columns`` after a cursor.
+
+    Seeks with ``WHERE (col1, col2, ...) > (:v1, :v2, ...)`` instead of
+    OFFSET, so the cost of a page does not grow with its depth. With
+    ``descending`` every column is sorted in reverse and the seek uses ``<``.
+
+    Returns:
+        tuple: The rows of the page and the cursor of the next page
+            (``None`` on the last page)
+    """
+    values = decode_cursor(after, len(columns))
+
+    if values is not None:
+        values = [coerce_cursor_value(column, value) for column, value in zip(columns, values)]
+        left = columns[0] if len(columns) == 1 else tuple_(*columns)
+        right = values[0] if len(columns) == 1 else tuple_(*values)
+        query = query.filter(left < right if descending else left > right)
+
+    order = [column.desc() for column in columns] if descending else list(columns)
+    rows = query.order_by(*order).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([getattr(rows[-1], column.key) for column in columns])
+
+    return rows, next_cursor
+
+
+def coerce_cursor_value(column, value: Any) -> Any:
+    """
+    Restore a cursor value to its column's Python type.
+
+    Cursors are JSON, so datetimes come back as strings. Anything that is
+    not of the column's type (a tampered cursor, or one minted for another
+    sort order) is rejected here rather than handed to the driver.
+
+    Raises:
+        HTTPException: If the value does not fit the column
+    """
+    column_type = column.type
+    if value is None and column.nullable:
+        return None
+    if isinstance(column_type, DateTime) and isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            pass
+    elif isinstance(column_type, Integer):
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+    elif isinstance(column_type, Float):
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+    elif isinstance(column_type, String):
+        if isinstance(value, str):
+            return value
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Invalid cursor"
+    )
@@ -0,0 +1,305 @@
+"""
+Per-request SQL profiling.
+
+``instrument_engine`` hooks SQLAlchemy's ``before_cursor_execute`` /
+``after_cursor_execute`` events. Every statement is charged to the
+request that issued it: ``begin_request`` puts a ``RequestQueries`` cell
+(holding the ASGI scope, hence the matched route) in a context variable,
+which also reaches sync endpoints running in the threadpool. Statements
+issued outside any request go to ``background``.
+
+On top of the counts:
+
+* statements slower than ``SLOW_QUERY_THRESHOLD_MS`` are logged to
+  ``app.sql.slow`` with their route and bound-parameter *shape* (names
+  and types, never values);
+* ``ProfilingMiddleware`` can add a ``Server-Timing`` header with the
+  request's database time and statement count (``SERVER_TIMING_ENABLED``);
+* with ``DEBUG`` on, timings are aggregated per normalized statement for
+  ``GET /debug/sql/slowest``.
+"""
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config.settings import settings
+
+logger = logging.getLogger("app.sql.slow")
+
+# Route label of requests that matched no route (404s, probes for random paths)
+UNMATCHED = "<unmatched>"
+# Route label of statements issued outside any request
+BACKGROUND = "<background>"
+
+
+class RequestQueries:
+    """Statement count and time of one request"""
+
+    __slots__ = ("scope", "count", "seconds")
+
+    def __init__(self, scope: Optional[Scope] = None):
+        self.scope = scope
+        self.count = 0
+        self.seconds = 0.0
+
+    @property
+    def route(self) -> str:
+        return route_label(self.scope) if self.scope is not None else BACKGROUND
+
+
+_current_request: ContextVar[Optional[RequestQueries]] = ContextVar("current_request_queries", default=None)
+
+# Statements run outside any request (startup, CLIs, background work);
+# rare, and updated without a lock from whichever thread ran them
+background = RequestQueries()
+
+
+def route_label(scope: Scope) -> str:
+    """Template of the route that handled a request"""
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # Plain Starlette routes (docs, openapi.json) have static paths
+    if "endpoint" in scope:
+        return scope["path"]
+    return UNMATCHED
+
+
+def begin_request(scope: Scope) -> Tuple[RequestQueries, Optional[Any]]:
+    """
+    The query cell of the request ``scope`` belongs to, created on first use.
+
+    Several middlewares may ask for it; only the outermost one creates it
+    and gets a token back to pass to ``end_request``.
+    """
+    cell = _current_request.get()
+    if cell is not None and cell.scope is scope:
+        return cell, None
+    cell = RequestQueries(scope)
+    return cell, _current_request.set(cell)
+
+
+def end_request(token: Optional[Any]) -> None:
+    if token is not None:
+        _current_request.reset(token)
+
+
+# Literals and IN lists are folded so that statements differing only in
+# values (or list lengths) aggregate together
+_NORMALIZE = (
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"%\(\w+\)s|(?<!:):\w+|\$\d+|%s"), "?"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(...)"),
+    (re.compile(r"\s+"), " "),
+)
+
+
+@lru_cache(maxsize=2048)
+def normalize_statement(statement: str) -> str:
+    """Statement text with literals, placeholders and IN lists folded"""
+    for pattern, replacement in _NORMALIZE:
+        statement = pattern.sub(replacement, statement)
+    return statement.strip()
+
+
+def parameter_shape(parameters: Any, executemany: bool = False) -> str:
+    """Names and types of bound parameters, without their values"""
+    if executemany:
+        rows = list(parameters) if parameters is not None else []
+        return f"{len(rows)} x {parameter_shape(rows[0]) if rows else '()'}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{name}: {type(value).__name__}" for name, value in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+    return "()" if parameters is None else type(parameters).__name__
+
+
+class StatementStats:
+    """Timings per normalized statement, for finding the slowest ones"""
+
+    def __init__(self, max_statements: int):
+        self.max_statements = max_statements
+        self.dropped = 0
+        self._entries: Dict[str, List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, seconds: float, route: str) -> None:
+        key = normalize_statement(statement)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if len(self._entries) >= self.max_statements:
+                    self.dropped += 1
+                    return
+                # calls, total seconds, max seconds, routes
+                entry = self._entries[key] = [0, 0.0, 0.0, set()]
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+            entry[3].add(route)
+
+    def slowest(self, limit: int, by: str = "total") -> List[Dict[str, Any]]:
+        """Top ``limit`` statements by total, max or mean time"""
+        with self._lock:
+            rows = [
+                {
+                    "statement": statement,
+                    "calls": calls,
+                    "total_ms": round(total * 1000, 3),
+                    "mean_ms": round(total / calls * 1000, 3),
+                    "max_ms": round(worst * 1000, 3),
+                    "routes": sorted(routes),
+                }
+                for statement, (calls, total, worst, routes) in self._entries.items()
+            ]
+        rows.sort(key=lambda row: row[f"{by}_ms"], reverse=True)
+        return rows[:limit]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.dropped = 0
+
+
+statement_stats = StatementStats(settings.SQL_PROFILE_MAX_STATEMENTS)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    context._profile_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - context._profile_started
+    cell = _current_request.get() or background
+    cell.count += 1
+    cell.seconds += elapsed
+
+    if settings.SLOW_QUERY_LOG_ENABLED and elapsed * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+        logger.warning(
+            "slow query %.1f ms route=%s params=%s: %s",
+            elapsed * 1000, cell.route, parameter_shape(parameters, executemany), normalize_statement(statement)
+        )
+    if settings.DEBUG:
+        statement_stats.record(statement, elapsed, cell.route)
+
+
+_LISTENERS: Tuple[Tuple[str, Callable], ...] = (
+    ("before_cursor_execute", _before_cursor_execute),
+    ("after_cursor_execute", _after_cursor_execute),
+)
+
+
+def instrument_engine(engine) -> None:
+    """Count and time the statements an engine (sync or async) executes"""
+    engine = getattr(engine, "sync_engine", engine)
+    for name, listener in _LISTENERS:
+        if not event.contains(engine, name, listener):
+            event.listen(engine, name, listener)
+
+
+def uninstrument_engine(engine) -> None:
+    engine = getattr(engine, "sync_engine", engine)
+    for name, listener in _LISTENERS:
+        if event.contains(engine, name, listener):
+            event.remove(engine, name, listener)
+
+
+class CapturedQueries:
+    """Statements executed inside a ``capture_queries`` block, in order"""
+
+    def __init__(self):
+        # (statement, parameter shape) pairs
+        self.queries: List[Tuple[str, str]] = []
+
+    def __len__(self) -> int:
+        return len(self.queries)
+
+    @property
+    def statements(self) -> List[str]:
+        return [statement for statement, _ in self.queries]
+
+    def report(self) -> str:
+        """Numbered listing of the statements, for assertion messages"""
+        return "\n".join(
+            f"{number:3}. {normalize_statement(statement)}  -- params {shape}"
+            for number, (statement, shape) in enumerate(self.queries, 1)
+        )
+
+
+@contextmanager
+def capture_queries(engine) -> Iterator[CapturedQueries]:
+    """
+    Record every statement ``engine`` executes inside the block.
+
+    Covers all threads (sync handlers run in the threadpool), so only use
+    it where nothing else shares the engine.
+    """
+    engine = getattr(engine, "sync_engine", engine)
+    captured = CapturedQueries()
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        captured.queries.append((statement, parameter_shape(parameters, executemany)))
+
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        yield captured
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+
+def server_timing(cell: RequestQueries, elapsed: float) -> str:
+    """``Server-Timing`` value: database time and statement count, and total time so far"""
+    return (
+        f'db;dur={cell.seconds * 1000:.1f};desc="{cell.count} queries", '
+        f"app;dur={elapsed * 1000:.1f}"
+    )
+
+
+class ProfilingMiddleware:
+    """
+    Track the statements of every HTTP request.
+
+    With ``SERVER_TIMING_ENABLED`` the response gets a ``Server-Timing``
+    header. It is written with the response headers, so a streaming
+    response's header covers the work done before its first chunk.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        cell, token = begin_request(scope)
+        if not settings.SERVER_TIMING_ENABLED:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                end_request(token)
+            return
+
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append(
+                    "Server-Timing", server_timing(cell, time.perf_counter() - started)
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            end_request(token)
@@ -0,0 +1,67 @@
+from typing import Any, Dict, Iterable, Optional
+
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+
+from app.config.settings import settings
+
+# Default response class of the app: orjson unless fast JSON is switched off
+DefaultJSONResponse = ORJSONResponse if settings.FAST_JSON_RESPONSES else JSONResponse
+
+# Sub-response headers not to copy onto the final response
+_BODY_HEADERS = {b"content-length", b"content-type"}
+
+
+def loaded_attributes(obj: Any, fields: Iterable[str]) -> Dict[str, Any]:
+    """
+    Read ``fields`` of an ORM object into a dict.
+
+    Loaded values are taken from the instance state directly, skipping
+    the instrumented attribute lookup; expired or unloaded attributes
+    fall back to a normal (loading) ``getattr``.
+    """
+    state = obj.__dict__
+    return {field: state[field] if field in state else getattr(obj, field) for field in fields}
+
+
+def json_response(
+    content: Any,
+    adapter: Optional[TypeAdapter] = None,
+    status_code: int = 200,
+    response: Optional[Response] = None
+) -> Any:
+    """
+    Encode an endpoint result in one pass, bypassing ``response_model``.
+
+    Without ``adapter`` the content must already be in the response
+    schema's shape, with values orjson can encode (e.g. the product dicts
+    stored in the cache, or ``serialize_order`` output); it is written by
+    orjson as is. With ``adapter`` the content
+    (ORM objects) is validated from attributes and dumped straight to
+    bytes by pydantic-core, instead of being validated, converted to
+    Python primitives by ``jsonable_encoder`` and then encoded again.
+
+    Headers set on the injected ``response`` are carried over. With
+    ``FAST_JSON_RESPONSES`` off the content is returned unchanged, for
+    FastAPI to process through ``response_model``.
+    """
+    if not settings.FAST_JSON_RESPONSES:
+        return content
+
+    if adapter is None:
+        body = orjson.dumps(content)
+    else:
+        body = adapter.dump_json(adapter.validate_python(content, from_attributes=True))
+
+    return carry_headers(Response(body, status_code=status_code, media_type="application/json"), response)
+
+
+def carry_headers(result: Response, response: Optional[Response]) -> Response:
+    """Copy headers set on an injected ``response`` (validators etc.) onto ``result``"""
+    if response is not None:
+        result.raw_headers.extend(
+            (name, value) for name, value in response.raw_headers if name not in _BODY_HEADERS
+        )
+    return result
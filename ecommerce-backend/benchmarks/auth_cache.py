@@ -0,0 +1,45 @@
+"""
+Measure authenticated ``GET /api/orders/`` throughput with and without
+the principal cache.
+
+Every authenticated request resolves its user in ``get_current_user``;
+this compares doing that with a database lookup per request against the
+short-TTL principal cache.
+
+Usage:
+    python -m benchmarks.auth_cache --requests 2000
+"""
+import argparse
+import json
+
+from benchmarks.common import app_client, make_engine, register_and_login, summarize, time_calls
+from app.cache.principal_cache import principal_cache
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--database-url", default="sqlite:///./benchmark_auth.db")
+    args = parser.parse_args()
+
+    engine = make_engine(args.database_url)
+    results = {}
+    with app_client(engine) as client:
+        headers = register_and_login(client)
+
+        def call():
+            response = client.get("/api/orders/", headers=headers)
+            assert response.status_code == 200, response.text
+
+        for label, enabled in (("before", False), ("after", True)):
+            principal_cache.enabled = enabled
+            principal_cache.clear()
+            time_calls(call, 50)  # warm up
+            results[label] = summarize(time_calls(call, args.requests))
+            results[label]["principal_cache"] = principal_cache.stats()
+
+    print(json.dumps({"benchmark": "auth_cache", "requests": args.requests, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Shared helpers for the benchmark scripts."""
+import os
+import statistics
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./benchmark.db")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database.connection import Base, get_db
+from app.main import app
+
+
+def make_engine(database_url: str):
+    """Create an engine and a fresh schema for a benchmark run"""
+    connect_args = {"check_same_thread": False} if database_url.startswith("sqlite") else {}
+    engine = create_engine(database_url, connect_args=connect_args)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+@contextmanager
+def bind_database(engine):
+    """Point the app's ``get_db`` dependency at ``engine`` for the duration"""
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        yield
+    finally:
+        app.dependency_overrides.clear()
+
+
+@contextmanager
+def app_client(engine):
+    """Yield a TestClient whose ``get_db`` is bound to ``engine``"""
+    with bind_database(engine), TestClient(app) as client:
+        yield client
+
+
+def register_and_login(client: TestClient, username: str = "bench", password: str = "benchpassword") -> Dict[str, str]:
+    """Create a user through the API and return its auth headers"""
+    client.post("/api/auth/register", json={
+        "email": f"{username}@example.com",
+        "username": username,
+        "password": password,
+    })
+    response = client.post("/api/auth/login", data={"username": username, "password": password})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def time_calls(call: Callable[[], object], repeat: int) -> List[float]:
+    """Run ``call`` ``repeat`` times and return each latency in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def summarize(timings: List[float]) -> Dict[str, float]:
+    """Median, p95 and requests per second of a list of latencies"""
+    ordered = sorted(timings)
+    return {
+        "p50_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(ordered[int(len(ordered) * 0.95) - 1], 3),
+        "rps": round(len(ordered) / (sum(ordered) / 1000), 1),
+    }
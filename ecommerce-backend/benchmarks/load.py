@@ -0,0 +1,328 @@
+"""
+Drive the API with a mixed read/checkout workload and report latency and throughput.
+
+Virtual users pick operations by weight (browse the catalog, open a
+product, search, list their orders, check out) and issue them back to
+back for ``--duration`` seconds after a warmup. By default every worker
+process runs the real ASGI app in-process through httpx's ASGITransport
+against the database the seeder filled; ``--url`` points the workers at a
+running server instead (e.g. uvicorn with several workers).
+
+Requests per second, p50/p95/p99 latency and database statements per
+request are reported as JSON, overall and per operation, together with
+the commit they were measured on, so runs can be compared across commits.
+Statement counts come from each response's ``Server-Timing`` header; an
+external server has to run with ``SERVER_TIMING_ENABLED=true`` (and the
+same ``SECRET_KEY``, since tokens are minted locally) for them to show up.
+
+Usage:
+    python -m benchmarks.seed --scale 100000
+    python -m benchmarks.load --duration 30 --concurrency 32
+    python -m benchmarks.load --workers 4 --mix browse=40,checkout=60 --output load.json
+    python -m benchmarks.load --url http://localhost:8000 --workers 4
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import re
+import statistics
+import subprocess
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import create_engine, text
+
+# Relative share of each operation in the request mix
+MIX = {
+    "browse": 60,
+    "product": 20,
+    "search": 8,
+    "orders": 7,
+    "checkout": 5,
+}
+
+SEARCH_TERMS = ["widget", "lamp", "kettle", "chair", "speaker", "jacket", "wireless", "steel", "compact"]
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+BASE_URL = "http://benchmark"
+
+Request = Tuple[str, str, Dict[str, Any]]
+
+
+def browse(rng: random.Random, dataset: Dict[str, int], headers: Dict[str, str]) -> Request:
+    # Shoppers mostly stay on the first pages, sometimes inside a category
+    params: Dict[str, Any] = {"skip": min(int(rng.expovariate(0.3)), 49) * 20, "limit": 20}
+    if rng.random() < 0.3:
+        params["category"] = f"Category {rng.randrange(50)}"
+    return "GET", "/api/products/", {"params": params}
+
+
+def product(rng: random.Random, dataset: Dict[str, int], headers: Dict[str, str]) -> Request:
+    return "GET", f"/api/products/{rng.randint(1, dataset['products'])}", {}
+
+
+def search(rng: random.Random, dataset: Dict[str, int], headers: Dict[str, str]) -> Request:
+    return "GET", "/api/products/search", {"params": {"q": rng.choice(SEARCH_TERMS)}}
+
+
+def orders(rng: random.Random, dataset: Dict[str, int], headers: Dict[str, str]) -> Request:
+    return "GET", "/api/orders/", {"params": {"limit": 20}, "headers": headers}
+
+
+def checkout(rng: random.Random, dataset: Dict[str, int], headers: Dict[str, str]) -> Request:
+    lines = min(rng.randint(1, 3), dataset["products"])
+    return "POST", "/api/orders/", {
+        "json": {
+            "items": [
+                # The server prices lines from the catalog; name and price are required but not trusted
+                {"product_id": product_id, "name": f"Product {product_id}", "price": 1.0, "quantity": 1}
+                for product_id in rng.sample(range(1, dataset["products"] + 1), lines)
+            ],
+            "shipping_address": "1 Benchmark Street, Test City",
+        },
+        "headers": headers,
+    }
+
+
+OPERATIONS: Dict[str, Callable[[random.Random, Dict[str, int], Dict[str, str]], Request]] = {
+    "browse": browse,
+    "product": product,
+    "search": search,
+    "orders": orders,
+    "checkout": checkout,
+}
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    """``browse=60,checkout=40`` -> weights; operations left out are not run"""
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"unknown operation {name!r} (choose from {', '.join(OPERATIONS)})")
+        mix[name] = int(weight)
+    if not any(weight > 0 for weight in mix.values()):
+        raise argparse.ArgumentTypeError("the mix needs at least one positive weight")
+    return mix
+
+
+def dataset_size(database_url: str) -> Dict[str, int]:
+    """Row counts of a seeded database (the seeder hands out consecutive ids)"""
+    engine = create_engine(database_url)
+    try:
+        with engine.connect() as conn:
+            return {
+                name: conn.execute(text(f"SELECT COUNT(*) FROM {name}")).scalar()
+                for name in ("users", "products", "orders")
+            }
+    finally:
+        engine.dispose()
+
+
+def current_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Recorder:
+    """Latencies, errors and statement counts of one worker, per operation"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.queries: Dict[str, List[int]] = {}
+
+    def record(self, operation: str, milliseconds: float, ok: bool, queries: Optional[int]) -> None:
+        self.latencies.setdefault(operation, []).append(milliseconds)
+        if not ok:
+            self.errors[operation] = self.errors.get(operation, 0) + 1
+        if queries is not None:
+            self.queries.setdefault(operation, []).append(queries)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"latencies": self.latencies, "errors": self.errors, "queries": self.queries}
+
+
+async def virtual_user(client, rng: random.Random, config: Dict[str, Any], token: str,
+                       deadline: float, recorder: Recorder) -> None:
+    import httpx
+
+    names = list(config["mix"])
+    weights = list(config["mix"].values())
+    headers = {"Authorization": f"Bearer {token}"}
+    while time.perf_counter() < deadline:
+        operation = rng.choices(names, weights)[0]
+        method, path, kwargs = OPERATIONS[operation](rng, config["dataset"], headers)
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, path, **kwargs)
+            await response.aread()
+        except httpx.HTTPError:
+            recorder.record(operation, (time.perf_counter() - started) * 1000, False, None)
+            continue
+        elapsed = (time.perf_counter() - started) * 1000
+        match = SERVER_TIMING_QUERIES.search(response.headers.get("server-timing", ""))
+        recorder.record(operation, elapsed, response.status_code < 400, int(match.group(1)) if match else None)
+
+
+async def drive(config: Dict[str, Any]) -> Dict[str, Any]:
+    import httpx
+    from app.utils.auth import create_access_token
+
+    async_engine = None
+    if config["url"]:
+        client = httpx.AsyncClient(base_url=config["url"], timeout=30)
+    else:
+        from app.database.connection import async_engine, engine
+        from app.main import app
+        from app.utils.profiling import instrument_engine
+
+        # ASGITransport sends no lifespan events, so do what startup would
+        instrument_engine(engine)
+        if async_engine is not None:
+            instrument_engine(async_engine)
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url=BASE_URL, timeout=30)
+
+    rng = random.Random(config["seed"])
+    users = config["dataset"]["users"]
+    tokens = [
+        create_access_token({"sub": f"user{rng.randrange(users)}"})
+        for _ in range(config["concurrency"])
+    ]
+
+    try:
+        async with client:
+            for seconds in (config["warmup"], config["duration"]):
+                # The warmup's recorder is thrown away
+                recorder = Recorder()
+                deadline = time.perf_counter() + seconds
+                await asyncio.gather(*(
+                    virtual_user(client, random.Random(rng.random()), config, token, deadline, recorder)
+                    for token in tokens
+                ))
+    finally:
+        if async_engine is not None:
+            # aiosqlite connections run on threads that would keep the process alive
+            await async_engine.dispose()
+    return recorder.as_dict()
+
+
+def run_worker(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Entry point of a worker process: configure the app, then drive it"""
+    os.environ["DATABASE_URL"] = config["database_url"]
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ["SERVER_TIMING_ENABLED"] = "true"
+    if config["async"]:
+        os.environ["DATABASE_ASYNC"] = "true"
+    return asyncio.run(drive(config))
+
+
+def percentile_summary(latencies: List[float], errors: int, queries: List[int], duration: float) -> Dict[str, Any]:
+    if len(latencies) > 1:
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    else:
+        p50 = p95 = p99 = latencies[0] if latencies else 0.0
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / duration, 1),
+        "p50_ms": round(p50, 3),
+        "p95_ms": round(p95, 3),
+        "p99_ms": round(p99, 3),
+        "queries_per_request": round(statistics.fmean(queries), 2) if queries else None,
+    }
+
+
+def merge(results: List[Dict[str, Any]], duration: float) -> Dict[str, Any]:
+    """Combine worker results into overall and per-operation summaries"""
+    combined: Dict[str, Dict[str, Any]] = {}
+    for result in results:
+        for operation, latencies in result["latencies"].items():
+            entry = combined.setdefault(operation, {"latencies": [], "errors": 0, "queries": []})
+            entry["latencies"].extend(latencies)
+            entry["errors"] += result["errors"].get(operation, 0)
+            entry["queries"].extend(result["queries"].get(operation, []))
+
+    summary = {
+        "all": percentile_summary(
+            [value for entry in combined.values() for value in entry["latencies"]],
+            sum(entry["errors"] for entry in combined.values()),
+            [value for entry in combined.values() for value in entry["queries"]],
+            duration
+        )
+    }
+    for operation in sorted(combined):
+        entry = combined[operation]
+        summary[operation] = percentile_summary(entry["latencies"], entry["errors"], entry["queries"], duration)
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default="sqlite:///./benchmark_load.db",
+                        help="Database filled by benchmarks.seed (also read for the dataset size)")
+    parser.add_argument("--url", help="Base URL of a running server; in-process ASGI app when omitted")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="In-process: serve the asyncio routers (DATABASE_ASYNC)")
+    parser.add_argument("--workers", type=int, default=1, help="Client processes")
+    parser.add_argument("--concurrency", type=int, default=16, help="Virtual users per worker")
+    parser.add_argument("--duration", type=float, default=20.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Unmeasured seconds before that")
+    parser.add_argument("--mix", type=parse_mix, default=MIX, help="Operation weights, e.g. browse=60,checkout=40")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    dataset = dataset_size(args.database_url)
+    if not dataset["users"] or not dataset["products"]:
+        parser.error(f"{args.database_url} has no users or products; run benchmarks.seed first")
+
+    configs = [
+        {
+            "database_url": args.database_url,
+            "url": args.url,
+            "async": args.use_async,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "mix": args.mix,
+            "dataset": dataset,
+            "seed": index,
+        }
+        for index in range(args.workers)
+    ]
+    if args.workers == 1:
+        results = [run_worker(configs[0])]
+    else:
+        # spawn: every worker imports the app afresh with its own engine and pools
+        with multiprocessing.get_context("spawn").Pool(args.workers) as pool:
+            results = pool.map(run_worker, configs)
+
+    report = {
+        "benchmark": "load",
+        "commit": current_commit(),
+        "target": args.url or ("asgi-async" if args.use_async else "asgi"),
+        "backend": args.database_url.split(":", 1)[0],
+        "dataset": dataset,
+        "workers": args.workers,
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "mix": args.mix,
+        "results": merge(results, args.duration),
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Check that catalog latency stays flat during a login flood.
+
+Drives the real app in-process with ``httpx.AsyncClient``: first measures
+``GET /api/products/`` alone, then again while many concurrent clients
+hammer ``POST /api/auth/login``. With bcrypt on its own bounded pool the
+catalog's threadpool is never starved; excess logins are shed with 503.
+
+Usage:
+    python -m benchmarks.login_flood --flood 64 --requests 200
+    python -m benchmarks.login_flood --threads   # hash on threads instead of processes
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from benchmarks.common import bind_database, make_engine, summarize
+from app.cache.product_cache import product_cache
+from app.main import app
+from app.models.product import Product
+from app.utils.auth import password_hasher
+
+
+async def catalog_latencies(client: httpx.AsyncClient, requests: int):
+    """Sequential catalog reads, returning each latency in milliseconds"""
+    timings = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = await client.get("/api/products/")
+        timings.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.text
+    return timings
+
+
+async def login_loop(client: httpx.AsyncClient, stop: asyncio.Event, outcomes: dict):
+    """Log in repeatedly until told to stop, counting status codes"""
+    while not stop.is_set():
+        response = await client.post(
+            "/api/auth/login",
+            data={"username": "flood", "password": "floodpassword"}
+        )
+        outcomes[response.status_code] = outcomes.get(response.status_code, 0) + 1
+        if response.status_code == 503:
+            # Shed clients back off briefly, as a real client honouring Retry-After would
+            await asyncio.sleep(0.05)
+
+
+async def run(args) -> dict:
+    engine = make_engine(args.database_url)
+    with engine.begin() as conn:
+        conn.execute(Product.__table__.insert(), [
+            {"name": f"Product {index}", "price": 10.0, "stock": 10, "category": "Bench"}
+            for index in range(100)
+        ])
+
+    # Every catalog request should reach the database
+    product_cache.enabled = False
+    password_hasher.use_processes = not args.threads
+
+    with bind_database(engine):
+        async with httpx.AsyncClient(app=app, base_url="http://benchmark") as client:
+            await client.post("/api/auth/register", json={
+                "email": "flood@example.com",
+                "username": "flood",
+                "password": "floodpassword"
+            })
+
+            baseline = await catalog_latencies(client, args.requests)
+
+            stop = asyncio.Event()
+            outcomes: dict = {}
+            flood = [
+                asyncio.create_task(login_loop(client, stop, outcomes))
+                for _ in range(args.flood)
+            ]
+            await asyncio.sleep(0.5)
+            during = await catalog_latencies(client, args.requests)
+            stop.set()
+            await asyncio.gather(*flood)
+
+    password_hasher.shutdown()
+    return {
+        "benchmark": "login_flood",
+        "executor": "threads" if args.threads else "processes",
+        "flood_concurrency": args.flood,
+        "catalog_baseline": summarize(baseline),
+        "catalog_during_flood": summarize(during),
+        "login_status_counts": outcomes,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--flood", type=int, default=64, help="concurrent login clients")
+    parser.add_argument("--requests", type=int, default=200, help="catalog requests per phase")
+    parser.add_argument("--threads", action="store_true", help="hash on a thread pool")
+    parser.add_argument("--database-url", default="sqlite:///./benchmark_login_flood.db")
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Compare peak memory of streaming and materialized order history exports.
+
+Seeds one account with a growing number of orders and, at each size,
+drains ``export_orders`` (server-side cursor, rows serialized from
+tuples) and, for comparison, builds the same history the way
+``GET /api/orders/`` does (ORM objects validated through
+``OrderResponse``). Peak Python heap is measured with tracemalloc around
+each run, so the numbers cover the server side only; the TestClient
+buffers whole responses and would hide the difference.
+
+Usage:
+    python -m benchmarks.order_export --sizes 10000 50000 100000
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from datetime import datetime
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from benchmarks.common import make_engine
+from app.database.backfill import backfill_order_items
+from app.models.order import Order
+from app.models.user import User
+from app.schemas.order import OrderResponse
+from app.services import orders as order_service
+
+
+def seed(engine, user_id: int, start: int, stop: int, batch: int = 10000) -> None:
+    """Insert orders ``start`` to ``stop`` for ``user_id`` in large batches"""
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        for first in range(start, stop, batch):
+            conn.execute(insert(Order), [
+                {
+                    "user_id": user_id,
+                    "total_amount": 10.0 + index % 90,
+                    "status": "completed",
+                    "shipping_address": f"{index} Benchmark Street, Test City",
+                    "items": [
+                        {"product_id": 1 + index % 500, "name": f"Product {index % 500}", "quantity": 2, "price": 5.0},
+                        {"product_id": 2 + index % 500, "name": f"Product {1 + index % 500}", "quantity": 1, "price": 9.5},
+                    ],
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for index in range(first, min(first + batch, stop))
+            ])
+    # Line items go to order_items the same way legacy orders are migrated
+    backfill_order_items(engine, batch)
+
+
+def measure(run) -> dict:
+    """Peak traced heap (MiB), wall time and output size of ``run()``"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = run()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"peak_mb": round(peak / 2 ** 20, 1), "seconds": round(elapsed, 2), "bytes": size}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000, 100000])
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument("--skip-materialized", action="store_true", help="Only measure the streaming export")
+    parser.add_argument("--database-url", default="sqlite:///./benchmark_order_export.db")
+    args = parser.parse_args()
+
+    engine = make_engine(args.database_url)
+    with Session(engine) as db:
+        user = User(email="b2b@example.com", username="b2b", hashed_password="x")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+
+    report = {"benchmark": "order_export", "format": args.format, "backend": engine.dialect.name, "results": []}
+    seeded = 0
+    for size in sorted(args.sizes):
+        seed(engine, user_id, seeded, size)
+        seeded = size
+
+        with Session(engine) as db:
+            user = db.get(User, user_id)
+
+            def streamed():
+                return sum(len(chunk) for chunk in order_service.export_orders(db, user, args.format))
+
+            def materialized():
+                orders = order_service.list_orders(db, user, 0, size, None)
+                body = json.dumps([OrderResponse.model_validate(order).model_dump(mode="json") for order in orders])
+                db.expunge_all()
+                return len(body)
+
+            result = {"orders": size, "streamed": measure(streamed)}
+            if not args.skip_materialized:
+                result["materialized"] = measure(materialized)
+            report["results"].append(result)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
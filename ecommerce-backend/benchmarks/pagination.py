@@ -0,0 +1,77 @@
+"""
+Compare deep-page latency of offset and keyset pagination.
+
+Seeds a throwaway SQLite catalog and requests ``GET /api/products/`` at
+increasing depths through the real app, once with ``skip`` and once with
+the ``after`` cursor pointing at the same position.
+
+Usage:
+    python -m benchmarks.pagination --rows 200000 --depths 0 10000 100000
+"""
+import argparse
+import json
+import statistics
+
+from sqlalchemy import insert
+
+from benchmarks.common import app_client, make_engine, time_calls
+from app.cache.product_cache import product_cache
+from app.models.product import Product
+from app.utils.pagination import encode_cursor
+
+
+def seed(engine, rows: int, batch: int = 10000) -> None:
+    """Insert ``rows`` synthetic products in large batches"""
+    with engine.begin() as conn:
+        for start in range(0, rows, batch):
+            conn.execute(insert(Product), [
+                {
+                    "name": f"Product {index}",
+                    "description": "Synthetic benchmark product",
+                    "price": 1.0 + index % 500,
+                    "stock": index % 100,
+                    "category": f"Category {index % 50}",
+                }
+                for index in range(start, min(start + batch, rows))
+            ])
+
+
+def measure(client, params: dict, repeat: int) -> float:
+    """Return the median latency in milliseconds of one listing request"""
+    def call():
+        response = client.get("/api/products/", params=params)
+        assert response.status_code == 200, response.text
+    return statistics.median(time_calls(call, repeat))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--depths", type=int, nargs="+", default=[0, 1000, 10000, 50000, 90000])
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--database-url", default="sqlite:///./benchmark_pagination.db")
+    args = parser.parse_args()
+
+    engine = make_engine(args.database_url)
+    seed(engine, args.rows)
+
+    # Measure the database, not the response cache
+    product_cache.enabled = False
+
+    results = []
+    with app_client(engine) as client:
+        for depth in args.depths:
+            # Product ids start at 1, so the row at offset N has id N
+            after = encode_cursor([depth]) if depth else ""
+            results.append({
+                "depth": depth,
+                "offset_ms": round(measure(client, {"skip": depth, "limit": args.limit}, args.repeat), 3),
+                "keyset_ms": round(measure(client, {"after": after, "limit": args.limit}, args.repeat), 3),
+            })
+
+    print(json.dumps({"benchmark": "pagination", "rows": args.rows, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Measure product search latency over a large synthetic catalog.
+
+Seeds products whose names and descriptions are drawn from a fixed
+vocabulary, then times ``GET /api/products/search`` for full-word,
+prefix, multi-word and rare queries. On SQLite the first request builds
+the in-process index; its build time and memory are reported separately.
+Against PostgreSQL the GIN index is created with the schema.
+
+Usage:
+    python -m benchmarks.search --rows 1000000
+    python -m benchmarks.search --rows 1000000 --database-url postgresql://...
+"""
+import argparse
+import json
+import random
+import resource
+import time
+
+from sqlalchemy import insert
+
+from benchmarks.common import app_client, make_engine, summarize, time_calls
+from app.models.product import Product
+from app.services.search_index import search_index
+
+ADJECTIVES = [
+    "wireless", "portable", "compact", "premium", "classic", "smart", "ergonomic",
+    "waterproof", "vintage", "modern", "rugged", "silent", "foldable", "organic",
+]
+NOUNS = [
+    "laptop", "keyboard", "headphones", "lamp", "backpack", "kettle", "camera",
+    "speaker", "monitor", "chair", "blender", "jacket", "watch", "tripod",
+]
+FILLER = [
+    "with", "for", "and", "designed", "everyday", "use", "long", "battery", "life",
+    "lightweight", "durable", "materials", "travel", "home", "office", "gift",
+]
+
+QUERIES = {
+    "word": "laptop",
+    "prefix": "head",
+    "two_words": "wireless speaker",
+    "rare": "xq17",
+}
+
+
+def seed(engine, rows: int, batch: int = 10000) -> None:
+    """Insert ``rows`` synthetic products in large batches"""
+    rng = random.Random(42)
+    with engine.begin() as conn:
+        for start in range(0, rows, batch):
+            conn.execute(insert(Product), [
+                {
+                    "name": f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {rng.choice(NOUNS)}",
+                    "description": " ".join(rng.choices(FILLER + ADJECTIVES + NOUNS, k=12))
+                    # A handful of products carry a rare model code
+                    + (f" model xq{index % 100}" if index % 997 == 0 else ""),
+                    "price": 1.0 + index % 500,
+                    "stock": index % 100,
+                    "category": f"Category {index % 50}",
+                }
+                for index in range(start, min(start + batch, rows))
+            ])
+
+
+def max_rss_mb() -> float:
+    """Peak resident memory of this process in MiB"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--database-url", default="sqlite:///./benchmark_search.db")
+    args = parser.parse_args()
+
+    engine = make_engine(args.database_url)
+    seed(engine, args.rows)
+    search_index.clear()
+
+    report = {"benchmark": "search", "rows": args.rows, "backend": engine.dialect.name}
+    with app_client(engine) as client:
+        def run(query):
+            response = client.get("/api/products/search", params={"q": query, "limit": args.limit})
+            assert response.status_code == 200, response.text
+            return response
+
+        rss_before = max_rss_mb()
+        started = time.perf_counter()
+        run(QUERIES["word"])
+        report["first_request_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        if engine.dialect.name != "postgresql":
+            report["index_documents"] = len(search_index)
+            report["index_peak_rss_growth_mb"] = round(max_rss_mb() - rss_before, 1)
+
+        report["results"] = {
+            kind: {"hits": len(run(query).json()), **summarize(time_calls(lambda: run(query), args.repeat))}
+            for kind, query in QUERIES.items()
+        }
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
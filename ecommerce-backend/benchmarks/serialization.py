@@ -0,0 +1,147 @@
+"""
+Measure response serialization cost per endpoint, without the database.
+
+For each endpoint a representative payload is built in memory (cached
+product dicts, or transient ORM orders with line items) and encoded two
+ways:
+
+* ``response_model``: what FastAPI does for a returned value, i.e.
+  validate through the route's response field, convert to primitives and
+  render with the stdlib ``json`` module (``JSONResponse``);
+* ``fast``: the ``json_response`` path, i.e. orjson over the cached
+  product dicts, or over ``serialize_order`` output for ORM orders.
+
+Usage:
+    python -m benchmarks.serialization --repeat 2000
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+from benchmarks.common import app
+from app.cache.product_cache import serialize_product
+from app.config.settings import settings
+from app.models.order import Order, OrderItem
+from app.models.product import Product
+from app.schemas.order import serialize_order, serialize_orders
+from app.utils.responses import json_response
+
+
+def make_products(count: int):
+    now = datetime(2024, 1, 1)
+    return [
+        serialize_product(Product(
+            id=index, sku=f"SKU-{index}", name=f"Product {index}",
+            description="A reasonably descriptive product description " * 3,
+            price=9.99 + index, stock=index % 50, category=f"Category {index % 10}",
+            image_url=f"https://example.com/images/{index}.jpg",
+            created_at=now, updated_at=now + timedelta(minutes=index)
+        ))
+        for index in range(1, count + 1)
+    ]
+
+
+def make_orders(count: int, lines: int = 3):
+    now = datetime(2024, 1, 1)
+    return [
+        Order(
+            id=index, user_id=1, total_amount=42.5, status="pending",
+            shipping_address=f"{index} Benchmark Street, Test City",
+            created_at=now, updated_at=now,
+            items=[
+                OrderItem(id=index * lines + line, product_id=line + 1, name=f"Product {line}", quantity=2, price=7.25)
+                for line in range(lines)
+            ]
+        )
+        for index in range(1, count + 1)
+    ]
+
+
+def response_field(path: str, method: str = "GET"):
+    for route in app.routes:
+        if getattr(route, "path", None) == path and method in getattr(route, "methods", ()):
+            return route.response_field
+    raise LookupError(path)
+
+
+def search_hits(products):
+    return [
+        {**product, "rank": 0.5, "highlights": {"name": product["name"], "description": product["description"]}}
+        for product in products
+    ]
+
+
+async def time_encoding(encode, repeat: int):
+    """Per-call latencies (microseconds) of ``await encode()``, plus the body size"""
+    body = await encode()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await encode()
+        timings.append((time.perf_counter() - started) * 1e6)
+    return timings, len(body)
+
+
+def summarize(timings):
+    ordered = sorted(timings)
+    return {
+        "p50_us": round(statistics.median(ordered), 1),
+        "p95_us": round(ordered[int(len(ordered) * 0.95) - 1], 1),
+    }
+
+
+async def run(repeat: int, items: int):
+    products = make_products(items)
+    orders = make_orders(items)
+    cases = {
+        "GET /api/products/ (list)": ("/api/products/", products, None),
+        "GET /api/products/{product_id}": ("/api/products/{product_id}", products[0], None),
+        "GET /api/products/search": ("/api/products/search", search_hits(products[:20]), None),
+        "GET /api/orders/ (list)": ("/api/orders/", orders, serialize_orders),
+        "GET /api/orders/{order_id}": ("/api/orders/{order_id}", orders[0], serialize_order),
+    }
+
+    results = {}
+    for name, (path, content, serializer) in cases.items():
+        field = response_field(path)
+
+        async def baseline():
+            data = await serialize_response(field=field, response_content=content, is_coroutine=True)
+            return JSONResponse(data).body
+
+        async def fast():
+            return json_response(serializer(content) if serializer else content).body
+
+        baseline_timings, baseline_size = await time_encoding(baseline, repeat)
+        fast_timings, fast_size = await time_encoding(fast, repeat)
+        results[name] = {
+            "response_model": {**summarize(baseline_timings), "bytes": baseline_size},
+            "fast": {**summarize(fast_timings), "bytes": fast_size},
+            "speedup": round(statistics.median(baseline_timings) / statistics.median(fast_timings), 1),
+        }
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=1000)
+    parser.add_argument("--items", type=int, default=100, help="Products/orders per list payload")
+    args = parser.parse_args()
+
+    settings.FAST_JSON_RESPONSES = True
+    report = {
+        "benchmark": "serialization",
+        "items": args.items,
+        "results": asyncio.run(run(args.repeat, args.items)),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,19 @@
+from contextlib import contextmanager
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from app.main import app
+from app.cache.backends import CacheBackend
+from app.cache.body_cache import encoded_bodies
+from app.cache.principal_cache import principal_cache
+from app.cache.product_cache import product_cache
+from app.config.settings import settings
 from app.database.connection import Base, get_db
+from app.services.idempotency import DatabaseIdempotencyStore, idempotency
+from app.services.search_index import search_index
+from app.utils.profiling import capture_queries
 
 # Test database URL (use SQLite for testing)
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -14,6 +24,67 @@ engine = create_engine(
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+class FakeCacheBackend(CacheBackend):
+    """Dict-backed stand-in for a shared cache (ignores TTLs)"""
+    
+    def __init__(self):
+        self.data = {}
+    
+    def get(self, key):
+        return self.data.get(key)
+    
+    def set(self, key, value, ttl=None):
+        self.data[key] = value
+    
+    def delete(self, key):
+        self.data.pop(key, None)
+    
+    def clear(self):
+        self.data.clear()
+
+
+@pytest.fixture(autouse=True)
+def cache_backend():
+    """Give every test an empty fake backend for the product and user caches"""
+    encoded_bodies.clear()
+    caches = (product_cache, principal_cache)
+    originals = [cache.backend for cache in caches]
+    backend = FakeCacheBackend()
+    for cache in caches:
+        cache.backend = backend
+        cache.clear()
+    yield backend
+    for cache, original in zip(caches, originals):
+        cache.backend = original
+
+
+@pytest.fixture(autouse=True)
+def reset_search_index():
+    """Every test database starts from an unbuilt search index"""
+    search_index.clear()
+    yield
+    search_index.clear()
+
+
+@pytest.fixture(autouse=True)
+def idempotency_store():
+    """Give every test its own database idempotency store, on the test database"""
+    original = idempotency.store
+    idempotency.store = DatabaseIdempotencyStore(
+        TestingSessionLocal,
+        ttl=settings.IDEMPOTENCY_TTL_SECONDS,
+        lock_seconds=settings.IDEMPOTENCY_LOCK_SECONDS
+    )
+    yield idempotency.store
+    idempotency.store = original
+
+
+@pytest.fixture(autouse=True)
+def outbox_dispatcher_off(monkeypatch):
+    """Keep the app's dispatcher from racing tests; they drain the outbox themselves"""
+    monkeypatch.setattr(settings, "OUTBOX_DISPATCHER_ENABLED", False)
+
+
 @pytest.fixture(scope="function")
 def db_session():
     """Create a fresh database for each test"""
@@ -26,6 +97,31 @@ def db_session():
         Base.metadata.drop_all(bind=engine)
 
 
+@pytest.fixture
+def query_budget(db_session):
+    """
+    Context manager failing the test when its block issues more than
+    ``limit`` statements; the failure lists them, so an N+1 regression
+    shows up as the repeated query.
+    
+        with query_budget(3) as queries:
+            client.post(...)
+    """
+    engine = db_session.get_bind()
+    
+    @contextmanager
+    def budget(limit: int):
+        with capture_queries(engine) as queries:
+            yield queries
+        if len(queries) > limit:
+            pytest.fail(
+                f"{len(queries)} queries issued, budget is {limit}:\n{queries.report()}",
+                pytrace=False
+            )
+    
+    return budget
+
+
 @pytest.fixture(scope="function")
 def client(db_session):
     """Create a test client with overridden database dependency"""
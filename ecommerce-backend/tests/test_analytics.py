@@ -0,0 +1,184 @@
+from datetime import datetime
+
+import pytest
+from fastapi import status
+from sqlalchemy import event
+
+from app.cache.principal_cache import principal_cache
+from app.models.analytics import DailySales, OrderStatusCount, ProductSales
+from app.models.outbox import OutboxEvent
+from app.models.user import User
+from app.services import outbox
+from app.services.analytics import rebuild_rollups
+from app.services.outbox import ORDER_PLACED, dispatch_batch
+from tests.conftest import TestingSessionLocal
+
+
+@pytest.fixture
+def admin_headers(auth_headers, db_session):
+    """The test user, made an admin"""
+    db_session.query(User).update({"is_admin": 1})
+    db_session.commit()
+    principal_cache.clear()
+    return auth_headers
+
+
+def fold():
+    """Dispatch the pending order events, as the outbox dispatcher would"""
+    with TestingSessionLocal() as db:
+        return dispatch_batch(db, batch_size=1000)
+
+
+@pytest.fixture
+def products(client, auth_headers):
+    """Two products with different stock levels"""
+    return [
+        client.post("/api/products/", json=data, headers=auth_headers).json()
+        for data in (
+            {"name": "Lamp", "price": 10.0, "stock": 50, "sku": "LAMP-1"},
+            {"name": "Desk", "price": 100.0, "stock": 8},
+        )
+    ]
+
+
+@pytest.fixture
+def orders(client, auth_headers, products):
+    """Three orders: one cancelled, one completed, one pending"""
+    lamp, desk = products
+
+    def place(*lines):
+        order_data = {
+            "items": [
+                {"product_id": product["id"], "name": product["name"], "quantity": quantity, "price": product["price"]}
+                for product, quantity in lines
+            ],
+            "shipping_address": "123 Analytics Avenue"
+        }
+        response = client.post("/api/orders/", json=order_data, headers=auth_headers)
+        assert response.status_code == status.HTTP_201_CREATED
+        return response.json()
+
+    placed = [place((lamp, 2), (desk, 1)), place((lamp, 3)), place((desk, 2))]
+    client.delete(f"/api/orders/{placed[0]['id']}", headers=auth_headers)
+    client.put(f"/api/orders/{placed[1]['id']}", json={"status": "completed"}, headers=auth_headers)
+    return placed
+
+
+def reports(client, headers):
+    return {
+        "revenue": client.get("/api/analytics/revenue", headers=headers).json(),
+        "top_units": client.get("/api/analytics/top-products", headers=headers).json(),
+        "top_revenue": client.get("/api/analytics/top-products", params={"by": "revenue"}, headers=headers).json(),
+        "status": client.get("/api/analytics/order-status", headers=headers).json(),
+    }
+
+
+def test_rollups_follow_order_writes(client, admin_headers, products, orders):
+    """Test that create, update and cancel events are folded into the rollups"""
+    assert fold() == 5
+    result = reports(client, admin_headers)
+    lamp, desk = products
+
+    assert result["revenue"] == [
+        {"day": datetime.utcnow().date().isoformat(), "orders": 2, "revenue": 230.0, "units": 5}
+    ]
+    assert [(p["product_id"], p["orders"], p["units"], p["revenue"]) for p in result["top_units"]] == [
+        (lamp["id"], 1, 3, 30.0),
+        (desk["id"], 1, 2, 200.0),
+    ]
+    assert [p["name"] for p in result["top_revenue"]] == ["Desk", "Lamp"]
+    assert result["status"] == {"cancelled": 1, "completed": 1, "pending": 1}
+
+
+def test_rebuild_matches_incremental(client, admin_headers, orders, db_session):
+    """Test that recomputing from orders gives the incrementally kept numbers"""
+    fold()
+    before = reports(client, admin_headers)
+
+    counts = rebuild_rollups(db_session)
+
+    assert counts == {"daily_sales": 1, "product_sales": 2, "order_status_counts": 3}
+    assert reports(client, admin_headers) == before
+
+
+def test_rebuild_leaves_pending_events_to_the_dispatcher(client, admin_headers, orders, db_session):
+    """Test that events pending during a rebuild are not counted twice"""
+    fold()
+    expected = reports(client, admin_headers)
+    client.put(f"/api/orders/{orders[2]['id']}", json={"status": "processing"}, headers=admin_headers)
+    expected["status"] = {"cancelled": 1, "completed": 1, "processing": 1}
+
+    rebuild_rollups(db_session)
+    assert fold() == 1
+    assert reports(client, admin_headers) == expected
+
+
+def test_failed_delivery_is_not_counted(client, admin_headers, products, orders):
+    """Test that rollup writes of an event whose delivery fails are rolled back with it"""
+    def flaky(payload):
+        if not attempts:
+            attempts.append(payload)
+            raise RuntimeError("mail server down")
+
+    attempts = []
+    outbox.subscribe(ORDER_PLACED)(flaky)
+    try:
+        assert fold() == 5
+        with TestingSessionLocal() as db:
+            db.query(OutboxEvent).update({"available_at": datetime.utcnow()})
+            db.commit()
+        assert fold() == 1
+    finally:
+        outbox.unsubscribe(ORDER_PLACED, flaky)
+
+    assert reports(client, admin_headers)["status"] == {"cancelled": 1, "completed": 1, "pending": 1}
+
+
+def test_checkout_leaves_rollups_to_the_outbox(client, auth_headers, products, db_session):
+    """Test that order writes leave the hot rollup rows to the dispatcher"""
+    statements = []
+    engine = db_session.get_bind()
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        client.post("/api/orders/", json={
+            "items": [{"product_id": products[0]["id"], "name": "Lamp", "quantity": 1, "price": 10.0}],
+            "shipping_address": "123 Analytics Avenue"
+        }, headers=auth_headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    rollups = [model.__tablename__ for model in (DailySales, ProductSales, OrderStatusCount)]
+    assert not [s for s in statements if any(table in s for table in rollups)]
+    assert db_session.query(OutboxEvent).count() == 1
+    assert db_session.query(DailySales).count() == 0
+
+
+def test_reports_are_for_admins(client, auth_headers, orders):
+    """Test that store-wide figures are hidden from customers"""
+    for path in ("/api/analytics/revenue", "/api/analytics/top-products",
+                 "/api/analytics/low-stock", "/api/analytics/order-status"):
+        assert client.get(path, headers=auth_headers).status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_reports_do_not_scan_orders(client, admin_headers, orders, db_session):
+    """Test that reports read rollup tables only"""
+    statements = []
+    engine = db_session.get_bind()
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        reports(client, admin_headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert not [s for s in statements if "FROM orders" in s or "FROM order_items" in s]
+
+
+def test_low_stock(client, admin_headers, products, orders):
+    """Test the low-stock list, lowest stock first"""
+    response = client.get("/api/analytics/low-stock", params={"threshold": 47}, headers=admin_headers)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [(p["name"], p["stock"]) for p in response.json()] == [("Desk", 6), ("Lamp", 47)]
+    assert response.json()[1]["sku"] == "LAMP-1"
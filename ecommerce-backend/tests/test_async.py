@@ -0,0 +1,190 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi import FastAPI, status
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.cache.principal_cache import principal_cache
+from app.database.connection import async_database_url, create_async_session_factory, get_async_db
+from app.models.user import User
+from app.routers import async_auth, async_products, async_orders, async_analytics
+from app.services.outbox import dispatch_batch
+from tests.conftest import SQLALCHEMY_DATABASE_URL, TestingSessionLocal
+
+# App serving only the async routers, as main.py does with DATABASE_ASYNC
+async_app = FastAPI()
+async_app.include_router(async_auth.router)
+async_app.include_router(async_products.router)
+async_app.include_router(async_orders.router)
+async_app.include_router(async_analytics.router)
+
+
+@pytest.fixture
+def client(db_session):
+    """Test client for the async routers, on aiosqlite against the test database"""
+    async_engine = create_async_engine(
+        async_database_url(SQLALCHEMY_DATABASE_URL),
+        poolclass=NullPool
+    )
+    AsyncTestingSessionLocal = create_async_session_factory(async_engine)
+    
+    async def override_get_async_db():
+        async with AsyncTestingSessionLocal() as session:
+            yield session
+    
+    async_app.dependency_overrides[get_async_db] = override_get_async_db
+    with TestClient(async_app) as test_client:
+        yield test_client
+    async_app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def sample_product(client, auth_headers):
+    """Create a product through the async router"""
+    response = client.post(
+        "/api/products/",
+        json={"name": "Async Product", "price": 10.0, "stock": 10, "category": "Async"},
+        headers=auth_headers
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    return response.json()
+
+
+def test_async_database_url():
+    """Test that sync URLs are mapped onto their asyncio drivers"""
+    assert async_database_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+    assert async_database_url("postgresql://u:p@db:5432/shop") == "postgresql+asyncpg://u:p@db:5432/shop"
+    assert async_database_url("postgresql+asyncpg://u:p@db/shop") == "postgresql+asyncpg://u:p@db/shop"
+
+
+def test_async_current_user(client, auth_headers, test_user):
+    """Test register, login and /me on the async auth router"""
+    response = client.get("/api/auth/me", headers=auth_headers)
+    
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["username"] == test_user["username"]
+
+
+def test_async_product_crud(client, auth_headers, sample_product):
+    """Test product reads and writes on the async products router"""
+    product_id = sample_product["id"]
+    
+    response = client.put(f"/api/products/{product_id}", json={"price": 12.0}, headers=auth_headers)
+    assert response.status_code == status.HTTP_200_OK
+    
+    response = client.get(f"/api/products/{product_id}")
+    assert response.json()["price"] == 12.0
+    assert client.get(
+        f"/api/products/{product_id}",
+        headers={"If-None-Match": response.headers["etag"]}
+    ).status_code == status.HTTP_304_NOT_MODIFIED
+    
+    assert len(client.get("/api/products/", params={"category": "Async"}).json()) == 1
+    
+    response = client.delete(f"/api/products/{product_id}", headers=auth_headers)
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert client.get(f"/api/products/{product_id}").status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_async_product_search(client, sample_product):
+    """Test search through the async products router"""
+    response = client.get("/api/products/search", params={"q": "asy"})
+    
+    assert response.status_code == status.HTTP_200_OK
+    assert [hit["id"] for hit in response.json()] == [sample_product["id"]]
+    assert response.json()[0]["highlights"]["name"] == "<mark>Async</mark> Product"
+
+
+def test_async_bulk_import_and_export(client, auth_headers, sample_product):
+    """Test bulk upsert through run_sync and export through AsyncSession.stream"""
+    body = "sku,name,price\nLAMP-1,Lamp,10\nLAMP-1,Brass Lamp,12\n"
+    
+    response = client.post("/api/products/bulk", content=body, headers={**auth_headers, "Content-Type": "text/csv"})
+    assert response.json()["upserted"] == 2
+    
+    lines = client.get("/api/products/export").text.splitlines()
+    assert [json.loads(line)["name"] for line in lines] == ["Async Product", "Brass Lamp"]
+
+
+def test_async_order_lifecycle(client, auth_headers, sample_product):
+    """Test order placement, listing and cancellation on the async orders router"""
+    order_data = {
+        "items": [
+            {"product_id": sample_product["id"], "quantity": 4, "price": 10.0, "name": "Async Product"}
+        ],
+        "shipping_address": "123 Async Street"
+    }
+    
+    response = client.post("/api/orders/", json=order_data, headers=auth_headers)
+    assert response.status_code == status.HTTP_201_CREATED
+    order_id = response.json()["id"]
+    assert client.get(f"/api/products/{sample_product['id']}").json()["stock"] == 6
+    
+    page = client.get("/api/orders/", params={"after": ""}, headers=auth_headers).json()
+    assert [order["id"] for order in page["items"]] == [order_id]
+    
+    lines = client.get("/api/orders/export", headers=auth_headers).text.splitlines()
+    assert [json.loads(line)["id"] for line in lines] == [order_id]
+    assert client.get("/api/analytics/order-status", headers=auth_headers).status_code == status.HTTP_403_FORBIDDEN
+    with TestingSessionLocal() as db:
+        db.query(User).update({"is_admin": 1})
+        db.commit()
+        dispatch_batch(db, batch_size=100)
+    principal_cache.clear()
+    assert client.get("/api/analytics/order-status", headers=auth_headers).json() == {"pending": 1}
+    
+    response = client.delete(f"/api/orders/{order_id}", headers=auth_headers)
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert client.get(f"/api/orders/{order_id}", headers=auth_headers).json()["status"] == "cancelled"
+    assert client.get(f"/api/products/{sample_product['id']}").json()["stock"] == 10
+
+
+def test_async_order_insufficient_stock(client, auth_headers, sample_product):
+    """Test that stock errors surface unchanged through run_sync"""
+    order_data = {
+        "items": [
+            {"product_id": sample_product["id"], "quantity": 50, "price": 10.0, "name": "Async Product"}
+        ],
+        "shipping_address": "123 Async Street"
+    }
+    
+    response = client.post("/api/orders/", json=order_data, headers=auth_headers)
+    
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "Insufficient stock" in response.json()["detail"]
+
+
+def test_async_concurrent_searches_on_a_cold_index(client, sample_product):
+    """Test that searches racing the first index build wait for it instead of blocking the loop"""
+    async def search_concurrently():
+        transport = httpx.ASGITransport(app=async_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+            return await asyncio.gather(*(
+                async_client.get("/api/products/search", params={"q": "async"}) for _ in range(5)
+            ))
+    
+    responses = asyncio.run(search_concurrently())
+    
+    assert [response.status_code for response in responses] == [status.HTTP_200_OK] * 5
+    assert all(response.json()[0]["id"] == sample_product["id"] for response in responses)
+
+
+def test_async_idempotent_order(client, auth_headers, sample_product):
+    """Test that the async router replays a retried order instead of placing it again"""
+    order_data = {
+        "items": [{"product_id": sample_product["id"], "quantity": 1, "price": 10.0, "name": "Async Product"}],
+        "shipping_address": "123 Async Street"
+    }
+    headers = {**auth_headers, "Idempotency-Key": "async-1"}
+    
+    first = client.post("/api/orders/", json=order_data, headers=headers)
+    retry = client.post("/api/orders/", json=order_data, headers=headers)
+    
+    assert first.status_code == retry.status_code == status.HTTP_201_CREATED
+    assert retry.json() == first.json()
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert client.get(f"/api/products/{sample_product['id']}").json()["stock"] == 9
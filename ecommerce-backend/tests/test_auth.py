@@ -1,6 +1,10 @@
 import pytest
 from fastapi import status
 
+from app.cache.principal_cache import principal_cache
+from app.models.user import User
+from app.utils.auth import password_hasher
+
 
 def test_register_user(client):
     """Test user registration"""
@@ -97,4 +101,47 @@ def test_get_current_user_unauthorized(client):
     """Test accessing protected endpoint without token"""
     response = client.get("/api/auth/me")
     
-    assert response.status_code == status.HTTP_401_UNAUTHORIZED
\ No newline at end of file
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+def test_current_user_is_cached(client, auth_token):
+    """Test that repeated authenticated calls reuse the cached user"""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    
+    first = client.get("/api/orders/", headers=headers)
+    second = client.get("/api/orders/", headers=headers)
+    
+    assert first.status_code == status.HTTP_200_OK
+    assert second.status_code == status.HTTP_200_OK
+    assert principal_cache.misses == 1
+    assert principal_cache.hits == 1
+
+
+def test_deactivation_invalidates_cached_user(client, db_session, auth_token, test_user):
+    """Test that a deactivated user is rejected despite a warm cache"""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    assert client.get("/api/orders/", headers=headers).status_code == status.HTTP_200_OK
+    
+    user = db_session.query(User).filter(User.username == test_user["username"]).first()
+    user.is_active = 0
+    db_session.commit()
+    
+    response = client.get("/api/orders/", headers=headers)
+    
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_password_pool_sheds_load(client):
+    """Test that registration fails fast with 503 when the hashing queue is full"""
+    original = password_hasher.max_pending
+    password_hasher.max_pending = 0
+    try:
+        response = client.post("/api/auth/register", json={
+            "email": "busy@example.com",
+            "username": "busyuser",
+            "password": "password123"
+        })
+    finally:
+        password_hasher.max_pending = original
+    
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.headers["retry-after"] == "1"
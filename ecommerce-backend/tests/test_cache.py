@@ -0,0 +1,101 @@
+import pytest
+from fastapi import status
+
+from app.cache.backends import MemoryCacheBackend
+from app.cache.product_cache import product_cache
+
+
+class FakeClock:
+    """Manually advanced monotonic clock"""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def product(client, auth_headers):
+    """Create a product to read through the cache"""
+    response = client.post(
+        "/api/products/",
+        json={"name": "Cached Product", "price": 10.0, "stock": 5, "category": "Books"},
+        headers=auth_headers
+    )
+    return response.json()
+
+
+def test_memory_backend_lru_eviction():
+    """Test that the least recently used entry is evicted first"""
+    backend = MemoryCacheBackend(max_entries=2)
+    backend.set("a", 1)
+    backend.set("b", 2)
+    backend.get("a")
+    backend.set("c", 3)
+    
+    assert backend.get("a") == 1
+    assert backend.get("b") is None
+    assert backend.get("c") == 3
+    assert backend.evictions == 1
+
+
+def test_memory_backend_ttl_expiry():
+    """Test that entries expire after their TTL"""
+    clock = FakeClock()
+    backend = MemoryCacheBackend(clock=clock)
+    backend.set("key", "value", ttl=10)
+    
+    clock.now = 9.9
+    assert backend.get("key") == "value"
+    clock.now = 10.0
+    assert backend.get("key") is None
+
+
+def test_product_detail_is_cached(client, product, cache_backend):
+    """Test that repeated product reads are served from the cache"""
+    client.get(f"/api/products/{product['id']}")
+    response = client.get(f"/api/products/{product['id']}")
+    
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["name"] == "Cached Product"
+    assert product_cache.hits == 1
+    assert product_cache.misses == 1
+    assert product_cache.product_key(product["id"]) in cache_backend.data
+
+
+def test_update_invalidates_product_and_category(client, auth_headers, product):
+    """Test that updating a product drops its detail and listing entries"""
+    client.get(f"/api/products/{product['id']}")
+    client.get("/api/products/", params={"category": "Books"})
+    
+    client.put(f"/api/products/{product['id']}", json={"price": 12.5}, headers=auth_headers)
+    
+    assert client.get(f"/api/products/{product['id']}").json()["price"] == 12.5
+    assert client.get("/api/products/", params={"category": "Books"}).json()[0]["price"] == 12.5
+    assert product_cache.hits == 0
+
+
+def test_order_invalidates_cached_stock(client, auth_headers, product):
+    """Test that placing an order refreshes the cached stock level"""
+    assert client.get("/api/products/", params={"category": "Books"}).json()[0]["stock"] == 5
+    
+    order_data = {
+        "items": [
+            {"product_id": product["id"], "quantity": 2, "price": 10.0, "name": "Cached Product"}
+        ],
+        "shipping_address": "123 Test Street"
+    }
+    client.post("/api/orders/", json=order_data, headers=auth_headers)
+    
+    assert client.get("/api/products/", params={"category": "Books"}).json()[0]["stock"] == 3
+
+
+def test_cache_stats_endpoint(client, product):
+    """Test that cache counters can be scraped"""
+    client.get(f"/api/products/{product['id']}")
+    
+    response = client.get("/cache/stats")
+    
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["products"]["misses"] == 1
@@ -0,0 +1,163 @@
+import json
+
+import pytest
+from fastapi import status
+from sqlalchemy import text
+
+from app.config.settings import settings
+from app.services.catalog import RowParser
+
+NDJSON = {"Content-Type": "application/x-ndjson"}
+CSV = {"Content-Type": "text/csv"}
+
+
+def ndjson(*rows):
+    return "".join(json.dumps(row) + "\n" for row in rows)
+
+
+def product_names(client):
+    return sorted(product["name"] for product in client.get("/api/products/").json())
+
+
+def test_row_parser_handles_split_chunks():
+    """Test that rows split across body chunks are reassembled"""
+    parser = RowParser("csv")
+    body = 'sku,name,description,price\nA-1,Lamp,"Warm light,\nsoft ""glow""",10\nA-2,Desk,,20'.encode()
+
+    rows = []
+    for start in range(0, len(body), 7):
+        rows.extend(parser.feed(body[start:start + 7]))
+    rows.extend(parser.close())
+
+    assert rows == [
+        (2, {"sku": "A-1", "name": "Lamp", "description": 'Warm light,\nsoft "glow"', "price": "10"}),
+        (4, {"sku": "A-2", "name": "Desk", "price": "20"}),
+    ]
+
+
+def test_row_parser_leaves_record_boundaries_to_csv():
+    """Test that a bare quote inside an unquoted field does not swallow the next row"""
+    parser = RowParser("csv")
+
+    rows = parser.feed(b'name,stock\nab"c,1\nd,2\n') + parser.close()
+
+    assert rows == [(2, {"name": 'ab"c', "stock": "1"}), (3, {"name": "d", "stock": "2"})]
+
+
+@pytest.mark.parametrize("media_type,body", [
+    (NDJSON, b'{"name": "x\xff", "price": 1}\n{"name": "ok", "price": 1}\n'),
+    (CSV, b'name,price\nx\xff,1\nok,1\n'),
+])
+def test_import_reports_invalid_utf8_by_line(client, auth_headers, media_type, body):
+    """Test that undecodable bytes fail their own row, not the request"""
+    response = client.post("/api/products/bulk", content=body, headers={**auth_headers, **media_type})
+
+    assert response.status_code == status.HTTP_200_OK
+    report = response.json()
+    assert (report["received"], report["upserted"], report["failed"]) == (2, 1, 1)
+    assert report["errors"][0]["errors"][0].startswith("Invalid UTF-8")
+    assert product_names(client) == ["ok"]
+
+
+def test_rejected_chunk_is_retried_row_by_row(client, auth_headers, db_session):
+    """Test that a database error only fails the rows that caused it"""
+    db_session.execute(text(
+        "CREATE TRIGGER reject_bad BEFORE INSERT ON products WHEN NEW.name = 'Bad' "
+        "BEGIN SELECT RAISE(ABORT, 'rejected'); END"
+    ))
+    db_session.commit()
+    body = ndjson({"name": "Good", "price": 1}, {"name": "Bad", "price": 1}, {"name": "Fine", "price": 1})
+
+    report = client.post("/api/products/bulk", content=body, headers={**auth_headers, **NDJSON}).json()
+
+    assert (report["upserted"], report["failed"]) == (2, 1)
+    assert [error["line"] for error in report["errors"]] == [2]
+    assert product_names(client) == ["Fine", "Good"]
+
+
+def test_import_ndjson(client, auth_headers):
+    """Test importing new products from NDJSON"""
+    body = ndjson(
+        {"sku": "LAMP-1", "name": "Lamp", "price": 10, "stock": 3, "category": "Home"},
+        {"name": "No SKU", "price": 5},
+    )
+
+    response = client.post("/api/products/bulk", content=body, headers={**auth_headers, **NDJSON})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"received": 2, "upserted": 2, "failed": 0, "errors": []}
+    assert product_names(client) == ["Lamp", "No SKU"]
+
+
+def test_import_upserts_on_sku(client, auth_headers, monkeypatch):
+    """Test that a known SKU updates the product, across chunks too"""
+    monkeypatch.setattr(settings, "PRODUCT_IMPORT_CHUNK_SIZE", 1)
+    client.post(
+        "/api/products/",
+        json={"sku": "LAMP-1", "name": "Lamp", "price": 10, "category": "Home"},
+        headers=auth_headers
+    )
+    assert client.get("/api/products/", params={"category": "Home"}).json()[0]["name"] == "Lamp"
+
+    body = "sku,name,price,category\nLAMP-1,Reading Lamp,12.5,Lighting\nDESK-1,Desk,80,Home\n"
+    response = client.post("/api/products/bulk", content=body, headers={**auth_headers, **CSV})
+
+    assert response.json()["upserted"] == 2
+    lamp = client.get("/api/products/", params={"category": "Lighting"}).json()
+    assert [(p["sku"], p["name"], p["price"]) for p in lamp] == [("LAMP-1", "Reading Lamp", 12.5)]
+    # The cached "Home" listing no longer shows the moved product
+    assert [p["name"] for p in client.get("/api/products/", params={"category": "Home"}).json()] == ["Desk"]
+    # Imported text is searchable straight away
+    assert [hit["sku"] for hit in client.get("/api/products/search", params={"q": "reading"}).json()] == ["LAMP-1"]
+
+
+def test_import_reports_row_errors(client, auth_headers):
+    """Test that invalid rows are reported by line and valid rows still land"""
+    body = ndjson({"name": "Good", "price": 1}) + "{not json\n" + ndjson({"name": "Bad", "price": -1}, [1])
+
+    response = client.post("/api/products/bulk", content=body, headers={**auth_headers, **NDJSON})
+
+    report = response.json()
+    assert (report["received"], report["upserted"], report["failed"]) == (4, 1, 3)
+    assert [error["line"] for error in report["errors"]] == [2, 3, 4]
+    assert report["errors"][1]["errors"][0].startswith("price:")
+    assert product_names(client) == ["Good"]
+
+
+def test_import_rejects_unknown_media_type(client, auth_headers):
+    """Test that bodies other than NDJSON and CSV are refused"""
+    response = client.post("/api/products/bulk", json=[{"name": "Lamp", "price": 1}], headers=auth_headers)
+
+    assert response.status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+
+
+def test_duplicate_sku_conflict(client, auth_headers):
+    """Test that creating a second product with a taken SKU is a conflict"""
+    product = {"sku": "LAMP-1", "name": "Lamp", "price": 10}
+    client.post("/api/products/", json=product, headers=auth_headers)
+
+    response = client.post("/api/products/", json=product, headers=auth_headers)
+
+    assert response.status_code == status.HTTP_409_CONFLICT
+
+
+@pytest.mark.parametrize("export_format", ["ndjson", "csv"])
+def test_export_round_trip(client, auth_headers, monkeypatch, export_format):
+    """Test that an export streams every product and imports back unchanged"""
+    monkeypatch.setattr(settings, "PRODUCT_EXPORT_BATCH_SIZE", 2)
+    rows = [{"sku": f"SKU-{i}", "name": f"Product {i}", "price": i + 1, "stock": i} for i in range(5)]
+    client.post("/api/products/bulk", content=ndjson(*rows), headers={**auth_headers, **NDJSON})
+
+    response = client.get("/api/products/export", params={"format": export_format})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith(
+        "application/x-ndjson" if export_format == "ndjson" else "text/csv"
+    )
+    lines = response.text.splitlines()
+    assert len(lines) == 5 + (export_format == "csv")
+
+    media_type = NDJSON if export_format == "ndjson" else CSV
+    report = client.post("/api/products/bulk", content=response.text, headers={**auth_headers, **media_type}).json()
+    assert (report["upserted"], report["failed"]) == (5, 0)
+    assert len(client.get("/api/products/").json()) == 5
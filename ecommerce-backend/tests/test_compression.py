@@ -0,0 +1,118 @@
+import gzip
+import json
+import zlib
+
+import pytest
+from fastapi import status
+
+from app.cache.body_cache import encoded_bodies
+from app.utils import compression
+from app.utils.compression import compress, negotiate
+
+GZIP = {"Accept-Encoding": "gzip"}
+IDENTITY = {"Accept-Encoding": "identity"}
+
+
+@pytest.fixture
+def catalog(client, auth_headers):
+    """Enough products for a listing page well above the size threshold"""
+    for index in range(20):
+        client.post("/api/products/", json={
+            "name": f"Product {index}",
+            "description": "A long and fairly repetitive product description. " * 5,
+            "price": 10 + index,
+            "stock": 5,
+            "category": "Bulk"
+        }, headers=auth_headers)
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("", None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("deflate, gzip;q=0.5", "gzip"),
+    ("gzip;q=0", None),
+    ("*", compression.ENCODINGS[0]),
+    ("*, gzip;q=0", "br" if compression.brotli is not None else None),
+])
+def test_negotiate(header, expected):
+    """Test Accept-Encoding negotiation, q-values and wildcards"""
+    assert negotiate(header) == expected
+
+
+def test_large_listing_is_compressed(client, catalog):
+    """Test that a listing page is gzipped and decodes to the identity body"""
+    compressed = client.get("/api/products/", headers=GZIP)
+    plain = client.get("/api/products/", headers=IDENTITY)
+
+    assert compressed.status_code == status.HTTP_200_OK
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in compressed.headers["vary"]
+    assert int(compressed.headers["content-length"]) < len(plain.content)
+    assert "content-encoding" not in plain.headers
+    assert compressed.json() == plain.json()
+    assert compressed.headers["etag"] == plain.headers["etag"]
+
+
+def test_small_response_is_not_compressed(client):
+    """Test that bodies under the minimum size are sent as is"""
+    response = client.get("/health", headers=GZIP)
+
+    assert response.json() == {"status": "healthy"}
+    assert "content-encoding" not in response.headers
+
+
+def test_catalog_page_is_precompressed(client, auth_headers, catalog, cache_backend, monkeypatch):
+    """Test that a hot page is compressed once and then served from the body cache"""
+    first = client.get("/api/products/", headers=GZIP)
+    etag = first.headers["etag"]
+    cached = encoded_bodies.backend.get(f"encoded:gzip:{etag}")
+    assert json.loads(gzip.decompress(cached)) == first.json()
+    # Bodies stay out of the (JSON-only) product cache and its counters
+    assert not any(key.startswith("encoded:") for key in cache_backend.data)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("hot page was compressed again")
+
+    monkeypatch.setattr(compression, "compress", fail)
+    second = client.get("/api/products/", headers=GZIP)
+    assert second.headers["content-encoding"] == "gzip"
+    assert second.json() == first.json()
+    assert (encoded_bodies.hits, encoded_bodies.misses) == (1, 1)
+
+    monkeypatch.undo()
+    client.put("/api/products/1", json={"price": 99.0}, headers=auth_headers)
+    third = client.get("/api/products/", headers=GZIP)
+    assert third.headers["etag"] != etag
+    assert third.json()[0]["price"] == 99.0
+
+
+def test_streaming_export_is_compressed(client, catalog):
+    """Test that exports stay streamed (no Content-Length) while compressed"""
+    with client.stream("GET", "/api/products/export", headers=GZIP) as response:
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        body = b"".join(response.iter_bytes())
+
+    assert len(body.decode().splitlines()) == 20
+
+
+def test_incremental_chunks_decode_as_they_arrive():
+    """Test that each flushed chunk is decodable before the stream ends"""
+    encoder = compression.Compressor("gzip")
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    assert decoder.decompress(encoder.compress(b'{"id": 1}\n', flush=True)) == b'{"id": 1}\n'
+    assert decoder.decompress(encoder.finish(b'{"id": 2}\n')) == b'{"id": 2}\n'
+    assert gzip.decompress(compress(b"x" * 5000, "gzip")) == b"x" * 5000
+
+
+def test_brotli_when_installed(client, catalog):
+    """Test that brotli is preferred when the optional package is present"""
+    brotli = pytest.importorskip("brotli")
+
+    response = client.get("/api/products/", headers={"Accept-Encoding": "gzip, br"})
+
+    assert response.headers["content-encoding"] == "br"
+    assert brotli.decompress(compress(b"catalog" * 500, "br")) == b"catalog" * 500
@@ -0,0 +1,73 @@
+import pytest
+from fastapi import status
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import NullPool
+
+from app.config.settings import settings
+from app.database.pool import TimedQueuePool, engine_options, pool_status
+
+POSTGRES_URL = "postgresql://postgres:postgres@db:5432/ecommerce"
+
+
+def test_engine_options_leave_sqlite_alone():
+    """Test that SQLite keeps SQLAlchemy's default pooling"""
+    assert engine_options("sqlite:///./test.db") == {}
+
+
+def test_engine_options_from_settings(monkeypatch):
+    """Test that pool sizing and health options come from settings"""
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 20)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 5)
+    monkeypatch.setattr(settings, "DB_POOL_RECYCLE", 300)
+    
+    options = engine_options(POSTGRES_URL)
+    
+    assert options["poolclass"] is TimedQueuePool
+    assert options["pool_size"] == 20
+    assert options["max_overflow"] == 5
+    assert options["pool_recycle"] == 300
+    assert options["pool_pre_ping"] is True
+
+
+def test_engine_options_pgbouncer(monkeypatch):
+    """Test that PgBouncer mode disables app pooling and prepared statements"""
+    monkeypatch.setattr(settings, "DB_PGBOUNCER", True)
+    
+    options = engine_options(POSTGRES_URL, use_async=True)
+    
+    assert options["poolclass"] is NullPool
+    assert options["connect_args"]["statement_cache_size"] == 0
+    assert "pool_size" not in options
+
+
+def test_timed_pool_records_waits_and_timeouts(tmp_path):
+    """Test checkout telemetry, including an exhausted pool timing out"""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=TimedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05
+    )
+    
+    held = engine.connect()
+    with pytest.raises(PoolTimeoutError):
+        engine.connect()
+    
+    stats = pool_status(engine)
+    held.close()
+    engine.dispose()
+    
+    assert stats["checked_out"] == 1
+    assert stats["checkouts"] == 2
+    assert stats["timeouts"] == 1
+    assert stats["wait_ms_max"] >= 50
+
+
+def test_pool_health_endpoint(client):
+    """Test that pool gauges are exposed"""
+    response = client.get("/health/pool")
+    
+    assert response.status_code == status.HTTP_200_OK
+    assert "class" in response.json()["primary"]
@@ -0,0 +1,210 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException, status
+
+from app.models.order import Order
+from app.services.idempotency import (
+    Claim,
+    ClaimLostError,
+    DatabaseIdempotencyStore,
+    Idempotency,
+    KeyReuseError,
+    MemoryIdempotencyStore,
+    StoredResponse,
+    idempotency,
+)
+from tests.conftest import TestingSessionLocal
+
+
+@pytest.fixture
+def product(client, auth_headers):
+    """A product with little stock, so that duplicate orders would show"""
+    response = client.post(
+        "/api/products/",
+        json={"name": "Kettle", "price": 25.0, "stock": 3, "category": "Kitchen"},
+        headers=auth_headers
+    )
+    return response.json()
+
+
+@pytest.fixture(params=["database", "memory"])
+def store(request, db_session):
+    """Each store backend, installed behind the order router"""
+    if request.param == "database":
+        store = DatabaseIdempotencyStore(TestingSessionLocal, ttl=60, lock_seconds=30)
+    else:
+        store = MemoryIdempotencyStore(ttl=60, lock_seconds=30)
+    idempotency.store = store
+    return store
+
+
+def make_store(backend, lock_seconds=30):
+    if backend == "database":
+        return DatabaseIdempotencyStore(TestingSessionLocal, ttl=60, lock_seconds=lock_seconds)
+    return MemoryIdempotencyStore(ttl=60, lock_seconds=lock_seconds)
+
+
+def complete(store, claim, body):
+    """Complete ``claim`` in a committed transaction of its own"""
+    with TestingSessionLocal() as db:
+        store.complete(db, claim, 201, body)
+        db.commit()
+
+
+def order_for(product, quantity=1):
+    return {
+        "items": [{"product_id": product["id"], "quantity": quantity, "price": product["price"], "name": product["name"]}],
+        "shipping_address": "123 Test Street"
+    }
+
+
+def test_retry_replays_the_first_response(client, auth_headers, product, store):
+    """Test that a retried order is answered from the store and placed once"""
+    headers = {**auth_headers, "Idempotency-Key": "checkout-1"}
+
+    first = client.post("/api/orders/", json=order_for(product), headers=headers)
+    retry = client.post("/api/orders/", json=order_for(product), headers=headers)
+
+    assert first.status_code == retry.status_code == status.HTTP_201_CREATED
+    assert retry.json() == first.json()
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert "idempotent-replayed" not in first.headers
+    assert len(client.get("/api/orders/", headers=auth_headers).json()) == 1
+    assert client.get(f"/api/products/{product['id']}").json()["stock"] == 2
+
+
+def test_key_reused_for_another_request(client, auth_headers, product, store):
+    """Test that a key cannot be replayed for a different body"""
+    headers = {**auth_headers, "Idempotency-Key": "checkout-1"}
+    client.post("/api/orders/", json=order_for(product), headers=headers)
+
+    response = client.post("/api/orders/", json=order_for(product, quantity=2), headers=headers)
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert client.get(f"/api/products/{product['id']}").json()["stock"] == 2
+
+
+def test_failed_request_releases_its_key(client, auth_headers, product, store):
+    """Test that errors are not stored: the retry runs again"""
+    headers = {**auth_headers, "Idempotency-Key": "checkout-1"}
+
+    response = client.post("/api/orders/", json=order_for(product, quantity=5), headers=headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    client.put(f"/api/products/{product['id']}", json={"stock": 10}, headers=auth_headers)
+    response = client.post("/api/orders/", json=order_for(product, quantity=5), headers=headers)
+    assert response.status_code == status.HTTP_201_CREATED
+    assert "idempotent-replayed" not in response.headers
+
+
+def test_keys_are_scoped_per_user(client, auth_headers, product, store):
+    """Test that two users sending the same key get their own orders"""
+    client.post("/api/auth/register", json={"email": "other@example.com", "username": "other", "password": "otherpassword"})
+    token = client.post("/api/auth/login", data={"username": "other", "password": "otherpassword"}).json()["access_token"]
+
+    mine = client.post("/api/orders/", json=order_for(product), headers={**auth_headers, "Idempotency-Key": "k"})
+    theirs = client.post(
+        "/api/orders/", json=order_for(product),
+        headers={"Authorization": f"Bearer {token}", "Idempotency-Key": "k"}
+    )
+
+    assert theirs.status_code == status.HTTP_201_CREATED
+    assert "idempotent-replayed" not in theirs.headers
+    assert theirs.json()["id"] != mine.json()["id"]
+
+
+@pytest.mark.parametrize("backend", ["database", "memory"])
+def test_duplicate_waits_for_the_request_in_flight(db_session, backend):
+    """Test that a concurrent duplicate waits until the original commits, then replays it"""
+    store = make_store(backend)
+    keys = Idempotency(store, wait_seconds=5, poll_interval=0.01)
+
+    async def duplicate_during_request():
+        claim = await keys.claim("orders:1", "k", {"n": 1})
+        waiter = asyncio.ensure_future(keys.claim("orders:1", "k", {"n": 1}))
+        await asyncio.sleep(0.1)
+        assert not waiter.done()
+        complete(store, claim, {"id": 7})
+        return await asyncio.wait_for(waiter, 5)
+
+    assert asyncio.run(duplicate_during_request()) == (201, {"id": 7})
+
+
+@pytest.mark.parametrize("backend", ["database", "memory"])
+def test_waits_time_out_and_dead_owners_lose_their_lock(db_session, backend):
+    """Test the 409 path, fingerprint checks and takeover after the lock lapses"""
+    store = make_store(backend)
+    keys = Idempotency(store, wait_seconds=0.05, poll_interval=0.01)
+    assert isinstance(asyncio.run(keys.claim("orders:1", "a", {"n": 1})), Claim)
+    for payload, status_code in [({"n": 1}, status.HTTP_409_CONFLICT), ({"n": 2}, status.HTTP_422_UNPROCESSABLE_ENTITY)]:
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(keys.claim("orders:1", "a", payload))
+        assert exc_info.value.status_code == status_code
+    with pytest.raises(KeyReuseError):
+        store.try_claim("orders:1:a", "other")
+    store.clear()
+
+    store = make_store(backend, lock_seconds=0)
+    store.try_claim("b", "fp")
+    assert isinstance(store.try_claim("b", "fp"), Claim)
+
+
+@pytest.mark.parametrize("backend", ["database", "memory"])
+def test_only_the_current_holder_completes(db_session, backend):
+    """Test that an owner whose lock lapsed cannot store over its successor, nor release it"""
+    store = make_store(backend, lock_seconds=0)
+    stalled = store.try_claim("a", "fp")
+    successor = store.try_claim("a", "fp")
+    assert stalled != successor
+
+    store.release(stalled)
+    with pytest.raises(ClaimLostError):
+        complete(store, stalled, {"id": 1})
+    complete(store, successor, {"id": 2})
+
+    assert store.try_claim("a", "fp") == (201, {"id": 2})
+
+
+@pytest.mark.parametrize("backend", ["database", "memory"])
+def test_response_is_only_stored_if_the_transaction_commits(db_session, backend):
+    """Test that a rolled back write leaves its key in flight, to be released or taken over"""
+    store = make_store(backend)
+    claim = store.try_claim("a", "fp")
+    with TestingSessionLocal() as db:
+        store.complete(db, claim, 201, {"id": 1})
+        db.rollback()
+
+    assert store.try_claim("a", "fp") is None
+    store.release(claim)
+    assert isinstance(store.try_claim("a", "fp"), Claim)
+
+
+def test_lost_claim_rolls_back_the_order(client, auth_headers, product, store, monkeypatch):
+    """Test that a request whose key was taken over places no order"""
+    async def claim_then_lose_it(scope, key, payload):
+        claim = store.try_claim(f"{scope}:{key}", "fp")
+        store.release(claim)
+        store.try_claim(f"{scope}:{key}", "fp")
+        return claim
+
+    monkeypatch.setattr(idempotency, "claim", claim_then_lose_it)
+    response = client.post("/api/orders/", json=order_for(product), headers={**auth_headers, "Idempotency-Key": "k"})
+
+    assert response.status_code == status.HTTP_409_CONFLICT
+    assert client.get(f"/api/products/{product['id']}").json()["stock"] == 3
+    with TestingSessionLocal() as db:
+        assert db.query(Order).count() == 0
+
+
+def test_keys_expire_after_the_ttl():
+    """Test that a stored response is forgotten once its TTL has passed"""
+    now = [0.0]
+    store = MemoryIdempotencyStore(ttl=60, lock_seconds=30, clock=lambda: now[0])
+    complete(store, store.try_claim("a", "fp"), {"id": 1})
+
+    now[0] = 59.0
+    assert store.try_claim("a", "fp") == StoredResponse(201, {"id": 1})
+    now[0] = 61.0
+    assert isinstance(store.try_claim("a", "other"), Claim)
+    assert len(store) == 1
@@ -0,0 +1,92 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.models.product import Product
+from app.schemas.order import OrderItem
+from app.services import inventory
+from app.services.inventory import (
+    InsufficientStockError,
+    ProductNotFoundError,
+    reserve_stock,
+)
+from tests.conftest import TestingSessionLocal
+
+
+@pytest.fixture
+def hot_product(db_session):
+    """Create a single product that every checkout competes for"""
+    product = Product(name="Hot SKU", price=10.0, stock=50, category="Deals")
+    db_session.add(product)
+    db_session.commit()
+    return product.id
+
+
+def _checkout(product_id, quantity=1):
+    """Reserve stock in an isolated session, as one worker would"""
+    db = TestingSessionLocal()
+    try:
+        reserve_stock(db, [OrderItem(product_id=product_id, quantity=quantity, price=10.0, name="Hot SKU")])
+        db.commit()
+        return True
+    except InsufficientStockError:
+        return False
+    finally:
+        db.close()
+
+
+def test_reserve_stock_unknown_product(db_session):
+    """Test that a missing product is reported by id"""
+    with pytest.raises(ProductNotFoundError) as exc_info:
+        reserve_stock(db_session, [OrderItem(product_id=404, quantity=1, price=1.0, name="Ghost")])
+    
+    assert exc_info.value.product_id == 404
+
+
+def test_retry_keeps_the_callers_earlier_work(db_session, hot_product, monkeypatch):
+    """Test that a retried lock conflict only rolls back the reservation's savepoint"""
+    attempts = []
+    reserve = inventory._reserve
+
+    def locked_once(db, quantities):
+        attempts.append(quantities)
+        result = reserve(db, quantities)
+        if len(attempts) == 1:
+            raise OperationalError("UPDATE products", {}, Exception("database is locked"))
+        return result
+
+    monkeypatch.setattr(inventory, "_reserve", locked_once)
+    db = TestingSessionLocal()
+    try:
+        db.add(Product(name="Written earlier", price=1.0, stock=1))
+        db.flush()
+        reserve_stock(db, [OrderItem(product_id=hot_product, quantity=5, price=10.0, name="Hot SKU")])
+        db.commit()
+    finally:
+        db.close()
+
+    db_session.expire_all()
+    assert len(attempts) == 2
+    assert db_session.get(Product, hot_product).stock == 45
+    assert db_session.query(Product).filter_by(name="Written earlier").count() == 1
+
+
+def test_concurrent_checkouts_never_oversell(db_session, hot_product):
+    """Test that hundreds of parallel checkouts on one SKU sell exactly the stock"""
+    attempts = 300
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        results = list(pool.map(lambda _: _checkout(hot_product), range(attempts)))
+    elapsed = time.perf_counter() - started
+    
+    db_session.expire_all()
+    product = db_session.get(Product, hot_product)
+    
+    assert results.count(True) == 50
+    assert results.count(False) == attempts - 50
+    assert product.stock == 0
+    # Losers fail fast on the conditional UPDATE instead of queueing on retries
+    assert elapsed < 30
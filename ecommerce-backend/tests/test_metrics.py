@@ -0,0 +1,99 @@
+import re
+
+import pytest
+from fastapi import status
+from sqlalchemy import event
+
+from app.utils.metrics import Histogram, metrics
+from app.utils.profiling import instrument_engine, uninstrument_engine
+
+
+@pytest.fixture
+def scrape(client, db_session):
+    """Fresh registry with the test engine instrumented; returns a /metrics reader"""
+    engine = db_session.get_bind()
+    metrics.clear()
+    instrument_engine(engine)
+
+    def read():
+        response = client.get("/metrics")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        return response.text
+
+    yield read
+    uninstrument_engine(engine)
+
+
+def sample(text, name, **labels):
+    """Value of one series in a scrape"""
+    series = name
+    if labels:
+        series += "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+    match = re.search(rf"^{re.escape(series)} (\S+)$", text, re.MULTILINE)
+    assert match, f"{series} not found"
+    return float(match.group(1))
+
+
+def test_requests_are_labelled_by_route_template(client, auth_headers, scrape):
+    """Test request counts per route template and status code"""
+    product = client.post("/api/products/", json={"name": "Kettle", "price": 30}, headers=auth_headers).json()
+    client.get(f"/api/products/{product['id']}")
+    client.get(f"/api/products/{product['id']}")
+    client.get("/api/products/999999")
+    client.get("/no/such/path")
+
+    text = scrape()
+
+    route = "/api/products/{product_id}"
+    assert sample(text, "http_requests_total", method="GET", route=route, status=200) == 2
+    assert sample(text, "http_requests_total", method="GET", route=route, status=404) == 1
+    assert sample(text, "http_requests_total", method="POST", route="/api/products/", status=201) == 1
+    assert sample(text, "http_requests_total", method="GET", route="<unmatched>", status=404) == 1
+    assert sample(text, "http_request_duration_seconds_count", method="GET", route=route) == 3
+    assert sample(text, "http_request_duration_seconds_bucket", method="GET", route=route, le="+Inf") == 3
+    assert f"/api/products/{product['id']}\"" not in text
+
+
+def test_queries_are_charged_to_the_request(client, scrape, db_session):
+    """Test that statements issued by a request are counted against its route"""
+    statements = []
+    engine = db_session.get_bind()
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        client.get("/api/products/", params={"category": "Kitchen"})
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    text = scrape()
+
+    labels = {"method": "GET", "route": "/api/products/"}
+    assert statements
+    assert sample(text, "db_queries_per_request_sum", **labels) == len(statements)
+    assert sample(text, "db_queries_per_request_count", **labels) == 1
+    assert sample(text, "db_query_duration_seconds_total", **labels) > 0
+
+
+def test_in_flight_and_pool_gauges(scrape):
+    """Test that the scrape counts itself in flight and reports pool gauges"""
+    text = scrape()
+
+    assert sample(text, "http_requests_in_flight") == 1
+    assert sample(text, "db_pool_checked_out", pool="primary") >= 0
+    assert "# TYPE http_request_duration_seconds histogram" in text
+
+
+def test_histogram_buckets_are_cumulative():
+    """Test bucket placement, including values on a bound and overflow"""
+    histogram = Histogram((1, 5))
+    for value in (0.5, 1, 3, 100):
+        histogram.observe(value)
+
+    assert list(histogram.samples("h", 'a="b"')) == [
+        'h_bucket{a="b",le="1"} 2',
+        'h_bucket{a="b",le="5"} 3',
+        'h_bucket{a="b",le="+Inf"} 4',
+        'h_sum{a="b"} 104.5',
+        'h_count{a="b"} 4',
+    ]
@@ -1,6 +1,14 @@
+import csv
+import io
+import json
+
 import pytest
 from fastapi import status
 
+from app.config.settings import settings
+from app.database.backfill import backfill_order_items
+from app.models.order import Order, OrderItem
+
 
 @pytest.fixture
 def sample_product(client, auth_headers):
@@ -78,6 +86,29 @@ def test_create_order_insufficient_stock(client, auth_headers, sample_product):
     assert "Insufficient stock" in response.json()["detail"]
 
 
+def test_insufficient_stock_reports_the_product_total(client, auth_headers, sample_product):
+    """Test the 400 detail for one line, and for a product split over several lines"""
+    def order(*quantities):
+        return {
+            "items": [
+                {"product_id": sample_product["id"], "quantity": quantity,
+                 "price": sample_product["price"], "name": sample_product["name"]}
+                for quantity in quantities
+            ],
+            "shipping_address": "123 Test Street"
+        }
+    
+    single = client.post("/api/orders/", json=order(200), headers=auth_headers)
+    assert single.json()["detail"] == (
+        f"Insufficient stock for product '{sample_product['name']}'. Available: 100, Requested: 200"
+    )
+    
+    # Each line fits on its own; together they do not
+    split = client.post("/api/orders/", json=order(60, 60), headers=auth_headers)
+    assert split.status_code == status.HTTP_400_BAD_REQUEST
+    assert split.json()["detail"].endswith("Available: 100, Requested: 120")
+
+
 def test_create_order_nonexistent_product(client, auth_headers):
     """Test creating order with non-existent product"""
     order_data = {
@@ -245,4 +276,346 @@ def test_cancel_completed_order(client, auth_headers, sample_product):
     # Try to cancel
     response = client.delete(f"/api/orders/{order_id}", headers=auth_headers)
     
-    assert response.status_code == status.HTTP_400_BAD_REQUEST
\ No newline at end of file
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+def test_create_order_multiple_products(client, auth_headers, sample_product):
+    """Test that every line item decrements its own product stock"""
+    other = client.post(
+        "/api/products/",
+        json={"name": "Other Product", "price": 5.0, "stock": 10, "category": "Books"},
+        headers=auth_headers
+    ).json()
+    order_data = {
+        "items": [
+            {
+                "product_id": sample_product["id"],
+                "quantity": 3,
+                "price": sample_product["price"],
+                "name": sample_product["name"]
+            },
+            {
+                "product_id": other["id"],
+                "quantity": 4,
+                "price": other["price"],
+                "name": other["name"]
+            },
+            {
+                "product_id": sample_product["id"],
+                "quantity": 2,
+                "price": sample_product["price"],
+                "name": sample_product["name"]
+            }
+        ],
+        "shipping_address": "123 Test Street"
+    }
+    
+    response = client.post("/api/orders/", json=order_data, headers=auth_headers)
+    
+    assert response.status_code == status.HTTP_201_CREATED
+    assert len(response.json()["items"]) == 3
+    assert client.get(f"/api/products/{sample_product['id']}").json()["stock"] == 95
+    assert client.get(f"/api/products/{other['id']}").json()["stock"] == 6
+
+
+def test_create_order_partial_failure_keeps_stock(client, auth_headers, sample_product):
+    """Test that a failing line item leaves the other products untouched"""
+    other = client.post(
+        "/api/products/",
+        json={"name": "Scarce Product", "price": 5.0, "stock": 1},
+        headers=auth_headers
+    ).json()
+    order_data = {
+        "items": [
+            {
+                "product_id": sample_product["id"],
+                "quantity": 5,
+                "price": sample_product["price"],
+                "name": sample_product["name"]
+            },
+            {
+                "product_id": other["id"],
+                "quantity": 2,
+                "price": other["price"],
+                "name": other["name"]
+            }
+        ],
+        "shipping_address": "123 Test Street"
+    }
+    
+    response = client.post("/api/orders/", json=order_data, headers=auth_headers)
+    
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "Scarce Product" in response.json()["detail"]
+    assert client.get(f"/api/products/{sample_product['id']}").json()["stock"] == 100
+    assert client.get(f"/api/products/{other['id']}").json()["stock"] == 1
+
+
+def test_bulk_cancel_orders(client, auth_headers, sample_product):
+    """Test cancelling several orders at once restores the combined stock"""
+    order_ids = []
+    for quantity in (1, 2, 3):
+        order_data = {
+            "items": [
+                {
+                    "product_id": sample_product["id"],
+                    "quantity": quantity,
+                    "price": sample_product["price"],
+                    "name": sample_product["name"]
+                }
+            ],
+            "shipping_address": "123 Test Street"
+        }
+        response = client.post("/api/orders/", json=order_data, headers=auth_headers)
+        order_ids.append(response.json()["id"])
+    
+    assert client.get(f"/api/products/{sample_product['id']}").json()["stock"] == 94
+    
+    response = client.post(
+        "/api/orders/cancel",
+        json={"order_ids": order_ids},
+        headers=auth_headers
+    )
+    
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert [order["id"] for order in data] == order_ids
+    assert all(order["status"] == "cancelled" for order in data)
+    assert client.get(f"/api/products/{sample_product['id']}").json()["stock"] == 100
+
+
+def test_bulk_cancel_is_all_or_nothing(client, auth_headers, sample_product):
+    """Test that one non-cancellable order aborts the whole bulk cancel"""
+    order_data = {
+        "items": [
+            {
+                "product_id": sample_product["id"],
+                "quantity": 2,
+                "price": sample_product["price"],
+                "name": sample_product["name"]
+            }
+        ],
+        "shipping_address": "123 Test Street"
+    }
+    first_id = client.post("/api/orders/", json=order_data, headers=auth_headers).json()["id"]
+    second_id = client.post("/api/orders/", json=order_data, headers=auth_headers).json()["id"]
+    client.put(f"/api/orders/{second_id}", json={"status": "completed"}, headers=auth_headers)
+    
+    response = client.post(
+        "/api/orders/cancel",
+        json={"order_ids": [first_id, second_id]},
+        headers=auth_headers
+    )
+    
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert client.get(f"/api/orders/{first_id}", headers=auth_headers).json()["status"] == "pending"
+    assert client.get(f"/api/products/{sample_product['id']}").json()["stock"] == 96
+
+
+def test_cursor_pagination_orders(client, auth_headers, sample_product):
+    """Test paging through order history with keyset cursors"""
+    order_data = {
+        "items": [
+            {
+                "product_id": sample_product["id"],
+                "quantity": 1,
+                "price": sample_product["price"],
+                "name": sample_product["name"]
+            }
+        ],
+        "shipping_address": "123 Test Street"
+    }
+    created = [
+        client.post("/api/orders/", json=order_data, headers=auth_headers).json()["id"]
+        for _ in range(3)
+    ]
+    
+    first = client.get("/api/orders/", params={"after": "", "limit": 2}, headers=auth_headers).json()
+    second = client.get(
+        "/api/orders/",
+        params={"after": first["next_cursor"], "limit": 2},
+        headers=auth_headers
+    ).json()
+    
+    assert [order["id"] for order in first["items"] + second["items"]] == created
+    assert second["next_cursor"] is None
+
+
+@pytest.mark.parametrize("export_format", ["ndjson", "csv"])
+def test_export_orders(client, auth_headers, sample_product, monkeypatch, export_format):
+    """Test streaming the user's order history across cursor batches"""
+    monkeypatch.setattr(settings, "ORDER_EXPORT_BATCH_SIZE", 2)
+    order_data = {
+        "items": [
+            {
+                "product_id": sample_product["id"],
+                "quantity": 1,
+                "price": sample_product["price"],
+                "name": sample_product["name"]
+            }
+        ],
+        "shipping_address": "123 Test Street"
+    }
+    created = [
+        client.post("/api/orders/", json=order_data, headers=auth_headers).json()
+        for _ in range(3)
+    ]
+    
+    # Another user's orders stay out of the export
+    client.post("/api/auth/register", json={
+        "email": "other@example.com", "username": "other", "password": "otherpassword123"
+    })
+    token = client.post("/api/auth/login", data={"username": "other", "password": "otherpassword123"}).json()
+    client.post("/api/orders/", json=order_data, headers={"Authorization": f"Bearer {token['access_token']}"})
+    
+    response = client.get("/api/orders/export", params={"format": export_format}, headers=auth_headers)
+    
+    assert response.status_code == status.HTTP_200_OK
+    if export_format == "ndjson":
+        rows = [json.loads(line) for line in response.text.splitlines()]
+    else:
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        for row in rows:
+            row["id"], row["items"] = int(row["id"]), json.loads(row["items"])
+    assert [row["id"] for row in rows] == [order["id"] for order in created]
+    assert rows[0]["items"] == created[0]["items"]
+    assert rows[0]["created_at"] == created[0]["created_at"]
+
+
+
+def test_order_listing_loads_items_in_one_query(client, auth_headers, sample_product, query_budget):
+    """Test that listing orders loads their line items without N+1 queries"""
+    order_data = {
+        "items": [
+            {
+                "product_id": sample_product["id"],
+                "quantity": 1,
+                "price": sample_product["price"],
+                "name": sample_product["name"]
+            }
+        ],
+        "shipping_address": "123 Test Street"
+    }
+    for _ in range(5):
+        client.post("/api/orders/", json=order_data, headers=auth_headers)
+    
+    with query_budget(2) as queries:
+        response = client.get("/api/orders/", headers=auth_headers)
+    
+    assert [len(order["items"]) for order in response.json()] == [1] * 5
+    assert len([s for s in queries.statements if "FROM order_items" in s]) == 1
+
+
+@pytest.fixture
+def catalog_of_20(client, auth_headers):
+    """Twenty products, one per line of a large order"""
+    return [
+        client.post(
+            "/api/products/",
+            json={"name": f"Part {index}", "price": 2.5, "stock": 50, "category": f"Bin {index % 4}"},
+            headers=auth_headers
+        ).json()
+        for index in range(20)
+    ]
+
+
+def order_for(products):
+    return {
+        "items": [
+            {"product_id": product["id"], "quantity": 1, "price": product["price"], "name": product["name"]}
+            for product in products
+        ],
+        "shipping_address": "123 Test Street"
+    }
+
+
+def test_create_order_query_budget(client, auth_headers, catalog_of_20, query_budget):
+    """Test that placing an order costs a fixed number of queries, however many lines it has"""
+    # Includes the outbox INSERT; consumers of the order add nothing here.
+    # The reservation's savepoint (and on SQLite its BEGIN IMMEDIATE) adds three
+    with query_budget(14) as single:
+        client.post("/api/orders/", json=order_for(catalog_of_20[:1]), headers=auth_headers)
+    
+    with query_budget(14) as large:
+        response = client.post("/api/orders/", json=order_for(catalog_of_20), headers=auth_headers)
+    
+    assert response.status_code == status.HTTP_201_CREATED
+    assert len(response.json()["items"]) == 20
+    assert len(large) == len(single)
+
+
+def test_cancel_order_query_budget(client, auth_headers, catalog_of_20, query_budget):
+    """Test that restoring stock for a 20-line order is batched"""
+    order_id = client.post("/api/orders/", json=order_for(catalog_of_20), headers=auth_headers).json()["id"]
+    
+    with query_budget(8):
+        response = client.delete(f"/api/orders/{order_id}", headers=auth_headers)
+    
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert client.get(f"/api/products/{catalog_of_20[0]['id']}").json()["stock"] == 50
+
+
+def test_bulk_cancel_query_budget(client, auth_headers, catalog_of_20, query_budget):
+    """Test that bulk cancellation does not issue queries per order"""
+    order_ids = [
+        client.post("/api/orders/", json=order_for(catalog_of_20[i:i + 4]), headers=auth_headers).json()["id"]
+        for i in range(0, 20, 4)
+    ]
+    
+    with query_budget(10):
+        response = client.post("/api/orders/cancel", json={"order_ids": order_ids}, headers=auth_headers)
+    
+    assert [order["status"] for order in response.json()] == ["cancelled"] * 5
+
+
+def test_order_reads_query_budget(client, auth_headers, catalog_of_20, query_budget):
+    """Test that order detail and status updates stay within their budgets"""
+    order_id = client.post("/api/orders/", json=order_for(catalog_of_20), headers=auth_headers).json()["id"]
+    
+    with query_budget(2):
+        client.get(f"/api/orders/{order_id}", headers=auth_headers)
+    
+    with query_budget(6):
+        response = client.put(f"/api/orders/{order_id}", json={"status": "processing"}, headers=auth_headers)
+    
+    assert response.json()["status"] == "processing"
+
+
+def test_backfill_order_items(client, auth_headers, sample_product, db_session):
+    """Test converting legacy JSON line items into order_items"""
+    user_id = client.get("/api/auth/me", headers=auth_headers).json()["id"]
+    legacy = [
+        {"product_id": sample_product["id"], "name": "Test Product", "quantity": 2, "price": 29.99},
+        {"product_id": 999, "name": "Deleted Product", "quantity": 1, "price": 5.0},
+    ]
+    for _ in range(3):
+        db_session.add(Order(user_id=user_id, total_amount=64.98, shipping_address="1 Legacy Road", items_json=legacy))
+    db_session.commit()
+    
+    engine = db_session.get_bind()
+    assert backfill_order_items(engine, batch_size=2) == 3
+    assert backfill_order_items(engine, batch_size=2) == 0
+    
+    orders = client.get("/api/orders/", headers=auth_headers).json()
+    assert [
+        (item["product_id"], item["name"], item["quantity"]) for item in orders[0]["items"]
+    ] == [(sample_product["id"], "Test Product", 2), (None, "Deleted Product", 1)]
+    
+    # Cancelling a backfilled order restocks from its line items
+    client.delete(f"/api/orders/{orders[0]['id']}", headers=auth_headers)
+    assert client.get(f"/api/products/{sample_product['id']}").json()["stock"] == 102
+
+
+def test_orders_not_yet_backfilled_use_their_json_items(client, auth_headers, sample_product, db_session):
+    """Test that a legacy order without order_items rows still shows and restocks its lines"""
+    user_id = client.get("/api/auth/me", headers=auth_headers).json()["id"]
+    legacy = [{"product_id": sample_product["id"], "name": "Test Product", "quantity": 2, "price": 29.99}]
+    order = Order(user_id=user_id, total_amount=59.98, shipping_address="1 Legacy Road", items_json=legacy)
+    db_session.add(order)
+    db_session.commit()
+    
+    response = client.get(f"/api/orders/{order.id}", headers=auth_headers)
+    assert [(item["product_id"], item["quantity"]) for item in response.json()["items"]] == [(sample_product["id"], 2)]
+    
+    client.delete(f"/api/orders/{order.id}", headers=auth_headers)
+    assert client.get(f"/api/products/{sample_product['id']}").json()["stock"] == 102
+    assert db_session.query(OrderItem).count() == 0
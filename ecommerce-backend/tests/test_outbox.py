@@ -0,0 +1,178 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import status
+
+from app.config.settings import settings
+from app.models.outbox import OutboxEvent
+from app.services import outbox
+from app.services.outbox import ORDER_PLACED, OutboxDispatcher, dispatch_batch, purge_dispatched
+from tests.conftest import TestingSessionLocal
+
+
+@pytest.fixture
+def product(client, auth_headers):
+    response = client.post(
+        "/api/products/",
+        json={"name": "Teapot", "price": 15.0, "stock": 5, "category": "Kitchen"},
+        headers=auth_headers
+    )
+    return response.json()
+
+
+@pytest.fixture
+def received():
+    """Payloads delivered to an order.placed handler; ``fail`` makes it raise"""
+    payloads = []
+
+    def handler(payload):
+        if received_state["fail"]:
+            raise RuntimeError("mail server down")
+        payloads.append(payload)
+
+    received_state = {"fail": 0}
+    outbox.subscribe(ORDER_PLACED)(handler)
+    yield payloads, received_state
+    outbox.unsubscribe(ORDER_PLACED, handler)
+
+
+def place(client, auth_headers, product, quantity=1):
+    return client.post("/api/orders/", json={
+        "items": [{"product_id": product["id"], "quantity": quantity, "price": product["price"], "name": product["name"]}],
+        "shipping_address": "123 Test Street"
+    }, headers=auth_headers)
+
+
+def test_order_writes_its_event_in_the_same_transaction(client, auth_headers, product, db_session, received):
+    """Test that checkout queues an event without running any handler"""
+    order = place(client, auth_headers, product).json()
+    place(client, auth_headers, product, quantity=50)
+
+    events = db_session.query(OutboxEvent).all()
+    assert [(event.topic, event.status) for event in events] == [(ORDER_PLACED, "pending")]
+    assert events[0].payload["order_id"] == order["id"]
+    assert events[0].payload["items"][0]["quantity"] == 1
+    assert received[0] == []
+
+
+def test_dispatch_delivers_and_marks_events(client, auth_headers, product, db_session, received):
+    """Test that a batch reaches the handlers once"""
+    place(client, auth_headers, product)
+    place(client, auth_headers, product)
+
+    with TestingSessionLocal() as db:
+        assert dispatch_batch(db, batch_size=10) == 2
+        assert dispatch_batch(db, batch_size=10) == 0
+
+    payloads, _ = received
+    assert [payload["total_amount"] for payload in payloads] == [15.0, 15.0]
+    assert {event.status for event in db_session.query(OutboxEvent)} == {"dispatched"}
+
+
+def test_failed_events_back_off_then_die(client, auth_headers, product, db_session, received, monkeypatch):
+    """Test retry scheduling, recovery, and giving up after the last attempt"""
+    monkeypatch.setattr(settings, "OUTBOX_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(settings, "OUTBOX_RETRY_BACKOFF_SECONDS", 10)
+    payloads, state = received
+    place(client, auth_headers, product)
+    now = datetime.utcnow()
+
+    state["fail"] = 1
+    with TestingSessionLocal() as db:
+        assert dispatch_batch(db, 10, now=now) == 1
+        event = db.query(OutboxEvent).one()
+        assert (event.status, event.attempts) == ("pending", 1)
+        assert event.last_error == "RuntimeError: mail server down"
+        assert now <= event.available_at <= now + timedelta(seconds=10)
+
+        # Not due before its backoff has passed
+        assert dispatch_batch(db, 10, now=now - timedelta(seconds=1)) == 0
+        dispatch_batch(db, 10, now=now + timedelta(seconds=60))
+        dispatch_batch(db, 10, now=now + timedelta(seconds=120))
+        db.refresh(event)
+        assert (event.status, event.attempts) == ("dead", 3)
+        assert dispatch_batch(db, 10, now=now + timedelta(days=1)) == 0
+
+    state["fail"] = 0
+    place(client, auth_headers, product)
+    with TestingSessionLocal() as db:
+        dispatch_batch(db, 10)
+    assert len(payloads) == 1
+
+
+def test_dispatcher_task_drains_in_the_background(client, auth_headers, product, db_session, received):
+    """Test the asyncio dispatcher: batches back to back, then polling"""
+    for _ in range(5):
+        place(client, auth_headers, product)
+    dispatcher = OutboxDispatcher(TestingSessionLocal, batch_size=2, poll_interval=0.01)
+
+    async def run_briefly():
+        dispatcher.start()
+        for _ in range(200):
+            if len(received[0]) == 5:
+                break
+            await asyncio.sleep(0.01)
+        await dispatcher.stop()
+
+    asyncio.run(run_briefly())
+
+    assert len(received[0]) == 5
+    assert dispatcher.drain() == 0
+
+
+def test_events_without_handlers_stay_pending(db_session):
+    """Test that nothing is marked dispatched when no handler is subscribed"""
+    outbox.publish(db_session, "product.unhandled", [{"product_id": 1}])
+    db_session.commit()
+
+    with TestingSessionLocal() as db:
+        assert dispatch_batch(db, batch_size=10) == 0
+
+    event = db_session.query(OutboxEvent).one()
+    assert (event.status, event.attempts) == ("pending", 0)
+
+
+def test_stop_waits_for_the_batch_in_flight(client, auth_headers, product, db_session):
+    """Test that a batch delivered while stopping is committed, not redelivered"""
+    place(client, auth_headers, product)
+    entered = threading.Event()
+    delivered = []
+
+    def slow_handler(payload):
+        entered.set()
+        time.sleep(0.2)
+        delivered.append(payload)
+
+    outbox.subscribe(ORDER_PLACED)(slow_handler)
+    dispatcher = OutboxDispatcher(TestingSessionLocal, batch_size=10, poll_interval=0.01)
+
+    async def stop_mid_batch():
+        dispatcher.start()
+        while not entered.is_set():
+            await asyncio.sleep(0.01)
+        await dispatcher.stop()
+
+    try:
+        asyncio.run(stop_mid_batch())
+        assert len(delivered) == 1
+        assert {event.status for event in db_session.query(OutboxEvent)} == {"dispatched"}
+        assert dispatcher.drain() == 0
+    finally:
+        outbox.unsubscribe(ORDER_PLACED, slow_handler)
+
+
+def test_purge_keeps_dead_and_recent_events(client, auth_headers, product, db_session):
+    """Test that only dispatched events older than the cutoff are purged"""
+    for _ in range(3):
+        place(client, auth_headers, product)
+    events = db_session.query(OutboxEvent).order_by(OutboxEvent.id).all()
+    long_ago = datetime.utcnow() - timedelta(days=2)
+    events[0].status, events[0].dispatched_at = "dispatched", long_ago
+    events[1].status = "dead"
+    db_session.commit()
+
+    assert purge_dispatched(db_session, datetime.utcnow() - timedelta(days=1)) == 1
+    assert db_session.query(OutboxEvent).count() == 2
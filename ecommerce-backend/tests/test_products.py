@@ -1,6 +1,11 @@
+from datetime import datetime
+
 import pytest
 from fastapi import status
 
+from app.utils.http_cache import http_date
+from app.utils.pagination import encode_cursor
+
 
 @pytest.fixture
 def sample_product():
@@ -177,4 +182,214 @@ def test_filter_products_by_category(client, auth_headers):
     assert response.status_code == status.HTTP_200_OK
     data = response.json()
     assert len(data) == 1
-    assert data[0]["category"] == "Electronics"
\ No newline at end of file
+    assert data[0]["category"] == "Electronics"
+
+def test_cursor_pagination_products(client, auth_headers, sample_product):
+    """Test walking the catalog with keyset cursors"""
+    for index in range(5):
+        client.post(
+            "/api/products/",
+            json={**sample_product, "name": f"Product {index}"},
+            headers=auth_headers
+        )
+    
+    seen = []
+    after = ""
+    while after is not None:
+        response = client.get("/api/products/", params={"after": after, "limit": 2})
+        assert response.status_code == status.HTTP_200_OK
+        page = response.json()
+        seen.extend(product["name"] for product in page["items"])
+        after = page["next_cursor"]
+    
+    assert seen == [f"Product {index}" for index in range(5)]
+
+
+def test_cursor_pagination_invalid_cursor(client):
+    """Test that a malformed cursor is rejected"""
+    response = client.get("/api/products/", params={"after": "not-a-cursor"})
+    
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.parametrize("values,sort", [
+    ([{"a": 1}], None),
+    (["x"], None),
+    ([True], None),
+    # A cursor minted for sort=price, replayed with sort=name
+    ([12.5, 3], "name"),
+])
+def test_cursor_pagination_rejects_mistyped_values(client, values, sort):
+    """Test that cursor values must match their sort columns' types"""
+    params = {"after": encode_cursor(values)}
+    if sort:
+        params["sort"] = sort
+    
+    response = client.get("/api/products/", params=params)
+    
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+def test_get_product_conditional_request(client, auth_headers, sample_product):
+    """Test ETag and Last-Modified revalidation of a single product"""
+    product_id = client.post("/api/products/", json=sample_product, headers=auth_headers).json()["id"]
+    
+    first = client.get(f"/api/products/{product_id}")
+    etag = first.headers["etag"]
+    
+    assert first.headers["last-modified"]
+    
+    cached = client.get(f"/api/products/{product_id}", headers={"If-None-Match": etag})
+    assert cached.status_code == status.HTTP_304_NOT_MODIFIED
+    assert cached.content == b""
+    
+    since = client.get(
+        f"/api/products/{product_id}",
+        headers={"If-Modified-Since": first.headers["last-modified"]}
+    )
+    assert since.status_code == status.HTTP_304_NOT_MODIFIED
+    
+    client.put(f"/api/products/{product_id}", json={"price": 49.99}, headers=auth_headers)
+    
+    changed = client.get(f"/api/products/{product_id}", headers={"If-None-Match": etag})
+    assert changed.status_code == status.HTTP_200_OK
+    assert changed.headers["etag"] != etag
+
+
+def test_get_products_conditional_request(client, auth_headers, sample_product):
+    """Test that listing ETags change when the filtered catalog changes"""
+    client.post("/api/products/", json=sample_product, headers=auth_headers)
+    
+    etag = client.get("/api/products/", params={"category": "Electronics"}).headers["etag"]
+    
+    cached = client.get(
+        "/api/products/",
+        params={"category": "Electronics"},
+        headers={"If-None-Match": etag}
+    )
+    assert cached.status_code == status.HTTP_304_NOT_MODIFIED
+    
+    client.post("/api/products/", json={**sample_product, "name": "Another"}, headers=auth_headers)
+    
+    changed = client.get(
+        "/api/products/",
+        params={"category": "Electronics"},
+        headers={"If-None-Match": etag}
+    )
+    assert changed.status_code == status.HTTP_200_OK
+    assert len(changed.json()) == 2
+
+
+def test_get_products_has_no_last_modified(client, auth_headers, sample_product):
+    """Test that a delete is not hidden by If-Modified-Since on listings"""
+    product_id = client.post("/api/products/", json=sample_product, headers=auth_headers).json()["id"]
+    client.post("/api/products/", json={**sample_product, "name": "Another"}, headers=auth_headers)
+    
+    first = client.get("/api/products/")
+    assert "last-modified" not in first.headers
+    
+    client.delete(f"/api/products/{product_id}", headers=auth_headers)
+    
+    after_delete = client.get("/api/products/", headers={"If-Modified-Since": http_date(datetime.utcnow())})
+    assert after_delete.status_code == status.HTTP_200_OK
+    assert len(after_delete.json()) == 1
+
+
+@pytest.fixture
+def faceted_catalog(client, auth_headers):
+    """Products spread over categories, prices and stock levels"""
+    products = [
+        ("Cable", "Electronics", 9.0, 5),
+        ("Mouse", "Electronics", 30.0, 0),
+        ("Monitor", "Electronics", 300.0, 2),
+        ("Novel", "Books", 15.0, 8),
+        ("Atlas", "Books", 60.0, 0),
+    ]
+    for name, category, price, stock in products:
+        client.post(
+            "/api/products/",
+            json={"name": name, "category": category, "price": price, "stock": stock},
+            headers=auth_headers
+        )
+
+
+def listing_names(client, **params):
+    response = client.get("/api/products/", params=params)
+    assert response.status_code == status.HTTP_200_OK, response.text
+    return [product["name"] for product in response.json()]
+
+
+def test_get_products_filters(client, faceted_catalog):
+    """Test price range and availability filters"""
+    assert listing_names(client, min_price=10, max_price=100) == ["Mouse", "Novel", "Atlas"]
+    assert listing_names(client, in_stock=True, category="Electronics") == ["Cable", "Monitor"]
+    assert listing_names(client, in_stock=False) == ["Mouse", "Atlas"]
+
+
+def test_get_products_sort(client, faceted_catalog):
+    """Test sort options"""
+    assert listing_names(client, sort="price") == ["Cable", "Novel", "Mouse", "Atlas", "Monitor"]
+    assert listing_names(client, sort="-price", limit=2) == ["Monitor", "Atlas"]
+    assert listing_names(client, sort="name", category="Books") == ["Atlas", "Novel"]
+    assert listing_names(client, sort="-created_at")[0] == "Atlas"
+    
+    response = client.get("/api/products/", params={"sort": "stock"})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.parametrize("sort", ["-price", "created_at"])
+def test_cursor_pagination_with_sort(client, faceted_catalog, sort):
+    """Test that cursors follow the requested sort key"""
+    expected = listing_names(client, sort=sort)
+    
+    seen, after = [], ""
+    while after is not None:
+        page = client.get("/api/products/", params={"sort": sort, "limit": 2, "after": after}).json()
+        seen.extend(product["name"] for product in page["items"])
+        after = page["next_cursor"]
+    
+    assert seen == expected
+
+
+def test_get_products_facets(client, faceted_catalog):
+    """Test category and price bucket counts of the filtered listing"""
+    response = client.get("/api/products/", params={"facets": True, "max_price": 100, "limit": 2})
+    
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert len(data["items"]) == 2
+    assert data["next_cursor"] is None
+    assert data["facets"]["categories"] == [
+        {"value": "Books", "count": 2},
+        {"value": "Electronics", "count": 2},
+    ]
+    counts = {bucket["min"]: bucket["count"] for bucket in data["facets"]["price"]}
+    assert counts == {0: 2, 25: 1, 50: 1, 100: 0, 250: 0, 500: 0, 1000: 0}
+    assert data["facets"]["price"][-1]["max"] is None
+
+
+def test_product_query_budgets(client, auth_headers, sample_product, faceted_catalog, query_budget):
+    """Test query budgets of product reads and writes (cached reads cost nothing)"""
+    with query_budget(2):
+        client.get("/api/products/")
+    
+    with query_budget(0):
+        client.get("/api/products/")
+    
+    with query_budget(3):
+        client.get("/api/products/", params={"facets": True, "after": ""})
+    
+    with query_budget(2):
+        product_id = client.post("/api/products/", json=sample_product, headers=auth_headers).json()["id"]
+    
+    with query_budget(1):
+        client.get(f"/api/products/{product_id}")
+    
+    with query_budget(3):
+        client.put(f"/api/products/{product_id}", json={"stock": 5}, headers=auth_headers)
+    
+    with query_budget(2):
+        response = client.delete(f"/api/products/{product_id}", headers=auth_headers)
+    
+    assert response.status_code == status.HTTP_204_NO_CONTENT
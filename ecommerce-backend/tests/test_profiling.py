@@ -0,0 +1,103 @@
+import logging
+
+import pytest
+from fastapi import status
+
+from app.config.settings import settings
+from app.utils.profiling import instrument_engine, normalize_statement, parameter_shape, statement_stats, uninstrument_engine
+
+
+@pytest.fixture
+def profiled(db_session):
+    """Instrument the test engine and start from empty statement stats"""
+    engine = db_session.get_bind()
+    statement_stats.clear()
+    instrument_engine(engine)
+    yield
+    uninstrument_engine(engine)
+    statement_stats.clear()
+
+
+@pytest.fixture
+def order_data(client, auth_headers):
+    """Order payload for a freshly created product"""
+    product = client.post("/api/products/", json={"name": "Mug", "price": 8, "stock": 10}, headers=auth_headers).json()
+    return {
+        "items": [{"product_id": product["id"], "name": "Mug", "quantity": 1, "price": 8}],
+        "shipping_address": "1 Profiling Plaza"
+    }
+
+
+@pytest.mark.parametrize("statement, expected", [
+    ("SELECT * FROM products WHERE id = ?", "SELECT * FROM products WHERE id = ?"),
+    ("SELECT *\n  FROM products WHERE id IN (?, ?, ?)", "SELECT * FROM products WHERE id IN (...)"),
+    ("SELECT * FROM t WHERE a = %(a_1)s AND b = $2 LIMIT 10", "SELECT * FROM t WHERE a = ? AND b = ? LIMIT ?"),
+    ("SELECT name::text FROM t WHERE s = 'it''s'", "SELECT name::text FROM t WHERE s = ?"),
+])
+def test_normalize_statement(statement, expected):
+    """Test that literals, placeholders and IN lists are folded"""
+    assert normalize_statement(statement) == expected
+
+
+def test_parameter_shape_hides_values():
+    """Test that only names and types of parameters are reported"""
+    assert parameter_shape({"email": "a@b.c", "id": 3}) == "{email: str, id: int}"
+    assert parameter_shape(("secret", 1.5)) == "(str, float)"
+    assert parameter_shape([(1,), (2,)], executemany=True) == "2 x (int)"
+
+
+def test_slow_queries_are_logged_with_route(client, auth_headers, order_data, profiled, monkeypatch, caplog):
+    """Test that statements over the threshold are logged with their route"""
+    monkeypatch.setattr(settings, "SLOW_QUERY_THRESHOLD_MS", 0)
+    
+    with caplog.at_level(logging.WARNING, logger="app.sql.slow"):
+        response = client.post("/api/orders/", json=order_data, headers=auth_headers)
+    
+    assert response.status_code == status.HTTP_201_CREATED
+    messages = [record.getMessage() for record in caplog.records if record.name == "app.sql.slow"]
+    assert messages
+    assert all("route=/api/orders/" in message for message in messages)
+    assert any("INSERT INTO orders" in message for message in messages)
+    assert "1 Profiling Plaza" not in "".join(messages)
+
+
+def test_server_timing_header(client, auth_headers, order_data, profiled, monkeypatch):
+    """Test the optional Server-Timing header with db time and query count"""
+    assert "server-timing" not in client.get("/health").headers
+    monkeypatch.setattr(settings, "SERVER_TIMING_ENABLED", True)
+    
+    response = client.post("/api/orders/", json=order_data, headers=auth_headers)
+    
+    timing = response.headers["server-timing"]
+    assert timing.startswith("db;dur=")
+    assert 'desc="' in timing and "queries" in timing
+    assert int(timing.split('desc="')[1].split()[0]) > 0
+    assert "app;dur=" in timing
+
+
+def test_slowest_statements_debug_only(client, profiled, monkeypatch):
+    """Test that the slowest-statement report needs DEBUG and groups by route"""
+    assert client.get("/debug/sql/slowest").status_code == status.HTTP_404_NOT_FOUND
+    monkeypatch.setattr(settings, "DEBUG", True)
+    
+    client.get("/api/products/1")
+    client.get("/api/products/2")
+    response = client.get("/debug/sql/slowest", params={"limit": 5, "by": "max"})
+    
+    assert response.status_code == status.HTTP_200_OK
+    statements = response.json()["statements"]
+    lookup = next(s for s in statements if "FROM products" in s["statement"])
+    assert lookup["calls"] == 2
+    assert lookup["routes"] == ["/api/products/{product_id}"]
+
+
+def test_query_budget_lists_offending_statements(client, query_budget):
+    """Test that an exceeded budget fails with the statements it counted"""
+    with pytest.raises(pytest.fail.Exception) as failure:
+        with query_budget(0):
+            client.get("/api/products/1")
+    
+    message = str(failure.value)
+    assert message.startswith("1 queries issued, budget is 0")
+    assert "1. SELECT products.id" in message
+    assert "-- params (int" in message
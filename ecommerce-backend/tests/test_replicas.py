@@ -0,0 +1,175 @@
+import pytest
+from fastapi import status
+from jose import jwt
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.database import replicas as routing
+from app.database.connection import Base
+from app.database.replicas import (
+    WRITE_MARKER_COOKIE, RecentWriters, ReplicaSet, WriteMarkers, recent_writers, write_markers
+)
+from app.models.product import Product
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable clock for the read-your-writes window"""
+    now = [1000.0]
+    monkeypatch.setattr(recent_writers, "clock", lambda: now[0])
+    monkeypatch.setattr(recent_writers, "_writes", {})
+    monkeypatch.setattr(write_markers, "clock", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def replica(tmp_path, monkeypatch):
+    """A second SQLite file standing in for a read replica"""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'replica.db'}", connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        session.add(Product(name="Replica Product", price=1.0, stock=1, category="Replica"))
+        session.commit()
+
+    monkeypatch.setattr(routing, "replicas", ReplicaSet([engine], retry_after=30))
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def order_data(client, auth_headers):
+    """Order payload for a product created on the primary"""
+    product = client.post(
+        "/api/products/",
+        json={"name": "Primary Product", "price": 5.0, "stock": 10},
+        headers=auth_headers
+    ).json()
+    return {
+        "items": [{"product_id": product["id"], "name": product["name"], "quantity": 1, "price": 5.0}],
+        "shipping_address": "1 Replica Way"
+    }
+
+
+def product_names(response):
+    return [product["name"] for product in response.json()]
+
+
+def test_replica_set_round_robin_and_health():
+    """Test rotation over replicas, skipping failed ones until retry time"""
+    now = [0.0]
+    replica_set = ReplicaSet(["a", "b"], retry_after=10, clock=lambda: now[0])
+
+    assert replica_set.candidates() == ["a", "b"]
+    assert replica_set.candidates() == ["b", "a"]
+
+    replica_set.mark_down("a")
+    assert replica_set.candidates() == ["b"]
+    assert replica_set.candidates() == ["b"]
+
+    now[0] = 11
+    assert sorted(replica_set.candidates()) == ["a", "b"]
+    assert replica_set.failures == 1
+
+
+def test_recent_writers_window():
+    """Test that writes are remembered for the configured window only"""
+    now = [0.0]
+    writers = RecentWriters(window=5, clock=lambda: now[0])
+
+    writers.note("alice")
+    writers.note(None)
+
+    assert writers.is_recent("alice")
+    assert not writers.is_recent("bob")
+    assert not writers.is_recent(None)
+
+    now[0] = 5
+    assert not writers.is_recent("alice")
+
+
+def test_write_markers_are_signed_and_expire():
+    """Test that a marker only counts for its own principal, unaltered, within the window"""
+    now = [0.0]
+    markers = WriteMarkers(window=5, secret="secret", clock=lambda: now[0])
+    marker = markers.issue("alice")
+
+    assert markers.is_recent("alice", marker)
+    assert not markers.is_recent("bob", marker)
+    assert not markers.is_recent(None, marker)
+    assert not markers.is_recent("alice", None)
+    assert not markers.is_recent("alice", "9" + marker)
+    assert not WriteMarkers(window=5, secret="other", clock=lambda: now[0]).is_recent("alice", marker)
+
+    now[0] = 5
+    assert not markers.is_recent("alice", marker)
+
+
+def test_reads_go_to_replica(client, replica):
+    """Test that anonymous catalog reads are served by the replica"""
+    response = client.get("/api/products/")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert product_names(response) == ["Replica Product"]
+
+
+def test_read_your_writes(clock, client, auth_headers, replica, order_data):
+    """Test that a user reads the primary right after their own write"""
+    response = client.post("/api/orders/", json=order_data, headers=auth_headers)
+    assert response.status_code == status.HTTP_201_CREATED
+
+    assert len(client.get("/api/orders/", headers=auth_headers).json()) == 1
+
+    # Once the window has passed, reads go back to the (empty) replica
+    clock[0] += 10
+    assert client.get("/api/orders/", headers=auth_headers).json() == []
+
+
+def test_read_your_writes_across_workers(clock, client, auth_headers, replica, order_data):
+    """Test that the write marker cookie pins reads served by a process that missed the write"""
+    response = client.post("/api/orders/", json=order_data, headers=auth_headers)
+    assert WRITE_MARKER_COOKIE in response.cookies
+
+    # Another worker: it never saw the write
+    recent_writers._writes.clear()
+    assert len(client.get("/api/orders/", headers=auth_headers).json()) == 1
+
+    # Without the cookie, the read goes to the replica
+    client.cookies.clear()
+    assert client.get("/api/orders/", headers=auth_headers).json() == []
+
+
+def test_failed_and_forged_writes_pin_nothing(clock, client, auth_headers, replica, order_data):
+    """Test that only authenticated, successful writes pin the writer's reads"""
+    forged = jwt.encode({"sub": "testuser"}, "not-the-secret", algorithm="HS256")
+    recent_writers._writes.clear()
+    response = client.post("/api/orders/", json=order_data, headers={"Authorization": f"Bearer {forged}"})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert not recent_writers.is_recent("testuser")
+
+    order_data["items"][0]["quantity"] = 1000
+    response = client.post("/api/orders/", json=order_data, headers=auth_headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert WRITE_MARKER_COOKIE not in response.cookies
+
+
+def test_sticky_reads_skip_stale_cache(clock, client, auth_headers, replica, order_data):
+    """Test that a replica-filled cache entry does not hide the writer's change"""
+    assert product_names(client.get("/api/products/")) == ["Replica Product"]
+
+    assert product_names(client.get("/api/products/", headers=auth_headers)) == ["Primary Product"]
+
+
+def test_unreachable_replica_falls_back_to_primary(client, tmp_path, monkeypatch):
+    """Test that a failing replica is skipped and reads use the primary"""
+    broken = create_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    replica_set = ReplicaSet([broken], retry_after=30)
+    monkeypatch.setattr(routing, "replicas", replica_set)
+
+    response = client.get("/api/products/")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == []
+    assert replica_set.failures == 1
+    assert replica_set.status()[0]["healthy"] is False
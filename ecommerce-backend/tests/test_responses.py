@@ -0,0 +1,49 @@
+import pytest
+from fastapi import status
+
+from app.config.settings import settings
+
+
+@pytest.fixture
+def order(client, auth_headers):
+    """An order for a freshly created product"""
+    product = client.post(
+        "/api/products/",
+        json={"name": "Lamp", "description": "Warm light", "price": 12.5, "stock": 5, "category": "Home"},
+        headers=auth_headers
+    ).json()
+    return client.post("/api/orders/", json={
+        "items": [{"product_id": product["id"], "name": "Lamp", "quantity": 2, "price": 12.5}],
+        "shipping_address": "123 Encoding Street"
+    }, headers=auth_headers).json()
+
+
+@pytest.mark.parametrize("path, params", [
+    ("/api/products/", {}),
+    ("/api/products/", {"after": "", "facets": True}),
+    ("/api/products/search", {"q": "lamp"}),
+    ("/api/products/1", {}),
+    ("/api/orders/", {}),
+    ("/api/orders/", {"after": ""}),
+    ("/api/orders/1", {}),
+])
+def test_fast_json_matches_response_model(client, auth_headers, order, monkeypatch, path, params):
+    """Test that the one-pass encoding returns what response_model would"""
+    fast = client.get(path, params=params, headers=auth_headers)
+    monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", False)
+    slow = client.get(path, params=params, headers=auth_headers)
+    
+    assert fast.status_code == slow.status_code == status.HTTP_200_OK
+    assert fast.headers["content-type"] == "application/json"
+    assert fast.json() == slow.json()
+    assert fast.headers.get("etag") == slow.headers.get("etag")
+
+
+def test_fast_json_keeps_status_code(client, auth_headers):
+    """Test that created resources still answer 201 with the response schema"""
+    response = client.post("/api/products/", json={"name": "Desk", "price": 80}, headers=auth_headers)
+    
+    assert response.status_code == status.HTTP_201_CREATED
+    assert set(response.json()) == {
+        "id", "sku", "name", "description", "price", "stock", "category", "image_url", "created_at", "updated_at"
+    }
@@ -0,0 +1,106 @@
+import pytest
+from fastapi import status
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+
+from app.models.product import Product
+from app.services.search import prefix_tsquery
+from app.services.search_index import highlight
+
+
+@pytest.fixture
+def catalog(client, auth_headers):
+    """A few products with overlapping words"""
+    products = [
+        {"name": "Gaming Laptop", "description": "Fast laptop with a bright screen", "price": 1500.0},
+        {"name": "Laptop Sleeve", "description": "Padded sleeve", "price": 25.0},
+        {"name": "Desk Lamp", "description": "Pairs well with any laptop", "price": 40.0},
+        {"name": "Coffee Mug", "description": "Ceramic mug", "price": 9.0},
+    ]
+    return {
+        product["name"]: client.post("/api/products/", json=product, headers=auth_headers).json()
+        for product in products
+    }
+
+
+def search(client, q, **params):
+    response = client.get("/api/products/search", params={"q": q, **params})
+    assert response.status_code == status.HTTP_200_OK, response.text
+    return response.json()
+
+
+def test_search_ranks_name_matches_first(client, catalog):
+    """Test that prefix terms match and name hits outrank description hits"""
+    hits = search(client, "lapt")
+    
+    names = [hit["name"] for hit in hits]
+    assert set(names) == {"Gaming Laptop", "Laptop Sleeve", "Desk Lamp"}
+    assert names[-1] == "Desk Lamp"
+    assert hits[0]["rank"] >= hits[1]["rank"] >= hits[2]["rank"] > 0
+
+
+def test_search_highlights_matches(client, catalog):
+    """Test highlighted name and description snippets"""
+    hit = search(client, "gaming")[0]
+    
+    assert hit["highlights"]["name"] == "<mark>Gaming</mark> Laptop"
+    assert hit["highlights"]["description"] == "Fast laptop with a bright screen"
+
+
+def test_search_requires_every_term(client, catalog):
+    """Test that all query words must match"""
+    assert [hit["name"] for hit in search(client, "laptop padded")] == ["Laptop Sleeve"]
+    assert search(client, "laptop ceramic") == []
+    assert search(client, "!!!") == []
+
+
+def test_search_pagination(client, catalog):
+    """Test skip/limit over ranked results"""
+    first = search(client, "laptop", limit=2)
+    rest = search(client, "laptop", skip=2, limit=2)
+    
+    assert len(first) == 2
+    assert [hit["name"] for hit in rest] == ["Desk Lamp"]
+
+
+def test_search_follows_writes(client, auth_headers, catalog):
+    """Test that the in-process index tracks updates and deletes"""
+    assert search(client, "mug")
+    
+    mug_id = catalog["Coffee Mug"]["id"]
+    client.put(f"/api/products/{mug_id}", json={"name": "Coffee Cup", "description": "Ceramic cup"}, headers=auth_headers)
+    
+    assert search(client, "mug") == []
+    assert [hit["id"] for hit in search(client, "cup")] == [mug_id]
+    
+    client.delete(f"/api/products/{mug_id}", headers=auth_headers)
+    
+    assert search(client, "cup") == []
+
+
+def test_search_requires_query(client):
+    """Test that q is mandatory"""
+    response = client.get("/api/products/search")
+    
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_highlight_trims_long_text():
+    """Test that snippets keep a window around the first match"""
+    text = " ".join(f"word{i}" for i in range(100)) + " needle " + "tail " * 50
+    
+    snippet = highlight(text, ["needle"], max_words=10)
+    
+    assert "<mark>needle</mark>" in snippet
+    assert len(snippet.split()) == 10
+    assert snippet.startswith("word")
+
+
+def test_postgres_search_index_ddl():
+    """Test the GIN expression index that PostgreSQL search relies on"""
+    index = next(index for index in Product.__table__.indexes if index.name == "ix_products_search")
+    ddl = str(CreateIndex(index).compile(dialect=postgresql.dialect()))
+    
+    assert "USING gin" in ddl
+    assert "setweight(to_tsvector('english', coalesce(name, '')), 'A')" in ddl
+    assert prefix_tsquery(["gam", "lap"]) == "gam:* & lap:*"